@@ -0,0 +1,49 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Benchmarks of latlon plots with the real Natural Earth coastlines.
+
+Projecting and drawing the coastlines is most of the cost of a latlon plot,
+which the stand-in coastlines used by the other benchmarks don't show. These
+are skipped unless the coastlines used by cartopy are already on disk.
+"""
+
+import pytest
+
+cartopy = pytest.importorskip('cartopy')
+
+import padme
+from padme.plotters.two_dimensional.geometry_cache import geometry_cache
+from padme.testing import natural_earth_found
+
+from conftest import make_data
+
+pytestmark = pytest.mark.skipif(
+    not natural_earth_found('110m'),
+    reason='the Natural Earth coastlines have not been downloaded for cartopy')
+
+
+@pytest.fixture(params=(False, True), ids=('no_geometry_cache', 'geometry_cache'))
+def domain_cache(request, tmp_path):
+    # an empty cache, instead of the user's, which is filled by the warmup
+    original = (geometry_cache.enabled, geometry_cache.directory)
+    geometry_cache.enabled = request.param
+    geometry_cache.directory = tmp_path / 'padme_cache'
+    yield request.param
+    geometry_cache.enabled, geometry_cache.directory = original
+
+
+@pytest.mark.benchmark(group='plot() natural earth')
+@pytest.mark.parametrize('domain', ('global', 'arctic'))
+def bench_plot_natural_earth(benchmark, domain, domain_cache, tmp_path):
+    # full pipeline, including the projection of the real coastlines
+    full_data = make_data('latlon')
+    filename = str(tmp_path / 'plot.png')
+
+    def plot(data):
+        padme.Plotter(data, plot_parameters={'domain': domain}).plot(data, filename)
+    benchmark.pedantic(
+        plot, setup=lambda: ((full_data.get_variables('air_temperature.OmB.mean'),), {}),
+        rounds=5, warmup_rounds=1)
@@ -0,0 +1,106 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Benchmarks of padme.Data operations."""
+
+import time
+
+import numpy
+import pytest
+
+import padme
+
+from conftest import make_data, make_raw_data
+
+
+@pytest.mark.benchmark(group='Data()')
+def bench_data_init(benchmark, shape):
+    raw_data, coords, coord_edges = make_raw_data(shape)
+    benchmark(
+        padme.Data, 'EXP1', data=raw_data, coords=coords, coord_edges=coord_edges)
+
+
+@pytest.mark.benchmark(group='Data.get_variables')
+def bench_data_get_variables(benchmark, shape):
+    data = make_data(shape)
+    benchmark(data.get_variables, 'air_temperature.OmB.mean')
+
+
+@pytest.mark.benchmark(group='Data.variables')
+def bench_data_variables(benchmark, shape):
+    # what each data handler does while a plot is consuming data
+    def consume(data):
+        while data.nvars:
+            vars = data.variables
+            data.remove_variable(next(iter(vars.keys())))
+    benchmark.pedantic(
+        consume, setup=lambda: ((make_data(shape),), {}), rounds=5)
+
+
+@pytest.mark.benchmark(group='Data.diff')
+def bench_data_diff(benchmark, shape):
+    data = make_data(shape, seed=1)
+    control = make_data(shape, name='CNTRL', seed=2)
+    benchmark(data.diff, control)
+
+
+@pytest.mark.benchmark(group='Data.diff')
+def bench_data_diff_many(benchmark, shape):
+    # 10 experiments minus a single control
+    data = padme.Data.merge(
+        make_data(shape, name=f'EXP{i}', seed=i) for i in range(1, 11))
+    control = make_data(shape, name='CNTRL', seed=0)
+    benchmark(data.diff, control)
+
+
+@pytest.mark.benchmark(group='Data.merge')
+def bench_data_merge(benchmark, shape):
+    exps = [make_data(shape, name=f'EXP{i}', seed=i) for i in range(24)]
+    benchmark(padme.Data.merge, exps)
+
+
+def make_cycle(shape: str, cycle: int) -> padme.Data:
+    raw_data, coords, coord_edges = make_raw_data(shape, seed=cycle)
+    start = numpy.datetime64('2022-01-01T00:00:00') + numpy.timedelta64(6*cycle, 'h')
+    raw_data.attrs = {'window_start': f'{start}Z',
+                      'window_end': f'{start + numpy.timedelta64(6, "h")}Z'}
+    return padme.Data('EXP1', data=raw_data, coords=coords, coord_edges=coord_edges)
+
+
+@pytest.mark.benchmark(group='Data.concat')
+@pytest.mark.parametrize('shape', ('global', 'lat'))
+def bench_data_concat(benchmark, shape):
+    # 250 days of 6 hourly cycles
+    cycles = [make_cycle(shape, i) for i in range(1000)]
+    benchmark.pedantic(padme.Data.concat, args=(cycles,), rounds=5)
+
+
+@pytest.mark.benchmark(group='DataAdapter.load_many')
+@pytest.mark.parametrize('max_workers', (1, 16))
+def bench_load_many(benchmark, max_workers, monkeypatch, tmp_path):
+    # reading each cycle file waits 2ms for I/O, with the GIL released
+    cycles = [make_cycle('lat', i) for i in range(200)]
+    def adapter(filename):
+        time.sleep(0.002)
+        return cycles[int(filename)]
+    monkeypatch.setitem(padme.DataAdapter._adapters, 'cycles', adapter)
+    filenames = [str(i) for i in range(len(cycles))]
+    benchmark.pedantic(
+        padme.DataAdapter.load_many, args=('cycles', filenames),
+        kwargs={'max_workers': max_workers}, rounds=5)
+
+
+@pytest.mark.benchmark(group='statistics')
+@pytest.mark.parametrize('method', ('field_statistics', 'numpy'))
+def bench_field_statistics(benchmark, method):
+    from padme.core.statistics import field_statistics
+    z = numpy.random.default_rng(0).normal(size=(1000, 2000))
+    if method == 'field_statistics':
+        benchmark(field_statistics, z, 0.99)
+    else:
+        # what ColorMesh did before, for comparison
+        benchmark(lambda: (
+            numpy.nanpercentile(z, [0.5, 99.5]),
+            numpy.nanmin(z), numpy.nanmean(z), numpy.nanmax(z)))
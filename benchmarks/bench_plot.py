@@ -0,0 +1,108 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Benchmarks of the Plotter dispatch, data handlers, and full plots."""
+
+import pytest
+
+import padme
+from padme.plotters.matplotlib_base import figure_templates
+from padme.plotters.two_dimensional.two_dimensional import ColorMesh
+
+from conftest import make_data
+
+# the latlon plots use stand-in coastlines, so no data is downloaded
+pytestmark = pytest.mark.usefixtures('natural_earth')
+
+# shapes that can be plotted directly
+PLOT_SHAPES = ('global', 'lat', 'latlon')
+
+
+@pytest.fixture(params=PLOT_SHAPES)
+def plot_shape(request):
+    return request.param
+
+
+@pytest.fixture(params=(False, True), ids=('no_templates', 'templates'))
+def templates(request):
+    figure_templates.enabled = request.param
+    yield request.param
+    figure_templates.clear()
+    figure_templates.enabled = False
+
+
+@pytest.mark.benchmark(group='Plotter()')
+def bench_plotter_dispatch(benchmark, plot_shape):
+    data = make_data(plot_shape).get_variables('air_temperature.OmB.mean')
+    padme.Plotter.load()
+    benchmark(padme.Plotter, data)
+
+
+@pytest.mark.benchmark(group='ColorMesh.process')
+def bench_colormesh_process(benchmark):
+    data = make_data('latlon')
+    figure_templates.enabled = True
+
+    def process(data):
+        ColorMesh().process(data, plotter)
+        plotter._template.reset()
+    try:
+        plotter = padme.Plotter(data.get_variables('air_temperature.OmB.mean'))
+        plotter._pre_plot()
+        benchmark.pedantic(
+            process,
+            setup=lambda: ((data.get_variables('air_temperature.OmB.mean'),), {}),
+            rounds=10)
+    finally:
+        figure_templates.clear()
+        figure_templates.enabled = False
+
+
+@pytest.mark.benchmark(group='plot()')
+@pytest.mark.parametrize('fmt', ('jpg', 'png'))
+def bench_plot(benchmark, plot_shape, fmt, templates, tmp_path):
+    # full pipeline, from the Plotter factory to the output file
+    full_data = make_data(plot_shape)
+    filename = str(tmp_path / f'plot.{fmt}')
+
+    def plot(data):
+        padme.Plotter(data).plot(data, filename)
+    benchmark.pedantic(
+        plot, setup=lambda: ((full_data.get_variables('air_temperature.OmB.mean'),), {}),
+        rounds=5, warmup_rounds=1)
+
+
+@pytest.mark.benchmark(group='animation')
+@pytest.mark.parametrize('method', ('animation', 'plots'))
+def bench_animation(benchmark, method, tmp_path):
+    # all 20 channels, as a single animation or as a plot per channel
+    full_data = make_data('latlon_channels')
+    figure_templates.enabled = True
+
+    def plot(data):
+        if method == 'animation':
+            padme.Plotter(data).plot(data, str(tmp_path / 'anim.gif'))
+        else:
+            for ch, data_ch in data.iter_dimension('sensor_channel'):
+                padme.Plotter(data_ch).plot(data_ch, str(tmp_path / f'plot.{ch}.png'))
+    try:
+        benchmark.pedantic(
+            plot, setup=lambda: ((full_data.get_variables('air_temperature.OmB.mean'),), {}),
+            rounds=3)
+    finally:
+        figure_templates.clear()
+        figure_templates.enabled = False
+
+
+@pytest.mark.benchmark(group='autoplot.shared_color_ranges')
+def bench_shared_color_ranges(benchmark, tmp_path):
+    # the pre-pass over all the channel plots of two experiments, which
+    # should be small compared to making the plots
+    from padme.bin import autoplot
+    tasks = [
+        t for i in range(2)
+        for t in autoplot.experiment_tasks(
+            make_data('latlon_channels', f'EXP{i}', seed=i), str(tmp_path / f'EXP{i}'), {})]
+    benchmark(autoplot.shared_color_ranges, tasks)
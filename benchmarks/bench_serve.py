@@ -0,0 +1,73 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Latency of a plot from "padme serve", compared to "padme plot"."""
+
+import json
+import subprocess
+import sys
+import threading
+import urllib.request
+
+import numpy
+import pytest
+
+from padme.bin import serve
+
+NLOCS = 100_000
+
+
+@pytest.fixture(scope='module')
+def ioda_file(tmp_path_factory):
+    netCDF4 = pytest.importorskip('netCDF4')
+    rng = numpy.random.default_rng(0)
+    filename = str(tmp_path_factory.mktemp('serve') / 'obs.nc')
+    with netCDF4.Dataset(filename, 'w') as nc:
+        nc.createDimension('Location', NLOCS)
+        g = nc.createGroup('MetaData')
+        g.createVariable('latitude', 'f4', ('Location',))[:] = rng.uniform(-90, 90, NLOCS)
+        g.createVariable('longitude', 'f4', ('Location',))[:] = rng.uniform(0, 360, NLOCS)
+        for group in ('ObsValue', 'hofx'):
+            nc.createGroup(group).createVariable(
+                'airTemperature', 'f4', ('Location',))[:] = rng.normal(250, 10, NLOCS)
+    return filename
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = serve.PlotServer(('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/plot'
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+# a zonal mean plot, so that no map data is needed
+SPEC = {'format': 'ioda', 'diagnostic': 'OmB:mean',
+        'options': {'bins': {'latitude': 90}}}
+
+
+@pytest.mark.benchmark(group='serve')
+def bench_serve_request(benchmark, server, ioda_file):
+    data = json.dumps({**SPEC, 'input': ioda_file}).encode()
+    def request():
+        with urllib.request.urlopen(urllib.request.Request(server, data=data)) as r:
+            return r.read()
+    request()  # the first request reads the file
+    benchmark(request)
+
+
+@pytest.mark.benchmark(group='serve')
+def bench_cli_plot(benchmark, ioda_file, tmp_path):
+    args = [
+        sys.executable, '-c', 'import padme.bin.padme as p; p.cli()',
+        'plot', ioda_file, '-o', str(tmp_path / 'plot.png'),
+        '-f', SPEC['format'], '-d', SPEC['diagnostic'],
+        '--option', 'bins:{latitude: 90}']
+    benchmark.pedantic(
+        subprocess.run, args=(args,), kwargs={'check': True, 'capture_output': True},
+        rounds=5)
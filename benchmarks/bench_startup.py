@@ -0,0 +1,33 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Startup time of the padme package and command line tools."""
+
+import subprocess
+import sys
+
+import pytest
+
+
+def run(*args):
+    subprocess.run([sys.executable, *args], check=True, capture_output=True)
+
+
+@pytest.mark.benchmark(group='startup')
+def bench_import_padme(benchmark):
+    benchmark.pedantic(run, args=('-c', 'import padme'), rounds=5)
+
+
+@pytest.mark.benchmark(group='startup')
+def bench_cli_help(benchmark):
+    benchmark.pedantic(
+        run, args=('-c', 'import padme.bin.padme as p; p.cli(["--help"])'),
+        rounds=5)
+
+
+@pytest.mark.benchmark(group='startup')
+def bench_load_plotters(benchmark):
+    benchmark.pedantic(
+        run, args=('-c', 'import padme; padme.Plotter.load()'), rounds=5)
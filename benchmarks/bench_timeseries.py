@@ -0,0 +1,46 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Appending to, and reading from, a time series store."""
+
+import numpy
+import pytest
+
+import padme
+from padme.data_adapters.timeseries import TimeSeriesStore
+
+from conftest import make_raw_data
+
+NCYCLES = 2000  # ~16 months of 6 hourly cycles
+
+
+def make_cycle(cycle: int) -> padme.Data:
+    raw_data, coords, coord_edges = make_raw_data('global', seed=cycle)
+    start = numpy.datetime64('2020-01-01T00:00:00') + numpy.timedelta64(6*cycle, 'h')
+    raw_data.attrs = {'window_start': f'{start}Z',
+                      'window_end': f'{start + numpy.timedelta64(6, "h")}Z'}
+    return padme.Data('EXP1', data=raw_data, coords=coords, coord_edges=coord_edges)
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    pytest.importorskip('netCDF4')
+    store = TimeSeriesStore(str(tmp_path_factory.mktemp('timeseries') / 'store.nc'))
+    for i in range(NCYCLES):
+        store.append(make_cycle(i))
+    return store
+
+
+@pytest.mark.benchmark(group='timeseries')
+def bench_timeseries_append(benchmark, store):
+    cycles = iter(range(NCYCLES, NCYCLES + 1000))
+    benchmark.pedantic(
+        store.append, setup=lambda: ((make_cycle(next(cycles)),), {}), rounds=20)
+
+
+@pytest.mark.benchmark(group='timeseries')
+def bench_timeseries_read_90days(benchmark, store):
+    benchmark(padme.DataAdapter, 'timeseries', filename=store.filename,
+              start='2020-10-01T00:00:00Z', end='2020-12-30T18:00:00Z')
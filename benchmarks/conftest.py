@@ -0,0 +1,78 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Synthetic BESPIN-like data of increasing size, for the benchmarks."""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy
+import pytest
+import xarray
+
+import padme
+
+OBS_VARS = ('air_temperature', 'eastward_wind', 'northward_wind', 'specific_humidity')
+DIAGS = ('ObsValue', 'hofx', 'OmB')
+STATS = ('mean', 'stddev', 'rmsd')
+
+# bin edges for each of the synthetic dataset shapes
+SHAPES = {
+    'global': (),
+    'lat': ('latitude',),
+    'latlon': ('latitude', 'longitude'),
+    'latlon_channels': ('latitude', 'longitude', 'sensor_channel'),
+}
+EDGES = {
+    'latitude': numpy.linspace(-90.0, 90.0, 91),
+    'longitude': numpy.linspace(0.0, 360.0, 181),
+}
+CHANNELS = numpy.arange(1, 21)
+
+
+def make_raw_data(shape: str, seed: int = 0):
+    """Create the xarray.Dataset and coordinates for one experiment."""
+    dims = SHAPES[shape]
+    sizes = [len(EDGES[d])-1 if d in EDGES else len(CHANNELS) for d in dims]
+    rng = numpy.random.default_rng(seed)
+
+    data_vars = {}
+    for v in OBS_VARS:
+        data_vars[f'{v}.count'] = (dims, rng.integers(0, 100, sizes).astype(float))
+        for diag in DIAGS:
+            for stat in STATS:
+                data_vars[f'{v}.{diag}.{stat}'] = (dims, rng.standard_normal(sizes))
+    raw_data = xarray.Dataset(
+        data_vars=data_vars,
+        attrs={'window_start': '2022-01-01T00:00:00Z',
+               'window_end': '2022-01-01T06:00:00Z'})
+
+    coord_edges = [
+        xarray.DataArray(EDGES[d], name=d, dims=(d,)) for d in dims if d in EDGES]
+    coords = [
+        xarray.DataArray(CHANNELS, name=d, dims=(d,)) for d in dims if d not in EDGES]
+    return raw_data, coords, coord_edges
+
+
+def make_data(shape: str, name: str = 'EXP1', seed: int = 0) -> padme.Data:
+    raw_data, coords, coord_edges = make_raw_data(shape, seed)
+    return padme.Data(name, data=raw_data, coords=coords, coord_edges=coord_edges)
+
+
+@pytest.fixture(params=SHAPES.keys())
+def shape(request):
+    return request.param
+
+
+@pytest.fixture(scope='module')
+def natural_earth(tmp_path_factory):
+    """The stand-in Natural Earth coastlines used by the tests, so that the
+    latlon benchmarks can run without downloading any data. This is only
+    for a module at a time, the others can use the real coastlines."""
+    pytest.importorskip('cartopy')
+    pytest.importorskip('shapefile')
+    from padme.testing import stand_in_natural_earth
+    with stand_in_natural_earth(tmp_path_factory.mktemp('cartopy')) as data_dir:
+        yield data_dir
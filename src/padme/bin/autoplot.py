@@ -6,37 +6,214 @@
 # TODO this all is "temporary" for use during initial dev, needs to be
 # cleaned up
 
+import collections
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import cProfile
+import functools
+import itertools
+import pstats
+from typing import BinaryIO, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import traceback
+
 import click
+import yaml
+
 import padme
+from padme.core import timing
+from padme.core.statistics import RangeSketch
+
+PlotTask = Tuple[padme.Data, Union[str, BinaryIO], dict, Tuple[str, ...]]
+
+
+class TaskResult(NamedTuple):
+    """The outcome of a single plot task."""
+    filename: str
+    error: Optional[str] = None
+    timings: List[Tuple[str, float]] = []
+    stats: Optional[dict] = None  # cProfile stats, from a worker process
+
+
+def plot_one(data: padme.Data, filename: Union[str, BinaryIO], plot_parameters: dict,
+             diag: Tuple[str, ...]):
+    """Generate a single plot for the given diagnostic."""
+    plotter = padme.Plotter(data=data, plot_parameters=plot_parameters)
+
+    # set specific plotting parameters depending on what we are plotting
+    # TODO this is hacky, find a cleaner way to do it.
+    #  Assign attributes to the data xarray?
+    if data.diff_name is not None:
+        data.divergent = True
+    if isinstance(plotter, (padme.plotters.two_dimensional.TwoDimensional,
+                            padme.plotters.two_dimensional.Animation)):
+        if diag[0] in ('OmB', 'OmA') and diag[1] == 'mean':
+            data.divergent = True
+
+    # generate plot
+    plotter.plot(data, filename=filename)
+
+
+def plot_tasks(data: padme.Data, filename_pfx: str, plot_parameters: dict, **kwargs) -> Iterator[PlotTask]:
+    """Generate the list of plots that can be made from the given data.
 
-def plot_all(data: padme.Data, filename_pfx: str, plot_parameters: dict, **kwargs):
+    Each task holds only the variable needed for that plot. The files are
+    jpg images, unless another extension is given as "ext"."""
     # for each variable / statistic
     keys = [str(v).split(".") for v in data.variables.keys()]
-    for v in set([v[0] for v in keys]):
+    for v in dict.fromkeys([v[0] for v in keys]):
         # filter out raw "count" diagnostic
         p2 = [k[1:] for k in keys if k[0] == v and len(k) > 2]
         for diag in p2:
             name = '.'.join( (v, *diag) )
-            d = data.get_variables( name )
-            plotter = padme.Plotter(data=d, plot_parameters=plot_parameters)
             filename_components = [
                 filename_pfx, v,
                 None if 'ch' not in kwargs else f'ch{kwargs["ch"]}',
-                *diag, 'jpg']
+                *diag, kwargs.get('ext', 'jpg')]
             filename='.'.join( [f for f in filename_components if f is not None] )
-            print(f'Plotting {filename}')
+            yield (data.get_variables(name), filename, plot_parameters, tuple(diag))
+
+
+def experiment_tasks(data: padme.Data, filename_pfx: str, plot_parameters: dict) -> Iterator[PlotTask]:
+    """Generate the plot tasks for a single experiment."""
+    # if input data is multichannel 2D, process one channel at a time
+    if len(data.dimensions) == 3 and 'sensor_channel' in data.dimensions:
+        return itertools.chain.from_iterable(
+            plot_tasks(data_channel, filename_pfx, plot_parameters, ch=ch)
+            for ch, data_channel in data.iter_dimension('sensor_channel'))
+    # any other 3rd dimension (e.g. time) is animated
+    if len(data.dimensions) == 3:
+        return plot_tasks(data, filename_pfx, plot_parameters, ext='gif')
+    return plot_tasks(data, filename_pfx, plot_parameters)
+
+
+def shared_color_ranges(tasks: Iterable[PlotTask]) -> List[PlotTask]:
+    """Give all the color mesh plots of the same variable and diagnostic
+    the same color range, so that they can be compared.
+
+    This is a single pass over the data of all the tasks, before any plots
+    are made. The values of each plot are added to a sketch of its group,
+    and the range of each group is then given to its plots as the
+    "mesh.vmin" and "mesh.vmax" parameters, unless they are already set.
+    Differences are grouped separately from the plain values. Lazy values
+    are read in once, and kept for the plot.
+    """
+    tasks = list(tasks)
+    keys: List[Optional[Hashable]] = []
+    sketches: Dict[Hashable, RangeSketch] = {}
+    for data, _, plot_parameters, diag in tasks:
+        try:
+            parameters = padme.Plotter.plotter_class(data).parameters
+        except (RuntimeError, NotImplementedError):
+            parameters = {}  # the error is reported when plotting instead
+        if 'mesh.vmin' not in parameters:
+            keys.append(None)
+            continue
+
+        # the values plotted are those of the first variable and experiment
+        v, values = next(iter(data.load().variables.items()))
+        pct = float(plot_parameters.get('range_pct', parameters['range_pct']))
+        key = (v, diag, data.diff_name is not None, pct)
+        sketches.setdefault(key, RangeSketch()).update(
+            next(iter(values.data_vars.values())).data)
+        keys.append(key)
+
+    # a plot on its own keeps its exact range
+    counts = collections.Counter(keys)
+    ranges = {
+        k: sketches[k].statistics(k[-1]) for k in sketches if counts[k] > 1}
+    shared = []
+    for task, key in zip(tasks, keys):
+        if key in ranges:
+            stats = ranges[key]
+            plot_parameters = {
+                'mesh.vmin': stats.lower, 'mesh.vmax': stats.upper, **task[2]}
+            task = (task[0], task[1], plot_parameters, task[3])
+        shared.append(task)
+    return shared
+
+
+def _merge(exps: List[padme.Data]) -> padme.Data:
+    return exps[0] if len(exps) == 1 else padme.Data.merge(exps)
 
-            # set specific plotting parameters depending on what we are plotting
-            # TODO this is hacky, find a cleaner way to do it.
-            #  Assign attributes to the data xarray?
-            if d.diff_name is not None:
-                d.divergent = True
-            if isinstance(plotter, padme.plotters.two_dimensional.TwoDimensional):
-                if diag[0] in ('OmB', 'OmA') and diag[1] == 'mean':
-                    d.divergent = True
 
-            # generate plot
-            plotter.plot(d, filename= filename)
+def _init_worker() -> None:
+    # each worker process gets its own non-interactive matplotlib state
+    import matplotlib
+    matplotlib.use('Agg')
+    padme.plotters.matplotlib_base.figure_templates.enabled = True
+
+
+def _run_task(task: PlotTask, profile: bool = False, cprofile: bool = False) -> TaskResult:
+    """Run a single plot task in a worker process, catching any errors."""
+    prof = cProfile.Profile() if cprofile else None
+    error = None
+    with timing.StageTimer() if profile else contextlib.nullcontext() as timer:
+        if prof is not None:
+            prof.enable()
+        try:
+            plot_one(*task)
+        except Exception:
+            error = traceback.format_exc()
+        if prof is not None:
+            prof.disable()
+            prof.create_stats()
+
+    return TaskResult(
+        task[1], error,
+        timer.records if profile else [],
+        prof.stats if prof is not None else None) # type: ignore
+
+
+def run_tasks(
+        tasks: Iterable[PlotTask],
+        jobs: int = 1,
+        profile: bool = False,
+        cprofile: bool = False) -> List[TaskResult]:
+    """Generate plots, either serially or with a pool of worker processes.
+
+    When run in parallel, plots are reported in the order they were
+    generated, and any failures are collected and raised at the end.
+    If "profile" is True, the time spent in each stage of each plot is
+    returned with the results. If "cprofile" is True, each worker process
+    also returns the cProfile stats of its plots.
+    """
+    results = []
+    if jobs == 1:
+        for task in tasks:
+            print(f'Plotting {task[1]}')
+            with timing.StageTimer() if profile else contextlib.nullcontext() as timer:
+                plot_one(*task)
+            results.append(TaskResult(task[1], timings=timer.records if profile else []))
+        return results
+
+    tasks = list(tasks)
+    run_task = functools.partial(_run_task, profile=profile, cprofile=cprofile)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        results = list(pool.map(run_task, tasks))
+
+    failures = []
+    for result in results:
+        print(f'Plotting {result.filename}{"" if result.error is None else "  FAILED"}')
+        if result.error is not None:
+            failures.append(result)
+    if failures:
+        for result in failures:
+            print(f'ERROR while plotting {result.filename}:\n{result.error}')
+        raise RuntimeError(f'{len(failures)} of {len(tasks)} plots failed.')
+    return results
+
+
+class _ProfileStats():
+    """Raw cProfile stats, in a form that can be passed to pstats.Stats()."""
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def plot_all(data: padme.Data, filename_pfx: str, plot_parameters: dict, jobs: int = 1, **kwargs):
+    return run_tasks(plot_tasks(data, filename_pfx, plot_parameters, **kwargs), jobs)
 
 
 @click.command()
@@ -45,9 +222,12 @@ def plot_all(data: padme.Data, filename_pfx: str, plot_parameters: dict, **kwarg
     required=True, help="prefix for output files",)
 @click.option('--diff', is_flag=True, help=(
     "Difference plots: the first input file is subtracted from all the"
-    " others."),)
+    " others. Otherwise each input file is plotted separately."),)
+@click.option('--timeseries', is_flag=True, help=(
+    "Time series plots: the input files are the cycles of a single"
+    " experiment, which are read concurrently and stacked along time."),)
 @click.option('--domain', default='global',
-    type=click.Choice(padme.plotters.two_dimensional.latlon.domains.keys()),
+    type=click.Choice(padme.plotters.domains.load_domains().keys()),
     help="The domain used for any latlon plots")
 @click.option('-s', '--dim_select',
     multiple=True,
@@ -55,12 +235,28 @@ def plot_all(data: padme.Data, filename_pfx: str, plot_parameters: dict, **kwarg
 @click.option('-c', '--dim_collapse',
     multiple=True,
     help="Collapse the specified dimension. Format: \"<dim_name>\"")
+@click.option('--shared_range', is_flag=True, help=(
+    "Plots of the same variable and diagnostic (e.g. for each experiment or"
+    " channel) share the same color range."),)
+@click.option('--chunks', help=(
+    "Split the variables read into dask chunks of this size. Format: \"auto\","
+    " or YAML such as \"{sensor_channel: 1}\" (see xarray.Dataset.chunk)"),)
+@click.option('-j', '--jobs', default=1, type=click.IntRange(min=1),
+    help="Number of worker processes used to generate plots in parallel")
+@click.option('--profile', type=click.Path(writable=True, dir_okay=False),
+    help="Write the time spent in each stage of each plot to this file (.json or .csv)")
+@click.option('--cprofile', type=click.Path(writable=True, dir_okay=False),
+    help="Dump cProfile stats of the whole run to this file")
 @click.argument('input_files',
     type=click.Path(exists=True, dir_okay=False),
     nargs=-1, required=True)
-def autoplot(input_files, output, diff, domain, dim_select, dim_collapse, format='bespin'):
+def autoplot(input_files, output, diff, timeseries, domain, dim_select, dim_collapse,
+             shared_range, chunks, jobs, profile, cprofile, format='bespin'):
     """Bespin Autoplot - Generate as many plots as possible from a given file."""
 
+    prof = cProfile.Profile() if cprofile else None
+    if prof is not None:
+        prof.enable()
 
     # set options
     plot_parameters = {
@@ -70,38 +266,71 @@ def autoplot(input_files, output, diff, domain, dim_select, dim_collapse, format
 
     # read in data
     select = {s.split(':')[0]: s.split(':')[1] for s in dim_select}
-    data = None
-    data0 = None  # the control dataset when doing diff plots
-    for input_file in input_files:
-        data2 = padme.DataAdapter(format, filename=input_file,
-            collapse=dim_collapse,
-            select=select,
-            variables={'statistic':( 'count', 'mean', 'stddev', 'rmsd')})
-
+    read_args = dict(
+        collapse=dim_collapse,
+        select=select,
+        variables={'statistic':( 'count', 'mean', 'stddev', 'rmsd')})
+    if chunks is not None:
+        read_args['chunks'] = yaml.safe_load(chunks)
+    names = [f'EXP{i+1}' for i in range(len(input_files))]
+    if diff:
+        names = ['CNTRL', *names[:-1]]
+    exps = []
+    timings = []
+    if timeseries:
         if diff:
-            if data0 is None:
-                data0 = data2
-            else:
-                if data is not None:
-                    raise NotImplementedError('calc diff of >1 exp')
-                data = data2 - data0
-        else:
-            if data is not None:
-                raise NotImplementedError('exp >1 if not diff')
-            data = data2
+            raise click.UsageError('--timeseries and --diff can not be used together')
+        with timing.StageTimer() as timer:
+            exps.append(padme.DataAdapter.load_many(format, input_files, **read_args))
+        timings.append(TaskResult(input_files[0], timings=timer.records))
+    else:
+        for name, input_file in zip(names, input_files):
+            with timing.StageTimer() as timer:
+                exps.append(padme.DataAdapter(
+                    format, filename=input_file, name=name, **read_args))
+            timings.append(TaskResult(input_file, timings=timer.records))
+
+    if diff:
+        # the first file is the control, subtracted from all the others at once
+        if len(exps) < 2:
+            raise click.UsageError('--diff requires at least 2 input files')
+        data = _merge(exps[1:]) - exps[0]
+    else:
+        data = _merge(exps)
 
     # TODO split qc dimensions
 
-    # if input data is multichannel 2D, process one channel at a time
-    if len(data.dimensions) == 3 and 'sensor_channel' in data.dimensions:
-        dims = data.dimensions
-        del data
-        for ch in dims['sensor_channel'].data:
-            data_channel = padme.DataAdapter(
-                format, filename=input_files[0], select={'sensor_channel':ch},
-                variables={
-                    'statistic':( 'count', 'mean', 'stddev', 'rmsd')})
-
-            plot_all(data_channel, output, plot_parameters, ch=ch)
+    # plot each experiment separately, if there are more than one
+    if len(data.experiments) == 1:
+        tasks = experiment_tasks(data, output, plot_parameters)
     else:
-        plot_all(data, output, plot_parameters)
\ No newline at end of file
+        tasks = itertools.chain.from_iterable(
+            experiment_tasks(data_exp, f'{output}.{exp}', plot_parameters)
+            for exp, data_exp in data.iter_experiments())
+    if shared_range:
+        tasks = shared_color_ranges(tasks)
+
+    # plots of the same type share figure templates, only while plotting
+    templates = padme.plotters.matplotlib_base.figure_templates
+    templates_enabled = templates.enabled
+    templates.enabled = True
+    try:
+        results = run_tasks(
+            tasks, jobs, profile=profile is not None, cprofile=prof is not None)
+    finally:
+        if not templates_enabled:
+            templates.clear()
+        templates.enabled = templates_enabled
+
+    # write out profiling reports
+    if profile is not None:
+        timing.write_report(profile, (
+            {'file': r.filename, 'stage': stage, 'seconds': seconds}
+            for r in timings + results for stage, seconds in r.timings))
+    if prof is not None:
+        prof.disable()
+        stats = pstats.Stats(prof)
+        for r in results:
+            if r.stats is not None:
+                stats.add(_ProfileStats(r.stats))
+        stats.dump_stats(cprofile)
@@ -0,0 +1,118 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+from typing import Any, Dict, Iterable, Iterator, List
+
+import click
+import yaml
+
+import padme
+from . import autoplot
+from .plot import plot_task
+
+# the keys of a plot spec, and the plot_task() argument they are passed as
+SPEC_KEYS = {
+    'input': 'input_file',
+    'output': 'output',
+    'diagnostic': 'diagnostic',
+    'domain': 'domain',
+    'select': 'select',
+    'collapse': 'collapse',
+    'params': 'params',
+    'variable': 'variable',
+    'format': 'format',
+    'options': 'options',
+}
+
+
+def load_jobs(filename: str) -> List[Dict[str, Any]]:
+    """Read the plot specs from a YAML job file.
+
+    The file is either a list of plot specs, or a dictionary with the list
+    in "plots" and optional "defaults" that are used for any keys missing
+    from each plot spec. e.g.
+
+        defaults:
+          input: obs.nc
+          domain: global
+        plots:
+        - output: omb_mean.png
+          diagnostic: OmB:mean
+          params: {title: OmB mean}
+        - output: omb_stddev.png
+          diagnostic: OmB:stddev
+          select: {sensor_channel: 7}
+    """
+    with open(filename) as f:
+        jobs = yaml.safe_load(f)
+    defaults: Dict[str, Any] = {}
+    if isinstance(jobs, dict):
+        defaults = jobs.get('defaults', {})
+        jobs = jobs.get('plots', [])
+
+    specs = []
+    for i, job in enumerate(jobs):
+        spec = {**defaults, **job}
+        unknown = set(spec) - set(SPEC_KEYS)
+        if unknown:
+            raise ValueError(f'Unknown keys {sorted(unknown)} in plot {i} of {filename}')
+        for k in ('input', 'output'):
+            if k not in spec:
+                raise ValueError(f'"{k}" is missing from plot {i} of {filename}')
+        specs.append(spec)
+    return specs
+
+
+def batch_tasks(specs: Iterable[Dict[str, Any]]) -> Iterator[autoplot.PlotTask]:
+    """Read the data for each plot spec, grouped by input file.
+
+    The file for each group only needs to be read once, as long as the
+    DataAdapter cache is enabled.
+    """
+    for spec in sorted(specs, key=lambda s: str(s['input'])):
+        yield plot_task(**{SPEC_KEYS[k]: v for k, v in spec.items()})
+
+
+@click.command()
+@click.argument('job_file',
+    type=click.Path(exists=True, dir_okay=False))
+@click.option('-j', '--jobs', default=1, type=click.IntRange(min=1),
+    help="Number of worker processes used to generate plots in parallel")
+@click.option('--shared_range', is_flag=True, help=(
+    "Plots of the same variable and diagnostic share the same color range,"
+    " unless it is given in their params"),)
+def batch(job_file, jobs, shared_range):
+    """Generate all the plots described in a YAML job file.
+
+    Each plot spec has an "input" and "output" file, and optionally a
+    "diagnostic" (<diagnostic>:<statistic>), "domain", "select"
+    ({<dim_name>: <value>}), "collapse" ([<dim_name>]), "params"
+    ({<parameter>: <value>}), "variable", and data adapter "format" and
+    "options" ({<argument>: <value>}). All the
+    plots are made by a single process, or pool of processes, so each input
+    file is read only once and figures are reused between plots.
+
+    With --shared_range, the color ranges of all the plots of the same
+    variable and diagnostic are computed together, before plotting.
+    """
+    specs = load_jobs(job_file)
+
+    # plots share the data read from each file, and their figure templates,
+    # only while this job is running
+    cache = padme.DataAdapter.cache
+    templates = padme.plotters.matplotlib_base.figure_templates
+    enabled = (cache.enabled, templates.enabled)
+    cache.enabled = True
+    templates.enabled = True
+    try:
+        tasks = batch_tasks(specs)
+        if shared_range:
+            tasks = autoplot.shared_color_ranges(tasks)
+        autoplot.run_tasks(tasks, jobs)
+    finally:
+        cache.clear()
+        if not enabled[1]:
+            templates.clear()
+        cache.enabled, templates.enabled = enabled
@@ -0,0 +1,69 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import yaml
+
+import padme
+from padme.core.data import parse_time
+from padme.data_adapters.timeseries import TimeSeriesStore, reduce_statistics
+
+
+@click.command()
+@click.argument('store',
+    type=click.Path(dir_okay=False, writable=True))
+@click.argument('input_files',
+    type=click.Path(exists=True, dir_okay=False),
+    nargs=-1, required=True)
+@click.option('-e', '--experiment', default='EXP1',
+    help="The name of the experiment in the store")
+@click.option('-f', '--format', default='bespin',
+    type=click.Choice(sorted(padme.DataAdapter.types)),
+    help="The format of the input files (data adapter)")
+@click.option('-s', '--dim_select',
+    multiple=True,
+    help="Select a slice of the specified dimension. Format: \"<dim_name>:<value\"")
+@click.option('--option',
+    multiple=True,
+    help="optional <key>:<value> data adapter option, the value is parsed as YAML")
+@click.option('-j', '--jobs', default=4, type=click.IntRange(min=1),
+    help="Number of threads used to read the input files")
+def ingest(store, input_files, experiment, format, dim_select, option, jobs):
+    """Append the global statistics of each cycle to a time series store.
+
+    The statistics of each input file are reduced to global values and
+    appended to STORE (created if needed), which can then be plotted with
+    the "timeseries" data adapter. Only the new cycles are written, cycles
+    already in the store are skipped, so ingesting the same files again
+    does nothing. New cycles must be after the last one in the store, and
+    if any are not then nothing is written.
+    """
+    options = {}
+    for o in option:
+        k,v = o.split(':', 1)
+        options[k] = yaml.safe_load(v)
+    if dim_select:
+        options['select'] = {s.split(':')[0]: s.split(':')[1] for s in dim_select}
+
+    def read(input_file: str) -> padme.Data:
+        data = padme.DataAdapter(format, filename=input_file, name=experiment,
+            variables={'statistic': ('count', 'mean', 'stddev', 'rmsd')},
+            **options)
+        return padme.Data(experiment,
+            data=reduce_statistics(data.datasets[experiment]), coords=[])
+
+    # the files are read concurrently, and appended in time order
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        cycles = list(pool.map(read, input_files))
+    # nothing is written if any of the new cycles are out of order
+    try:
+        cycles.sort(key=lambda d: parse_time(d.datetime[0]))
+        appended = TimeSeriesStore(store).extend(cycles)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for data, a in zip(cycles, appended):
+        print(f'{"Ingested" if a else "Skipped"} {data.datetime[0]}')
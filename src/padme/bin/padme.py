@@ -6,8 +6,11 @@
 import click
 
 from .autoplot import autoplot
+from .batch import batch
+from .ingest import ingest
 from .plot import plot
 from .parameters import parameters
+from .serve import serve
 
 @click.group()
 @click.version_option()
@@ -21,5 +24,8 @@ def cli():
     pass
 
 cli.add_command(autoplot)
+cli.add_command(batch)
+cli.add_command(ingest)
 cli.add_command(plot)
-cli.add_command(parameters)
\ No newline at end of file
+cli.add_command(parameters)
+cli.add_command(serve)
\ No newline at end of file
@@ -9,6 +9,7 @@ import padme
 @click.command()
 def parameters():
     """display the default plotting parameters."""
+    padme.Plotter.load()
     for c in padme.PlotterBase.get_valid_classes():
         if '_factory_name' not in c.__dict__:
             continue
@@ -3,14 +3,19 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
+from typing import Any, BinaryIO, Dict, Mapping, Optional, Sequence, Union
+
 import click
+import yaml
+
 import padme
+from . import autoplot
 
 @click.command()
 @click.argument('input_file',
     type=click.Path(exists=True, dir_okay=False))
 @click.option('--domain', default='global',
-    type=click.Choice(padme.plotters.two_dimensional.latlon.domains.keys()),
+    type=click.Choice(padme.plotters.domains.load_domains().keys()),
     help="The domain used for any latlon plots")
 @click.option('-ds', '--dim_select',
     multiple=True,
@@ -25,21 +30,55 @@ import padme
     multiple=True,
     help=("optional <key>:<value> plotting parameter. Run 'padme parameters' to see the list of"
          " valid parameters and their defaults"))
+@click.option('-f', '--format', default='bespin',
+    type=click.Choice(sorted(padme.DataAdapter.types)),
+    help="The format of the input file (data adapter)")
+@click.option('--option',
+    multiple=True,
+    help="optional <key>:<value> data adapter option, the value is parsed as YAML")
 def plot(input_file, output, diagnostic, domain,
-         dim_select, dim_collapse, param):
+         dim_select, dim_collapse, param, format, option):
     """Plot a single plot """
 
     # set options
-    plot_parameters = {
-        'domain': domain,
-    }
+    plot_parameters = {}
     for p in param:
         k,v = p.split(':')
         plot_parameters[k] = v
+    options = {}
+    for o in option:
+        k,v = o.split(':', 1)
+        options[k] = yaml.safe_load(v)
+
+    select = {s.split(':')[0]: s.split(':')[1] for s in dim_select}
+    autoplot.plot_one(*plot_task(
+        input_file, output, diagnostic, domain=domain,
+        select=select, collapse=dim_collapse, params=plot_parameters,
+        format=format, options=options))
+
+
+def plot_task(
+        input_file: str,
+        output: Union[str, BinaryIO],
+        diagnostic: str = 'ObsValue:mean',
+        domain: str = 'global',
+        select: Optional[Mapping[str, Any]] = None,
+        collapse: Sequence[str] = (),
+        params: Optional[Mapping[str, Any]] = None,
+        variable: Optional[str] = None,
+        format: str = 'bespin',
+        options: Optional[Mapping[str, Any]] = None) -> autoplot.PlotTask:
+    """Read the data for a single plot, and get its plotting parameters.
+
+    "diagnostic" is "<diagnostic>:<statistic>", and "variable" optionally
+    restricts the plot to a single observed variable. "options" are any
+    other arguments for the data adapter of the given "format". "output"
+    is a filename, or a file object.
+    """
+    plot_parameters = {'domain': domain, **(params or {})}
 
     # TODO, at some point we'll want to plot multiple diagnostics
-    diag = diagnostic.split(':')[0]
-    stat = diagnostic.split(':')[1]
+    diag, stat = diagnostic.split(':')
     if 'title' not in plot_parameters:
         plot_parameters['title'] = f'{diag} {stat}'
 
@@ -48,24 +87,12 @@ def plot(input_file, output, diagnostic, domain,
         'diagnostic': diag,
         'statistic': (stat,),
         'ignore_missing': True }
-    select = {s.split(':')[0]: s.split(':')[1] for s in dim_select}
-    data = padme.DataAdapter('bespin',
-        filename=input_file,
-        select=select, collapse = dim_collapse,
-        variables=opts)
-
-    # get the plotter
-    plotter = padme.Plotter(data=data, plot_parameters=plot_parameters)
-
-    # set specific plotting parameters depending on what we are plotting
-    # TODO this is hacky, find a cleaner way to do it.
-    #  Assign attributes to the data xarray?
-    if data.diff_name is not None:
-        data.divergent = True
-    if isinstance(plotter, padme.plotters.two_dimensional.TwoDimensional):
-        if diag in ('OmB', 'OmA') and stat == 'mean':
-            data.divergent = True
-
-
-    # plot
-    plotter.plot(data=data, filename=output)
\ No newline at end of file
+    if variable is not None:
+        opts['variable'] = (variable,)
+    kwargs: Dict[str, Any] = {**(options or {}), 'variables': opts}
+    if select:
+        kwargs['select'] = dict(select)
+    if collapse:
+        kwargs['collapse'] = tuple(collapse)
+    data = padme.DataAdapter(format, filename=input_file, **kwargs)
+    return (data, output, plot_parameters, (diag, stat))
@@ -0,0 +1,195 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import io
+import json
+import traceback
+from typing import Any, Dict, Mapping, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import click
+import yaml
+
+import padme
+from . import autoplot
+from .batch import SPEC_KEYS
+from .plot import plot_task
+
+# the content type of each image format that can be requested
+IMAGE_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+}
+
+
+def render(spec: Mapping[str, Any]) -> Tuple[bytes, str]:
+    """Generate the plot for a plot spec, returning the image and its
+    content type.
+
+    The spec has the same keys as a "padme batch" plot spec, except
+    "output", and optionally the "image" format (default png).
+    """
+    spec = dict(spec)
+    image = spec.pop('image', 'png')
+    if image not in IMAGE_TYPES:
+        raise ValueError(f'Unknown image format "{image}"')
+    unknown = set(spec) - (set(SPEC_KEYS) - {'output'})
+    if unknown:
+        raise ValueError(f'Unknown keys {sorted(unknown)}')
+    if 'input' not in spec:
+        raise ValueError('"input" is missing')
+
+    import matplotlib  # not until a plot is needed, to keep the CLI fast
+
+    buf = io.BytesIO()
+    task = plot_task(output=buf, **{SPEC_KEYS[k]: v for k, v in spec.items()})
+    with matplotlib.rc_context({'savefig.format': image}):
+        autoplot.plot_one(*task)
+    return buf.getvalue(), IMAGE_TYPES[image]
+
+
+def query_spec(query: str) -> Dict[str, Any]:
+    """Convert the query string of a GET request to a plot spec.
+
+    The query uses the same forms as the "padme plot" options, e.g.
+    "?input=obs.nc&diagnostic=OmB:mean&select=sensor_channel:7&param=title:OmB"
+    where "select", "param" and "option" are "<key>:<value>", and can be
+    repeated, as can "collapse".
+    """
+    spec: Dict[str, Any] = {}
+    for k, values in parse_qs(query, strict_parsing=True).items():
+        if k in ('select', 'param', 'option'):
+            pairs = dict(v.split(':', 1) for v in values)
+            if k == 'option':
+                spec['options'] = {o: yaml.safe_load(v) for o, v in pairs.items()}
+            else:
+                spec['params' if k == 'param' else k] = pairs
+        elif k == 'collapse':
+            spec[k] = values
+        else:
+            spec[k] = values[-1]
+    return spec
+
+
+class PlotRequestHandler(BaseHTTPRequestHandler):
+    """Handle plot requests, as either
+        GET /plot?<query>      (see query_spec())
+        POST /plot             (with a JSON plot spec, see render())
+    """
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            self._reply(HTTPStatus.OK, b'ok\n', 'text/plain')
+        elif url.path == '/plot':
+            try:
+                spec = query_spec(url.query)
+            except ValueError as e:
+                self._reply(HTTPStatus.BAD_REQUEST, f'{e}\n'.encode(), 'text/plain')
+                return
+            self._plot(spec)
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, b'not found\n', 'text/plain')
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/plot':
+            self._reply(HTTPStatus.NOT_FOUND, b'not found\n', 'text/plain')
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            spec = json.loads(self.rfile.read(length))
+            if not isinstance(spec, dict):
+                raise ValueError('The plot spec must be a JSON object')
+        except ValueError as e:
+            self._reply(HTTPStatus.BAD_REQUEST, f'{e}\n'.encode(), 'text/plain')
+            return
+        self._plot(spec)
+
+    def _plot(self, spec: Dict[str, Any]) -> None:
+        try:
+            image, content_type = render(spec)
+        except (ValueError, KeyError, FileNotFoundError) as e:
+            self._reply(HTTPStatus.BAD_REQUEST, f'{e}\n'.encode(), 'text/plain')
+        except Exception:
+            self._reply(HTTPStatus.INTERNAL_SERVER_ERROR,
+                        traceback.format_exc().encode(), 'text/plain')
+        else:
+            self._reply(HTTPStatus.OK, image, content_type)
+
+    def _reply(self, status: HTTPStatus, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:  # type: ignore
+            super().log_message(format, *args)
+
+
+class PlotServer(HTTPServer):
+    """A server that keeps everything needed to make plots loaded between
+    requests.
+
+    The plotter classes are loaded, and the DataAdapter cache and the
+    figure templates are enabled, so repeated requests for the same file
+    or figure layout skip the file reads and the figure setup. Requests are
+    handled one at a time, as matplotlib isn't thread safe.
+    """
+
+    def __init__(self, address: Tuple[str, int], verbose: bool = False):
+        super().__init__(address, PlotRequestHandler)
+        self.verbose = verbose
+        padme.Plotter.load()
+        cache = padme.DataAdapter.cache
+        templates = padme.plotters.matplotlib_base.figure_templates
+        # restored when the server is closed
+        self._enabled = (cache.enabled, templates.enabled)
+        cache.enabled = True
+        templates.enabled = True
+
+    def server_close(self):
+        super().server_close()
+        cache = padme.DataAdapter.cache
+        templates = padme.plotters.matplotlib_base.figure_templates
+        cache.clear()
+        if not self._enabled[1]:
+            templates.clear()
+        cache.enabled, templates.enabled = self._enabled
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', help="The address to listen on")
+@click.option('--port', default=8765, type=click.IntRange(min=0),
+    help="The port to listen on")
+@click.option('-v', '--verbose', is_flag=True, help="Log each request")
+def serve(host, port, verbose):
+    """Run a local HTTP server that generates plots on request.
+
+    A plot is requested with a JSON plot spec ("padme batch" keys, without
+    "output", plus an optional "image" format of png, jpg, svg or pdf):
+
+        curl -d '{"input": "obs.nc", "diagnostic": "OmB:mean"}' localhost:8765/plot
+
+    or with the "padme plot" options as a query string:
+
+        curl 'localhost:8765/plot?input=obs.nc&diagnostic=OmB:mean&param=title:OmB'
+
+    The loaded plotters, data and figures are kept between requests, so
+    plots after the first are much faster than running "padme plot".
+    """
+    with PlotServer((host, port), verbose) as server:
+        host, port = server.server_address[:2]
+        click.echo(f'serving plots on http://{host}:{port}/plot')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
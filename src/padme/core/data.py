@@ -4,16 +4,108 @@
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
 from collections import OrderedDict
-from typing import Dict, Hashable, Iterable,  Optional, Tuple, Union
+from typing import Any, Dict, Hashable, Iterable, Iterator, Mapping, Optional, Set, Tuple, Union
+import collections.abc
 import copy
+import hashlib
 import numpy
 import xarray
 from datetime import datetime
 
+EXPERIMENT_DIM = 'experiment'
+"""Name of the dimension that the experiments are stacked along."""
+
+TIME_DIM = 'time'
+"""Name of the dimension that cycles are stacked along by Data.concat()."""
+
+
+def _digest(array: xarray.DataArray) -> bytes:
+    """A hash of the dimensions and values of a coordinate."""
+    a = numpy.asarray(array.data)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((array.dims, a.dtype.str, a.shape)).encode())
+    h.update(
+        repr(a.tolist()).encode() if a.dtype.kind == 'O'
+        else numpy.ascontiguousarray(a).tobytes())
+    return h.digest()
+
+
+def parse_time(value: Any) -> numpy.datetime64:
+    """Convert a "window_start"/"window_end" attribute to a datetime64."""
+    if value is None or value == '':
+        raise ValueError(
+            'The data has no time window (e.g. an IODA file without'
+            ' MetaData/dateTime).')
+    if isinstance(value, datetime):
+        value = value.replace(tzinfo=None)
+    else:
+        value = str(value).rstrip('Z')
+    return numpy.datetime64(value, 's')
+
+
+def time_coordinate(
+        starts: numpy.ndarray,
+        ends: numpy.ndarray,
+        dim: str = TIME_DIM) -> Tuple[xarray.DataArray, xarray.DataArray]:
+    """The coordinate, and its edges, of consecutive time windows.
+
+    The coordinate is the center of each window, and the edges are the
+    start of each window and the end of the last. The windows must be
+    sorted, and can't overlap.
+    """
+    zero = numpy.timedelta64(0, 's')
+    if ((ends - starts <= zero).any()
+            or (numpy.diff(starts) <= zero).any()
+            or (starts[1:] - ends[:-1] < zero).any()):
+        raise ValueError('The time windows overlap, or are not sorted.')
+    edges = numpy.append(starts, ends[-1:])
+    centers = starts + (ends - starts) // 2
+    return (xarray.DataArray(centers, name=dim, dims=(dim,)),
+            xarray.DataArray(edges, name=dim, dims=(dim,)))
+
+
+class _Variables(collections.abc.Mapping):
+    """Read-only mapping of variable name to an xarray.Dataset of experiments.
+
+    The per variable Datasets are only built when first accessed, and they
+    are views of the stacked experiment data instead of copies.
+    Variables in "consumed" are hidden.
+    """
+
+    def __init__(self, stacked: xarray.Dataset, consumed: Set[Hashable]):
+        self._stacked = stacked
+        self._names = dict.fromkeys(
+            v for v in stacked.data_vars if v not in consumed)
+        self._cache: Dict[Hashable, xarray.Dataset] = {}
+
+    def _discard(self, var: Hashable) -> None:
+        del self._names[var]
+        self._cache.pop(var, None)
+
+    def __getitem__(self, var: Hashable) -> xarray.Dataset:
+        if var not in self._cache:
+            if var not in self._names:
+                raise KeyError(var)
+            self._cache[var] = self._stacked.data_vars[var].to_dataset(
+                dim=EXPERIMENT_DIM)
+        return self._cache[var]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, var: object) -> bool:
+        return var in self._names
+
+
 class Data:
     """Hold all the data that is to be plotted.
 
-    Data can be accessed in two ways:
+    All experiments are stored in a single xarray.Dataset, stacked along the
+    leading "experiment" dimension (.stacked). The data can also be accessed
+    in two other ways, which are views of the stacked data:
     1) all the variables organized by experiment (.datasets)
     2) all the experiments organized by variable (.variables)
     """
@@ -27,6 +119,12 @@ class Data:
     ):
         self.divergent = False # TODO move this to a per variable basis
         self.diff_name: Optional[Hashable] = None
+        self._variables: Optional[_Variables] = None
+        self._datasets: Optional[OrderedDict[Hashable, xarray.Dataset]] = None
+        self._fingerprint: Optional[str] = None
+
+        # variables that have been removed, but not yet dropped from _stacked
+        self._consumed: Set[Hashable] = set()
 
         # error checking on input arguments
         if coords is None and coord_edges is None:
@@ -34,8 +132,12 @@ class Data:
                 '"coords" and/or "coord_edges" must be defined')
 
         # TODO check their order based on what is stored in data
-        self._data: OrderedDict[Hashable, xarray.Dataset] = (
-            OrderedDict({name: data}))
+        self._stacked: xarray.Dataset = data.expand_dims({EXPERIMENT_DIM: [name]})
+        self._stacked.attrs = {}
+
+        # the attributes of each experiment (e.g. the time window), in order
+        self._attrs: OrderedDict[Hashable, Dict[Hashable, Any]] = (
+            OrderedDict({name: dict(data.attrs)}))
 
         self._coords: OrderedDict[Hashable, xarray.DataArray] = (
             OrderedDict() if coords is None
@@ -69,6 +171,11 @@ class Data:
                 dims=(c_name,),
                 attrs=c_data.attrs)
 
+        # hash the coordinates once, so that equivalent() is cheap
+        self._coord_digests: Dict[Hashable, bytes] = {
+            c: _digest(self._coords[c]) + _digest(self._coord_edges[c])
+            for c in self._coords}
+
         # if not len(self._coords) and not len(self._coord_edges):
         #     # special case of no dimensions (e.g. globally binned)
         #     # TODO do error checking (make sure input data is dimensionless)
@@ -81,23 +188,86 @@ class Data:
     @classmethod
     def merge(cls, other: Iterable['Data']) -> 'Data':
         """Merge data from 'other' into the dataset of experiments in 'self'."""
-        itr = iter(other)
-        merged = next(itr).copy()
-        for i in itr:
+        items = list(other)
+        for i in items:
+            i._compact()
+        merged = items[0]._shallow_copy()
+        for i in items[1:]:
             if not merged.equivalent(i):
                 raise ValueError(
                     f'Cannot merge Data objects, they are not equivalent.')
 
-            overlap_exp = set(i._data.keys()).intersection(
-                set(merged._data.keys()))
+            overlap_exp = set(i._attrs.keys()).intersection(
+                set(merged._attrs.keys()))
             if overlap_exp != set():
                 raise ValueError(
                     f'Cannot merge datasets, experiments "{overlap_exp}"'
                     ' already exist.')
+            merged._attrs.update((k, dict(v)) for k, v in i._attrs.items())
 
-            merged._data = OrderedDict({**merged._data, **i._data})
+        # copy all the experiments into one contiguous array
+        merged._stacked = xarray.concat(
+            [i._stacked for i in items], dim=EXPERIMENT_DIM,
+            data_vars='all', coords='minimal', compat='override',
+            join='override', combine_attrs='drop')
         return merged
 
+    @classmethod
+    def concat(cls, other: Iterable['Data'], dim: str = TIME_DIM) -> 'Data':
+        """Stack the Data of consecutive cycles along a new time dimension.
+
+        Each item must be equivalent, with the same experiments. They are
+        sorted by their "window_start", and the new dimension is the center
+        of each window, with the start of each window (and the end of the
+        last) as its edges.
+        """
+        items = list(other)
+        if not items:
+            raise ValueError('No Data to concatenate.')
+        if dim in items[0]._coords:
+            raise ValueError(f'Dimension {dim} already exists.')
+        for i in items:
+            i._compact()
+        for i in items[1:]:
+            if not items[0].equivalent(i) or i.experiments != items[0].experiments:
+                raise ValueError(
+                    'Cannot concatenate Data objects, they are not equivalent.')
+
+        windows = numpy.array(
+            [[parse_time(t) for t in i.datetime] for i in items])
+        order = numpy.argsort(windows[:, 0], kind='stable')
+        items = [items[j] for j in order]
+        windows = windows[order]
+        try:
+            coord, coord_edges = time_coordinate(windows[:, 0], windows[:, 1], dim)
+        except ValueError:
+            raise ValueError(
+                'Cannot concatenate Data objects, their windows overlap.') from None
+
+        ret = items[0]._shallow_copy()
+        for exp, attrs in ret._attrs.items():
+            attrs['window_end'] = items[-1]._attrs[exp]['window_end']
+
+        # stack each variable's arrays directly, xarray.concat() is too slow
+        # for the thousands of cycles in a long time series
+        stacked = items[0]._stacked
+        all_vars = [i._stacked.variables for i in items]
+        data_vars = {}
+        for v in stacked.data_vars:
+            var = stacked.variables[v]
+            data_vars[v] = xarray.Variable(
+                (EXPERIMENT_DIM, dim, *var.dims[1:]),
+                numpy.stack([i[v].data for i in all_vars], axis=1),
+                var.attrs)
+        ret._stacked = xarray.Dataset(data_vars, coords=stacked.coords)
+
+        # the new dimension is the first after the experiments
+        ret._coords = OrderedDict([(dim, coord), *ret._coords.items()])
+        ret._coord_edges = OrderedDict([(dim, coord_edges), *ret._coord_edges.items()])
+        ret._coord_digests[dim] = _digest(coord) + _digest(coord_edges)
+        ret._fingerprint = None
+        return ret
+
     @property
     def dimensions(self) -> OrderedDict[Hashable, xarray.DataArray]:
         """The center of the binning dimension."""
@@ -108,94 +278,210 @@ class Data:
         """Return the edges of binning dimensions"""
         return self._coord_edges
 
+    @property
+    def experiments(self) -> Tuple[Hashable, ...]:
+        """The names of the experiments, in order."""
+        return tuple(self._attrs.keys())
+
+    @property
+    def stacked(self) -> xarray.Dataset:
+        """All the variables, with the experiments stacked along the leading
+        "experiment" dimension."""
+        self._compact()
+        return self._stacked
+
     @property
     def datasets(self) -> OrderedDict[Hashable, xarray.Dataset]:
         """The data organized by experiment.
 
         The dict key is the experiment name, and the value is an xarray.Dataset
-        containing all the variables."""
-        return self._data
+        containing all the variables. The Datasets are views of the stacked
+        data, so adding or removing items from the dict has no effect."""
+        self._compact()
+        if self._datasets is None:
+            self._datasets = OrderedDict()
+            for i, (k, attrs) in enumerate(self._attrs.items()):
+                ds = self._stacked.isel({EXPERIMENT_DIM: i}, drop=True)
+                ds.attrs = attrs
+                self._datasets[k] = ds
+        return self._datasets
 
     @property
-    def variables(self) -> Dict[Hashable, xarray.Dataset]:
+    def variables(self) -> Mapping[Hashable, xarray.Dataset]:
         """The data organized by variable name.
 
-        The dict key is the variable name, and the value is an xarray.Dataset
-        containing each experiment.
-
-        TODO: this is probably innefficient, need to use a view of the Dataset
-        instead of creating a new one.
+        The key is the variable name, and the value is an xarray.Dataset
+        containing each experiment. The mapping is cached until variables
+        or experiments are added or removed.
         """
-        exp_names = self._data.keys()
-        var_names = [v for v in next(iter(self._data.values())).data_vars]
-        return {
-            v: xarray.Dataset(data_vars=
-                {e:self._data[e].data_vars[v] for e in exp_names}
-                )
-            for v in var_names}
+        if self._variables is None:
+            self._variables = _Variables(self._stacked, self._consumed)
+        return self._variables
 
     @property
     def nvars(self) -> int:
-        return len(next(iter(self._data.values())).data_vars)
+        return len(self._stacked.data_vars) - len(self._consumed)
+
+    @property
+    def fingerprint(self) -> str:
+        """A hash of the structure of the data.
+
+        It covers the names, values, and order of the coordinates and their
+        edges, and the variable names. Data objects with the same
+        fingerprint are equivalent().
+        """
+        if self._fingerprint is None:
+            h = hashlib.blake2b(digest_size=16)
+            for c in self._coords:
+                h.update(repr(c).encode())
+                h.update(self._coord_digests[c])
+            h.update(b'\0')
+            h.update('\0'.join(sorted(repr(v) for v in self.variables)).encode())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
 
     def get_variables(self, variables: Union[Iterable[Hashable], Hashable] ) -> 'Data':
+        """Get a new Data object with only the given variables.
+
+        The returned Data shares the coordinates and the underlying arrays
+        with this object, so it is cheap to create regardless of the number
+        of variables that are dropped. Call copy() on the result before
+        modifying its values in place.
+        """
         if type(variables) is str:
             variables = set( (variables,) )
         else:
             variables = set(variables) # type: ignore
 
-        all_vars = {str(k) for k in next(iter(self._data.values())).data_vars.keys()}
+        all_vars = {str(k) for k in self.variables.keys()}
         if variables - all_vars != set():
             raise ValueError(f"variables do not exist {variables-all_vars}")
 
-        drop_vars = all_vars - set(variables)
-        ret = self.copy()
-        for k in ret._data.keys():
-            ret._data[k] = ret._data[k].drop_vars(drop_vars)
+        ret = self._shallow_copy()
+        ret._consumed = set()
+        ret._fingerprint = None
+        ret._stacked = self._stacked[
+            [v for v in self._stacked.data_vars if v in variables]]
         return ret
 
+    def iter_dimension(self, dim: Hashable) -> Iterator[Tuple[Any, 'Data']]:
+        """Iterate over each slice along the given dimension.
+
+        Yields the coordinate value and a Data object without the dimension.
+        The slices are views of the arrays in this object, so the data only
+        needs to be read once.
+        """
+        if dim not in self._coords:
+            raise ValueError(f'Dimension {dim} was not found.')
+
+        for i, value in enumerate(self._coords[dim].data):
+            ret = self._shallow_copy()
+            del ret._coords[dim]
+            del ret._coord_edges[dim]
+            del ret._coord_digests[dim]
+            ret._fingerprint = None
+            ret._stacked = self._stacked.isel({dim: i})
+            yield value, ret
+
+    def iter_experiments(self) -> Iterator[Tuple[Hashable, 'Data']]:
+        """Iterate over each experiment.
+
+        Yields the experiment name and a Data object with only that
+        experiment, which shares the arrays of this object.
+        """
+        for i, (k, attrs) in enumerate(self._attrs.items()):
+            ret = self._shallow_copy()
+            ret._stacked = self._stacked.isel({EXPERIMENT_DIM: slice(i, i+1)})
+            ret._attrs = OrderedDict({k: dict(attrs)})
+            yield k, ret
+
     @property
     def datetime(self) -> Tuple[datetime, datetime]:
-        exp_0 = list(self._data.keys())[0]
-        return (self._data[exp_0].attrs['window_start'], self._data[exp_0].attrs['window_end'])
+        attrs = next(iter(self._attrs.values()))
+        return (attrs['window_start'], attrs['window_end'])
+
+    def load(self) -> 'Data':
+        """Read in the values of any lazy (e.g. dask) arrays, and keep them.
+
+        Only the arrays of this object are replaced, any other Data sharing
+        them (e.g. the one this was selected from) is unchanged.
+        """
+        self._stacked = self._stacked.compute()
+        self._variables = None
+        self._datasets = None
+        return self
 
     def copy(self) -> 'Data':
         """Make a deep copy of this class."""
         return copy.deepcopy(self)
 
+    def _shallow_copy(self) -> 'Data':
+        """Make a copy that shares the coordinates and arrays of this class.
+
+        Variables and experiments can be added or removed from the copy
+        without affecting this class, but values modified in place are not.
+        """
+        ret = copy.copy(self)
+        ret._stacked = self._stacked.copy(deep=False)
+        ret._attrs = OrderedDict((k, dict(v)) for k, v in self._attrs.items())
+        ret._coords = OrderedDict(self._coords)
+        ret._coord_edges = OrderedDict(self._coord_edges)
+        ret._coord_digests = dict(self._coord_digests)
+        ret._consumed = set(self._consumed)
+        return ret
+
+    def __getstate__(self) -> dict:
+        # the cached views are rebuilt on demand, don't copy/pickle them
+        state = self.__dict__.copy()
+        state['_variables'] = None
+        state['_datasets'] = None
+        return state
+
     def equivalent(self, other: 'Data') -> bool:
         """Test if two Data objects are the same shape.
 
-        They must have the same coordinates, and variables.
+        They must have the same coordinates, and variables. This only
+        compares their fingerprints.
         """
         if type(other) is not Data:
             return False
-
-        dims = self._coords.keys()
-        if list(self._coords.keys()) != list(other._coords.keys()):
-            return False
-
-        return (
-            all([self._coords[c].equals(other._coords[c]) for c in dims])
-            and all([self._coord_edges[c].equals(other._coord_edges[c]) for c in dims])
-            and self.variables.keys() == other.variables.keys()
-        )
+        return self.fingerprint == other.fingerprint
 
         # TODO, check the coordinates of the variables
 
     def remove_variable(self, variable_name: Hashable) -> None:
-        """Remove the given variable name from all experiment data."""
-        if variable_name not in self.variables.keys():
+        """Remove the given variable name from all experiment data.
+
+        This only marks the variable as consumed, which is O(1). It is
+        dropped from the stacked data the next time it is needed.
+        """
+        if variable_name not in self.variables:
             raise ValueError(
                 f'Variable {variable_name} was not found.')
 
-        for exp in self._data:
-            self._data[exp] = self._data[exp].drop_vars(variable_name)
+        self._consumed.add(variable_name)
+        self.variables._discard(variable_name) # type: ignore
+        self._fingerprint = None
+
+    def _compact(self) -> None:
+        """Drop any removed variables from the stacked data."""
+        if not self._consumed:
+            return
+        self._stacked = self._stacked.drop_vars(self._consumed)
+        self._consumed = set()
+        self._variables = None
+        self._datasets = None
 
     def diff(self, other: 'Data') -> 'Data':
-        """Subtract one experiment from other experiments.
+        """Subtract the experiments of 'other' from the experiments of 'self'.
+
+        If 'other' has a single experiment (the control) it is subtracted from
+        every experiment in 'self'. If it has the same number of experiments
+        as 'self' they are subtracted pairwise, in order. Either way this is
+        a single operation broadcast over the stacked experiments.
 
-        Afterward, the 'self.diff_name' will be set."""
+        Afterward, the 'self.diff_name' will be set to the name of the
+        control experiment, or a tuple of the names if pairwise."""
         if not self.equivalent(other):
             raise ValueError(
                 'Cannot call diff() on non-equivalent datasets.')
@@ -204,22 +490,27 @@ class Data:
             raise ValueError(
                 'Cannot call diff() on Data that is already a diff.')
 
-        if len(other._data) != 1:
-            # TODO allow diff() to work if number of exps is equal
-            # between other and self?
-            raise ValueError('Cannot call diff() with len(other.datasets) > 1')
+        self._compact()
+        other._compact()
+        if len(other._attrs) == 1:
+            diff_name: Hashable = next(iter(other._attrs.keys()))
+            control = other._stacked.isel({EXPERIMENT_DIM: 0}, drop=True)
+        elif len(other._attrs) == len(self._attrs):
+            diff_name = tuple(other._attrs.keys())
+            # pair the experiments by position, not name
+            control = other._stacked.drop_vars(EXPERIMENT_DIM)
+        else:
+            raise ValueError(
+                'Cannot call diff() unless "other" has 1 experiment, or the'
+                f' same number as "self" ({len(other._attrs)} != {len(self._attrs)})')
 
         # calculate data difference
-        diff_data = self.copy()
-        diff_data.diff_name = next(iter(other._data.keys()))
-        for k in diff_data._data:
-            diff_data._data[k] -= next(iter(other._data.values()))
-
         # calcuate some joint attributes
         # TODO do this correctly
         # ie check date ranges, figure out what to do if they are not exact identical?
-        for k in diff_data._data:
-            diff_data._data[k].attrs = self._data[k].attrs
+        diff_data = self._shallow_copy()
+        diff_data.diff_name = diff_name
+        diff_data._stacked = self._stacked - control
         return diff_data
 
     def __sub__(self, other):
@@ -3,10 +3,15 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
-from typing import Callable, MutableMapping, FrozenSet, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, FrozenSet, Hashable, Iterable, MutableMapping, Optional, Tuple
 import functools
+import os
+import threading
 
 from .data import Data
+from . import timing
 
 
 DataAdapterFunc = Callable[[Any], Data]
@@ -36,17 +41,164 @@ def register_data_adapter(name: str):
     return decorator
 
 
+def _normalize(value: Any) -> Hashable:
+    """Convert the arguments of a data adapter into something hashable."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_normalize(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    return repr(value)
+
+
+def _file_key(filename: Any) -> Optional[Tuple[str, int, int]]:
+    """The path, modification time, and size of a file, or None if it is
+    not a file."""
+    try:
+        stat = os.stat(filename)
+    except (OSError, TypeError, ValueError):
+        return None
+    return (os.path.realpath(filename), stat.st_mtime_ns, stat.st_size)
+
+
+class DataCache():
+    """LRU cache of the Data read by the data adapters.
+
+    Data is cached by the adapter name, the path and modification time of
+    the file, and all the other arguments, so a file that has been changed
+    is read again. Data from the cache is a shallow copy (see
+    Data.get_variables()), and so its values should not be modified in place.
+
+    Data adapters can also share the object parsed from a file between
+    different selections of the same file with load(). The cache can be
+    used from multiple threads, though two threads reading the same file
+    at once both read it.
+    """
+
+    def __init__(self, maxsize: int = 16, maxsize_files: int = 4):
+        self.enabled = False
+        self.maxsize = maxsize
+        self.maxsize_files = maxsize_files
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, Data] = OrderedDict()
+        self._files: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._files.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def key(self, adapter_name: str, args: tuple, kwargs: dict) -> Optional[Hashable]:
+        """The cache key for a data adapter call, or None if it can't be
+        cached (i.e. it is not reading a file)."""
+        filename = kwargs.get('filename', args[0] if args else None)
+        file_key = _file_key(filename)
+        if file_key is None:
+            return None
+        kwargs = {k: v for k, v in kwargs.items() if k != 'filename'}
+        return (adapter_name, file_key, _normalize(args[1:] if args else ()),
+                _normalize(kwargs))
+
+    def get(self, key: Hashable) -> Optional[Data]:
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+        return data._shallow_copy()
+
+    def put(self, key: Hashable, data: Data) -> None:
+        # keep a copy, so that variables removed by the caller stay cached
+        data = data._shallow_copy()
+        with self._lock:
+            self._data[key] = data
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def load(self, filename: str, loader: Callable[..., Any], **kwargs) -> Any:
+        """Read a file with "loader(filename, **kwargs)", reusing the result
+        if the same unchanged file has already been read with the same loader
+        and arguments.
+
+        Data adapters should not modify the returned object in place.
+        """
+        file_key = _file_key(filename) if self.enabled else None
+        if file_key is None:
+            return loader(filename, **kwargs)
+        key = (loader, file_key, _normalize(kwargs))
+        with self._lock:
+            if key in self._files:
+                self._files.move_to_end(key)
+                return self._files[key]
+        obj = loader(filename, **kwargs)
+        with self._lock:
+            self._files[key] = obj
+            while len(self._files) > self.maxsize_files:
+                self._files.popitem(last=False)
+        return obj
+
+
 class __DataAdapterFactory():
     """Data adapter factory."""
     _adapters: MutableMapping[str, DataAdapterFunc] = {}
 
+    def __init__(self):
+        self.cache = DataCache()
+
     def __call__(self, adapter_name: str, *args, **kwargs):
-        """Create a new data adapter."""
+        """Create a new data adapter.
+
+        If "cache.enabled" is True, the Data read from a file is cached."""
         if adapter_name not in self._adapters:
             raise ValueError(
                 f'Cannot create DataAdapter "{adapter_name}".'
                 ' It has not been registered.')
-        return self._adapters[adapter_name](*args, **kwargs) # type: ignore
+        with timing.stage(f'data_adapter:{adapter_name}', self):
+            key = None
+            if self.cache.enabled:
+                key = self.cache.key(adapter_name, args, kwargs)
+            if key is not None:
+                data = self.cache.get(key)
+                if data is not None:
+                    return data
+
+            data = self._adapters[adapter_name](*args, **kwargs) # type: ignore
+            if key is not None:
+                self.cache.put(key, data)
+            return data
+
+    def load_many(
+            self,
+            adapter_name: str,
+            filenames: Iterable[str],
+            max_workers: Optional[int] = None,
+            **kwargs) -> Data:
+        """Read the same experiment from many cycle files, stacked along
+        the time dimension (see Data.concat()).
+
+        The files are read concurrently by a pool of "max_workers" threads,
+        as most of the time is spent reading files, which releases the GIL.
+        The other arguments are passed to the data adapter for every file.
+        """
+        filenames = list(filenames)
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4, len(filenames) or 1)
+        def load(filename: str) -> Data:
+            return self(adapter_name, filename=filename, **kwargs)
+        with timing.stage(f'load_many:{adapter_name}', self):
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                items = list(pool.map(load, filenames))
+            return Data.concat(items)
 
     @property
     def types(self) -> FrozenSet[str]:
@@ -4,12 +4,14 @@
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
 from abc import ABC, abstractmethod
+import importlib
 import re
-from typing import Any, FrozenSet, MutableMapping, Type, List, Optional
-from dataclasses import dataclass
+from typing import Any, BinaryIO, FrozenSet, Hashable, MutableMapping, Type, List, Optional, Union
+from dataclasses import dataclass, replace
 import collections.abc
 
 from .data import Data
+from . import timing
 
 @dataclass
 class Parameter():
@@ -113,6 +115,11 @@ class PlotterBase(ABC):
 
 
     def __init__(self, data: Data, plot_parameters = {}):
+        # each plot gets its own copy of the parameters, so that the values
+        # given for one plot are not used by the next one
+        self.parameters = Parameters(
+            *(replace(self.parameters.get(k)) for k in self.parameters))
+
         # update parameters with user supplied values
         for k, v in plot_parameters.items():
             if k not in self.parameters:
@@ -148,22 +155,24 @@ class PlotterBase(ABC):
         return valid
 
 
-    def plot(self, data: Data, filename: str) -> None:
+    def plot(self, data: Data, filename: Union[str, BinaryIO]) -> None:
         """Generate a plot from the given data.
 
         This is the main method of the class, and the one method the user
         might call directly."""
 
         # Setup the plot before consuming any data
-        self._pre_plot()
+        with timing.stage('pre_plot', self):
+            self._pre_plot()
 
         # start consuming data
         try:
             data_handlers = [d() for d in self.data_handlers]
             while data.nvars:
                 # find a valid data handler. If there are non, throw a warning.
-                valid_data_handlers = [
-                    dh for dh in data_handlers if dh.is_valid(data)]
+                with timing.stage('select_handler', self):
+                    valid_data_handlers = [
+                        dh for dh in data_handlers if dh.is_valid(data)]
                 if not len(valid_data_handlers):
                     raise RuntimeWarning(
                         f'Unable to process anymore data when plotting with {self}'
@@ -172,7 +181,9 @@ class PlotterBase(ABC):
 
                 # process the data. Make sure the data handler consumed something.
                 nvars_before = data.nvars
-                data = data_handler.process(data, self)
+                with timing.stage(
+                        f'process:{type(data_handler).__name__}', data_handler):
+                    data = data_handler.process(data, self)
                 nvars_after = data.nvars
                 if nvars_before == nvars_after:
                     raise RuntimeError(
@@ -183,8 +194,10 @@ class PlotterBase(ABC):
             # TODO remove this, or throw the warning to here
 
         # all done consuming data. Finish the plot
-        self._post_plot()
-        self._save(filename)
+        with timing.stage('post_plot', self):
+            self._post_plot()
+        with timing.stage('save', self):
+            self._save(filename)
 
         # TODO: return unconsumed data for another Plotter to consume?
 
@@ -200,7 +213,7 @@ class PlotterBase(ABC):
         pass
 
     @abstractmethod
-    def _save(self, filename: str) -> None:
+    def _save(self, filename: Union[str, BinaryIO]) -> None:
         """Final call that saves plot to an output location."""
         pass
 
@@ -209,15 +222,31 @@ class _PlotterFactory():
     """TODO: insert descrtiption of __PlotterFactory"""
 
     _subclasses: MutableMapping[str, Type[PlotterBase]] = {}
+    _lazy: MutableMapping[str, str] = {}
+    _entry_point_group = 'padme.plotters'
+    _entry_points_loaded = False
+    _dispatch_cache: MutableMapping[Hashable, List[Type[PlotterBase]]] = {}
 
     def __call__(self, data: Data, plot_parameters={}) -> PlotterBase:
-        """Instantiate a Plotter appropriate for the given data.
+        """Instantiate a Plotter appropriate for the given data."""
+        return self.plotter_class(data)(data=data, plot_parameters=plot_parameters)
+
+    def plotter_class(self, data: Data) -> Type[PlotterBase]:
+        """The Plotter class that would be used for the given data.
 
         The is_valid() method is called on available Plotters in the class
-        hierarchy to determine which Plotter to use given the data passed."""
+        hierarchy to determine which Plotter to use given the data passed.
+        The result is cached for data of the same structure (see
+        dispatch_key()), until another Plotter is registered."""
 
         # get all valid plotters that could be used
-        plotters = PlotterBase.get_valid_classes(data)
+        with timing.stage('plotter_dispatch', self):
+            self.load()
+            key = self.dispatch_key(data)
+            plotters = self._dispatch_cache.get(key, None)
+            if plotters is None:
+                plotters = PlotterBase.get_valid_classes(data)
+                self._dispatch_cache[key] = plotters
 
         # TODO, if there are more than one valid class, how do we pick?
         # (shouldn't happen, for now.)
@@ -228,13 +257,58 @@ class _PlotterFactory():
             raise NotImplementedError(
                 f'more than one valid plot type found {plotters}')
 
-        return plotters[0](data=data, plot_parameters=plot_parameters)
+        return plotters[0]
+
+    @staticmethod
+    def dispatch_key(data: Data) -> Hashable:
+        """A cheap signature of the structure of the data.
+
+        Plotter.is_valid() implementations should only depend on what is in
+        this signature, as the chosen Plotter is cached by it."""
+        return (tuple(data.dimensions.keys()), len(data.experiments), data.nvars)
 
     @property
     def types(self) -> FrozenSet[str]:
-        """Get a list of the non-abstract registered Plotter classes."""
+        """Get a list of the non-abstract registered Plotter classes.
+
+        This includes lazily registered Plotters that have not been loaded."""
         return frozenset(
-            [k for k,v in self._subclasses.items() if not v._abstract])
+            [k for k,v in self._subclasses.items() if not v._abstract]
+            + list(self._lazy.keys()))
+
+    def register_lazy(self, name: str, module: str) -> None:
+        """Register a Plotter by name, without importing it yet.
+
+        "module" is the name of the module that defines the Plotter class.
+        It is only imported by load(), which is called the first time a
+        Plotter is needed.
+        """
+        if name in self._subclasses or name in self._lazy:
+            raise RuntimeError(
+                f'Cannot register Plotter class "{name}".'
+                ' It has already been registered.')
+        self._lazy[name] = module
+        self._dispatch_cache.clear()
+
+    def load(self) -> None:
+        """Import all the lazily registered Plotters.
+
+        Plotters from other packages, registered under the "padme.plotters"
+        entry point group (name = "module" or "module:Class"), are also
+        loaded here."""
+        if not self._entry_points_loaded:
+            self._entry_points_loaded = True
+            for ep in _entry_points(self._entry_point_group):
+                if ep.name not in self._subclasses and ep.name not in self._lazy:
+                    self._lazy[ep.name] = ep.value.split(':')[0]
+
+        while self._lazy:
+            name, module = next(iter(self._lazy.items()))
+            importlib.import_module(module)
+            self._lazy.pop(name, None)
+            if name not in self._subclasses:
+                raise RuntimeError(
+                    f'Importing "{module}" did not register Plotter "{name}".')
 
     def _register(self, cls: Type[PlotterBase]) -> None:
         if cls._factory_name in self._subclasses:
@@ -242,7 +316,21 @@ class _PlotterFactory():
                 f'Cannot register Plotter class "{cls._factory_name}".'
                 ' It has already been registered.')
         self._subclasses[cls._factory_name] = cls
+        self._lazy.pop(cls._factory_name, None)
+        self._dispatch_cache.clear()
+
+
+def _entry_points(group: str) -> list:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        # python < 3.8
+        return []
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        return list(eps.select(group=group))
+    return list(eps.get(group, []))  # python < 3.10
 
 
 Plotter = _PlotterFactory()
-"""Plotter class factory"""
\ No newline at end of file
+"""Plotter class factory"""
@@ -0,0 +1,176 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Summary statistics of the values of a plotted field.
+
+field_statistics() computes the min, mean, max and the central percentile
+range of an array in a single selection based pass, instead of the full sort
+done by numpy.nanpercentile and a separate pass for each of the other
+values. The percentiles are interpolated the same way as numpy's default
+("linear") method.
+
+RangeSketch computes approximately the same statistics incrementally, one
+chunk at a time, and sketches can be merged. This allows a color range to be
+computed over lazy/chunked data, or over many fields (e.g. all the channels
+of a sensor), without holding all of the values in memory at once.
+"""
+
+from typing import Iterable, NamedTuple, Tuple
+import numpy as np
+
+
+class FieldStatistics(NamedTuple):
+    count: int
+    min: float
+    mean: float
+    max: float
+    lower: float  # the lower, and upper, bounds of the percentile range
+    upper: float
+
+
+def _range_positions(count: int, pct: float) -> Tuple[float, float]:
+    """The (fractional) sorted indices of the bounds of the central "pct"
+    of "count" values."""
+    assert(0 < pct <= 1.0)
+    q = np.array([(1.0-pct)/2.0, (1.0-pct)/2.0 + pct])
+    lower, upper = q * (count - 1)
+    return lower, upper
+
+
+def _lerp(a: float, b: float, t: float) -> float:
+    # the same interpolation as numpy.percentile, for matching results
+    if t >= 0.5:
+        return b - (b - a) * (1.0 - t)
+    return a + (b - a) * t
+
+
+def field_statistics(values, pct: float = 0.99) -> FieldStatistics:
+    """The statistics of the non-NaN "values", with the range that
+    covers "pct" of them.
+
+    The values are copied once, and partially ordered in place to select the
+    values at the bounds of the range. The min and max are then found in the
+    (small) tails outside of the range.
+    """
+    z = np.asarray(values, dtype=float).ravel()
+    z = z[~np.isnan(z)]
+    n = z.size
+    if n == 0:
+        return FieldStatistics(0, *[np.nan]*5)
+    mean = z.sum() / n
+
+    lower, upper = _range_positions(n, pct)
+    ilo, ihi = int(lower), int(upper)
+
+    # z[ihi], with the larger values after it
+    z.partition(ihi)
+    tail = z[ihi:]
+    vmax = tail.max()
+    hi = (z[ihi], tail[1:].min() if tail.size > 1 else z[ihi])
+
+    # z[ilo+1], with the smaller values before it
+    if ilo < ihi:
+        z[:ihi+1].partition(ilo+1)
+        head = z[:ilo+1]
+        lo = (head.max(), z[ilo+1])
+    else:
+        head = z[:ihi+1]
+        lo = hi
+    vmin = head.min()
+
+    return FieldStatistics(
+        n, float(vmin), float(mean), float(vmax),
+        float(_lerp(*lo, lower - ilo)),
+        float(_lerp(*hi, upper - ihi)))
+
+
+class RangeSketch():
+    """A mergeable, fixed size, approximation of the distribution of values.
+
+    The count, mean, min and max are exact. The percentiles are interpolated
+    from at most "size" weighted points at evenly spaced ranks, so their rank
+    error is roughly 1/size of the number of values.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._points = np.empty(0)
+        self._weights = np.empty(0)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable, size: int = 1024) -> 'RangeSketch':
+        """A sketch of all the values in "chunks", read one at a time."""
+        sketch = cls(size)
+        for chunk in chunks:
+            sketch.update(chunk)
+        return sketch
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else np.nan
+
+    def update(self, values) -> 'RangeSketch':
+        """Add the non-NaN "values" to the sketch."""
+        z = np.asarray(values, dtype=float).ravel()
+        z = np.sort(z[~np.isnan(z)])
+        if z.size == 0:
+            return self
+        self.count += z.size
+        self.total += float(z.sum())
+        self.min = min(self.min, float(z[0]))
+        self.max = max(self.max, float(z[-1]))
+        self._add(z, np.ones(z.size))
+        return self
+
+    def merge(self, other: 'RangeSketch') -> 'RangeSketch':
+        """Add the values of another sketch to this one."""
+        if other.count == 0:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._add(other._points, other._weights)
+        return self
+
+    def _resample(self, points: np.ndarray, weights: np.ndarray):
+        """The sorted "points" resampled at "size" evenly spaced ranks."""
+        if points.size <= self.size:
+            return points, weights
+        total = weights.sum()
+        ranks = (np.arange(self.size) + 0.5) * total / self.size
+        points = np.interp(ranks, np.cumsum(weights) - weights/2, points)
+        return points, np.full(self.size, total / self.size)
+
+    def _add(self, points: np.ndarray, weights: np.ndarray) -> None:
+        points, weights = self._resample(points, weights)
+        points = np.concatenate((self._points, points))
+        weights = np.concatenate((self._weights, weights))
+        order = np.argsort(points, kind='stable')
+        self._points, self._weights = self._resample(points[order], weights[order])
+
+    def quantile(self, q: float) -> float:
+        """The approximate value below which "q" of the values fall."""
+        if self.count == 0:
+            return np.nan
+        ranks = np.cumsum(self._weights) - self._weights/2
+        # ranks are 0 based, as in numpy.percentile
+        return float(np.interp(q * (self.count - 1) + 0.5, ranks, self._points,
+                               left=self.min, right=self.max))
+
+    def statistics(self, pct: float = 0.99) -> FieldStatistics:
+        """The statistics of the values, with the range that covers "pct"
+        of them."""
+        if self.count == 0:
+            return FieldStatistics(0, *[np.nan]*5)
+        assert(0 < pct <= 1.0)
+        return FieldStatistics(
+            self.count, self.min, self.mean, self.max,
+            self.quantile((1.0-pct)/2.0),
+            self.quantile((1.0-pct)/2.0 + pct))
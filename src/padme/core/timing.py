@@ -0,0 +1,88 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Hooks for timing the stages of reading data and generating plots.
+
+Callbacks registered with add_callback() are called at the end of every
+stage with the stage name, the object doing the work, and the elapsed time in
+seconds. When no callbacks are registered the stages have no overhead beyond
+a single check.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+import contextlib
+import csv
+import json
+import time
+
+StageCallback = Callable[[str, Any, float], None]
+
+_callbacks: List[StageCallback] = []
+
+
+def add_callback(callback: StageCallback) -> None:
+    """Register a function to be called at the end of each stage."""
+    _callbacks.append(callback)
+
+
+def remove_callback(callback: StageCallback) -> None:
+    _callbacks.remove(callback)
+
+
+@contextlib.contextmanager
+def stage(name: str, obj: Any = None):
+    """Time the enclosed block of code as the stage "name"."""
+    if not _callbacks:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        for callback in list(_callbacks):
+            callback(name, obj, elapsed)
+
+
+class StageTimer():
+    """Record the time of each stage, while used as a context manager.
+
+    Nested stages are recorded individually, so the time of an outer stage
+    includes that of any stages within it.
+    """
+
+    def __init__(self):
+        self.records: List[Tuple[str, float]] = []
+
+    def __call__(self, name: str, obj: Any, elapsed: float) -> None:
+        self.records.append((name, elapsed))
+
+    def __enter__(self) -> 'StageTimer':
+        add_callback(self)
+        return self
+
+    def __exit__(self, *args) -> None:
+        remove_callback(self)
+
+    def totals(self) -> Dict[str, float]:
+        """The total time spent in each stage."""
+        totals: Dict[str, float] = {}
+        for name, elapsed in self.records:
+            totals[name] = totals.get(name, 0.0) + elapsed
+        return totals
+
+
+def write_report(filename: str, rows: Iterable[Dict[str, Any]]) -> None:
+    """Write timing records to a JSON, or CSV, file based on its extension."""
+    rows = list(rows)
+    with open(filename, 'w', newline='') as f:
+        if filename.endswith('.csv'):
+            fields = list(dict.fromkeys(k for r in rows for k in r))
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, f, indent=2)
@@ -5,10 +5,12 @@
 
 from .bespin import bespin_adapter
 from .ioda import ioda_adapter
+from .timeseries import timeseries_adapter
 from .var_log import var_log_adapter
 
 __all__ = [
     'bespin_adapter',
     'ioda_adapter',
+    'timeseries_adapter',
     'var_log_adapter'
 ]
\ No newline at end of file
@@ -3,9 +3,10 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
+import importlib.util
 import xarray as xr
 
-from ..core.data_adapter import register_data_adapter, Data
+from ..core.data_adapter import register_data_adapter, Data, DataAdapter
 
 try:
     import bespin
@@ -13,20 +14,37 @@ try:
 except ModuleNotFoundError as e:
     bespin_found = False
 
+# dask is slow to import, and only needed if data is chunked
+dask_found = importlib.util.find_spec('dask') is not None
+
 
 @register_data_adapter(name='bespin')
 def bespin_adapter(
         filename: str,
         select=None,
         collapse=None,
-        variables=None) -> Data:
+        variables=None,
+        chunks=None,
+        name: str = 'EXP1') -> Data:
+    """Read binned statistics from a BESPIN file.
+
+    If "chunks" is given (see xarray.Dataset.chunk, e.g. "auto" or
+    {"sensor_channel": 1}) the returned variables are split into dask chunks,
+    so that later operations (e.g. the color range of an animation) work one
+    chunk at a time. This does not make the reading lazy: "select" and
+    "collapse" are done by bespin beforehand, on however it has read the
+    file. "name" is the name given to the experiment.
+    """
     if not bespin_found:
         raise ModuleNotFoundError(
             f'Cannot use "bespin_file" if "bespin" is not installed.')
+    if chunks is not None and not dask_found:
+        raise ModuleNotFoundError(
+            f'Cannot use "chunks" if "dask" is not installed.')
 
-    # read in the file
-    exp_name = "EXP1" # TODO correctly specify the experiment name
-    bs = bespin.BinnedStatistics.read(filename)
+    # read in the file, it is shared with other selections of the same file
+    # when the DataAdapter cache is enabled.
+    bs = DataAdapter.cache.load(filename, bespin.BinnedStatistics.read)
 
     # extra processing (e.g. select a slice of a dimension, or collapse a dim)
     if select is not None:
@@ -38,6 +56,11 @@ def bespin_adapter(
     if variables is None:
         variables = {}
     data = bs.get(**variables)
+    if chunks is not None:
+        # bespin has no public way to wrap its dataset in dask before the
+        # select/collapse, so only the returned (new) dataset is chunked and
+        # the (possibly shared) BinnedStatistics is left untouched.
+        data = data.chunk(chunks)
 
     # TODO, messy, get bespin to return what is directly needed.
     coord_edges = [b.edges_to_xarray().coords[b.name] for b in bs.bins]
@@ -45,5 +68,5 @@ def bespin_adapter(
     if ('sensor_channel' in bs._data.coords
             and 'sensor_channel' not in {b.name for b in bs.bins}):
         coords = (bs._data.coords['sensor_channel'],)
-    return Data(name=exp_name, data=data, coord_edges=coord_edges, coords=coords)
+    return Data(name=name, data=data, coord_edges=coord_edges, coords=coords)
 
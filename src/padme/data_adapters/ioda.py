@@ -3,10 +3,255 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
-from ..core.data_adapter import register_data_adapter, Data
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy
+import xarray as xr
+
+from ..core.data_adapter import register_data_adapter, Data, DataAdapter
+
+DIAGNOSTICS = ('ObsValue', 'hofx', 'OmB')
+STATISTICS = ('count', 'mean', 'stddev', 'rmsd')
+
+# the default bins, and the valid range of the MetaData that can be binned
+# with just a number of bins.
+DEFAULT_BINS: Mapping[str, Union[int, Sequence[float]]] = {
+    'latitude': 36, 'longitude': 72}
+BIN_RANGES = {'latitude': (-90.0, 90.0), 'longitude': (0.0, 360.0)}
+
+
+class _RunningStats():
+    """Count, mean, and sum of squared deviations of values in each bin.
+
+    Values are added a chunk at a time, and combined with the previous
+    chunks using the parallel algorithm of Chan et al., which stays
+    accurate regardless of the number of values.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = numpy.zeros(size)
+        self.mean = numpy.zeros(size)
+        self.m2 = numpy.zeros(size)
+
+    def add(self, index: numpy.ndarray, values: numpy.ndarray) -> None:
+        count = numpy.bincount(index, minlength=self.size).astype(float)
+        mean = numpy.bincount(index, weights=values, minlength=self.size)
+        numpy.divide(mean, count, out=mean, where=count > 0)
+        m2 = numpy.bincount(
+            index, weights=(values - mean[index])**2, minlength=self.size)
+
+        total = self.count + count
+        frac = numpy.divide(count, total, out=numpy.zeros(self.size), where=total > 0)
+        delta = mean - self.mean
+        self.mean += delta * frac
+        self.m2 += m2 + delta**2 * self.count * frac
+        self.count = total
+
+    def statistics(self) -> Dict[str, numpy.ndarray]:
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            mean = numpy.where(self.count > 0, self.mean, numpy.nan)
+            variance = self.m2 / self.count
+        return {
+            'count': self.count,
+            'mean': mean,
+            'stddev': numpy.sqrt(variance),
+            'rmsd': numpy.sqrt(variance + mean**2)}
+
+
+def _bin_edges(name: str, bins: Union[int, Sequence[float]]) -> numpy.ndarray:
+    if numpy.ndim(bins) == 0:
+        if name not in BIN_RANGES:
+            raise ValueError(
+                f'The bin edges for "{name}" must be given explicitly.')
+        return numpy.linspace(*BIN_RANGES[name], int(bins) + 1) # type: ignore
+    return numpy.asarray(bins, dtype=float)
+
+
+def _read(var, start: int, end: int) -> numpy.ndarray:
+    """Read a slice of a netCDF variable as floats, with missing values as nan."""
+    return numpy.ma.filled(
+        numpy.ma.asarray(var[start:end]).astype(numpy.float64), numpy.nan)
+
+
+def _window(nc, times: List[float]) -> Dict[str, str]:
+    """The time window of the observations, as the attributes of Data.
+
+    The window is left empty if the file has no MetaData/dateTime, which
+    is fine for plotting a single file, but parse_time() raises an error
+    for it wherever the time is needed (e.g. a time series)."""
+    import netCDF4
+    attrs = {'window_start': '', 'window_end': ''}
+    var = nc['MetaData'].variables.get('dateTime')
+    if times and hasattr(var, 'units'):
+        for k, t in zip(attrs.keys(), (min(times), max(times))):
+            attrs[k] = netCDF4.num2date(
+                t, var.units, only_use_cftime_datetimes=False,
+                only_use_python_datetimes=True).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return attrs
+
+
+def _channels(nc, var) -> numpy.ndarray:
+    """The channel numbers of a multichannel variable."""
+    dim = var.dimensions[1]
+    if dim in nc.variables:
+        return numpy.asarray(nc.variables[dim][:])
+    if 'sensorChannelNumber' in nc['MetaData'].variables:
+        return numpy.asarray(nc['MetaData'].variables['sensorChannelNumber'][:])
+    return numpy.arange(1, len(nc.dimensions[dim]) + 1)
+
+
+def _bin_file(
+        filename: str,
+        bins: Mapping[str, Sequence[float]],
+        obs_variables: Optional[Sequence[str]],
+        qc: bool,
+        chunk_size: int) -> Tuple[xr.Dataset, Optional[numpy.ndarray]]:
+    """Bin all the diagnostics and statistics of the observations in a file.
+
+    Returns the binned statistics, and the channel numbers if any of the
+    variables are multichannel."""
+    # netCDF4 is slow to import, and only needed here
+    import netCDF4
+
+    edges = {k: numpy.asarray(v) for k, v in bins.items()}
+    nbins = [len(e) - 1 for e in edges.values()]
+    size = int(numpy.prod(nbins))
+
+    with netCDF4.Dataset(filename) as nc:
+        obs_vars = [
+            v for v in nc['ObsValue'].variables
+            if obs_variables is None or v in obs_variables]
+        hofx = next((nc[g] for g in ('hofx', 'HofX') if g in nc.groups), None)
+        # only the ObsValue is binned for any variable without a hofx
+        diags = {
+            v: DIAGNOSTICS if hofx is not None and v in hofx.variables else ('ObsValue',)
+            for v in obs_vars}
+        effective_qc = nc.groups.get('EffectiveQC') if qc else None
+
+        # the channels of any multichannel variables, which share a single
+        # "sensor_channel" dimension so they must all be the same
+        channels = None
+        for v in obs_vars:
+            var = nc['ObsValue'].variables[v]
+            if var.ndim == 2:
+                c = _channels(nc, var)
+                if channels is None:
+                    channels = c
+                elif not numpy.array_equal(c, channels):
+                    raise ValueError(
+                        f'The channels of "{v}" are not the same as those of the'
+                        f' other variables in {filename}')
+
+        running = {
+            (v, d): _RunningStats(
+                size * (len(channels) if nc['ObsValue'].variables[v].ndim == 2 else 1))
+            for v in obs_vars for d in diags[v]}
+
+        nlocs = len(nc.dimensions[nc['MetaData'].variables['latitude'].dimensions[0]])
+        times: List[float] = []  # the min/max dateTime of each chunk
+        for start in range(0, nlocs, chunk_size):
+            end = min(start + chunk_size, nlocs)
+
+            # the flattened bin index of each location, and if it is in the bins
+            index = numpy.zeros(end - start, dtype=numpy.int64)
+            valid = numpy.ones(end - start, dtype=bool)
+            for k, e in edges.items():
+                x = _read(nc['MetaData'].variables[k], start, end)
+                if k == 'longitude':
+                    x = numpy.mod(x - e[0], 360.0) + e[0]
+                i = numpy.searchsorted(e, x, side='right') - 1
+                i[x == e[-1]] = len(e) - 2  # include the last edge
+                valid &= (i >= 0) & (i < len(e) - 1)
+                index = index * (len(e) - 1) + i
+
+            if 'dateTime' in nc['MetaData'].variables:
+                t = nc['MetaData'].variables['dateTime'][start:end]
+                if t.count():
+                    times += [t.min(), t.max()]
+
+            for v in obs_vars:
+                obs = _read(nc['ObsValue'].variables[v], start, end)
+                ok = valid.reshape((-1,) + (1,) * (obs.ndim - 1)) & numpy.isfinite(obs)
+                values = {'ObsValue': obs}
+                if 'hofx' in diags[v]:
+                    values['hofx'] = _read(hofx.variables[v], start, end) # type: ignore
+                    values['OmB'] = obs - values['hofx']
+                    ok &= numpy.isfinite(values['hofx'])
+                if effective_qc is not None and v in effective_qc.variables:
+                    ok &= _read(effective_qc.variables[v], start, end) == 0
+
+                idx = index
+                if obs.ndim == 2:
+                    idx = index[:, None] * len(channels) + numpy.arange(len(channels)) # type: ignore
+                for d in diags[v]:
+                    running[(v, d)].add(idx[ok], values[d][ok])
+
+        attrs = _window(nc, times)
+
+    # convert the binned statistics into a Dataset
+    dims = tuple(edges.keys())
+    data_vars = {}
+    for (v, d), r in running.items():
+        shape = nbins if r.size == size else [*nbins, len(channels)] # type: ignore
+        var_dims = dims if r.size == size else (*dims, 'sensor_channel')
+        for s, values in r.statistics().items():
+            name = f'{v}.count' if s == 'count' else f'{v}.{d}.{s}'
+            data_vars[name] = (var_dims, values.reshape(shape))
+
+    return xr.Dataset(data_vars=data_vars, attrs=attrs), channels
 
 
 @register_data_adapter(name='ioda')
 def ioda_adapter(
-        filename: str) -> Data:
-    raise NotImplementedError()
\ No newline at end of file
+        filename: str,
+        bins: Optional[Mapping[str, Union[int, Sequence[float]]]] = None,
+        variables: Optional[Mapping[str, Iterable[str]]] = None,
+        qc: bool = True,
+        chunk_size: int = 1000000,
+        name: str = 'EXP1') -> Data:
+    """Bin the observations of an IODA obs-space file into statistics.
+
+    The file is read "chunk_size" locations at a time, so that the memory
+    used does not depend on the number of observations. "bins" is a mapping
+    of MetaData variable name to either the number of bins (latitude and
+    longitude only) or the bin edges, by default 5 degree lat/lon boxes.
+    Multichannel observations are also binned by channel. Longitudes are
+    wrapped to the range of their bins. If "qc" is True, only observations
+    that passed QC (EffectiveQC == 0) are used, if the file has QC.
+
+    The returned variables are the same as from the bespin adapter:
+    "<variable>.count" and "<variable>.<diagnostic>.<statistic>" for the
+    ObsValue, hofx, and OmB diagnostics. "variables" can restrict these to
+    the given 'variable', 'diagnostic', and/or 'statistic' names.
+    """
+    if bins is None:
+        bins = DEFAULT_BINS
+    # the names of the variables, diagnostics, and statistics to keep. Any
+    # other options for the bespin adapter (e.g. 'ignore_missing') are ignored
+    select = {
+        k: (v,) if isinstance(v, str) else tuple(v)
+        for k, v in (variables or {}).items()
+        if k in ('variable', 'diagnostic', 'statistic')}
+
+    # the binned file is shared by other selections of the same file, when
+    # the DataAdapter cache is enabled
+    edges = {k: _bin_edges(k, v) for k, v in bins.items()}
+    binned, channels = DataAdapter.cache.load(
+        filename, _bin_file,
+        bins={k: tuple(e.tolist()) for k, e in edges.items()},
+        obs_variables=select.get('variable'),
+        qc=qc, chunk_size=chunk_size)
+
+    diags = select.get('diagnostic', DIAGNOSTICS)
+    stats = select.get('statistic', STATISTICS)
+    data_vars = [
+        v for v in binned.data_vars
+        if (v.endswith('.count') and 'count' in stats)
+        or (v.split('.')[-2] in diags and v.split('.')[-1] in stats)]
+    data = binned[data_vars]
+
+    coord_edges = [xr.DataArray(e, name=k, dims=(k,)) for k, e in edges.items()]
+    coords = None
+    if channels is not None:
+        coords = (xr.DataArray(channels, name='sensor_channel', dims=('sensor_channel',)),)
+    return Data(name=name, data=data, coord_edges=coord_edges, coords=coords)
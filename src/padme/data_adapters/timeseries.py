@@ -0,0 +1,249 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import os
+
+import numpy
+import xarray as xr
+
+from ..core.data import parse_time, time_coordinate
+from ..core.data_adapter import register_data_adapter, Data
+
+TIME_UNITS = 'seconds since 1970-01-01T00:00:00Z'
+CHUNK_SIZE = 1024  # cycles per HDF5 chunk
+
+
+def reduce_statistics(ds: xr.Dataset) -> xr.Dataset:
+    """Combine binned statistics into a single global value of each.
+
+    The "<variable>.<diagnostic>.<statistic>" mean, stddev, and rmsd are
+    weighted by the "<variable>.count" of each bin, which are summed. Any
+    other variables can only be reduced if they have no dimensions.
+    """
+    if not ds.dims:
+        return ds
+    ret = {}
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        for v in ds.data_vars:
+            v = str(v)
+            parts = v.rsplit('.', 2)
+            if v.endswith('.count'):
+                ret[v] = ds[v].sum()
+                continue
+            if len(parts) != 3 or f'{parts[0]}.count' not in ds:
+                raise ValueError(f'Cannot reduce "{v}", it has no counts.')
+            var, diag, stat = parts
+            count = ds[f'{var}.count']
+            n = count.where(count > 0, 0.0)
+            total = n.sum()
+            def weighted(x):
+                return (n * x.fillna(0.0)).sum() / total
+            mean = f'{var}.{diag}.mean'
+            if stat == 'mean':
+                ret[v] = weighted(ds[v])
+            elif stat == 'rmsd':
+                ret[v] = numpy.sqrt(weighted(ds[v]**2))
+            elif stat == 'stddev' and mean in ds:
+                m = weighted(ds[mean])
+                ret[v] = numpy.sqrt(weighted(ds[v]**2 + ds[mean]**2) - m**2)
+            else:
+                raise ValueError(f'Cannot reduce "{v}".')
+    return xr.Dataset({k: v.assign_attrs(ds[k].attrs) for k, v in ret.items()},
+                      attrs=ds.attrs)
+
+
+def _selected(name: str, select: Mapping[str, Tuple[str, ...]]) -> bool:
+    """If the variable "name" matches the selected variable, diagnostic, and
+    statistic names."""
+    if name.endswith('.count'):
+        var, diag, stat = name[:-len('.count')], None, 'count'
+    elif name.count('.') >= 2:
+        var, diag, stat = name.rsplit('.', 2)
+    else:
+        return not select
+    return (var in select.get('variable', (var,))
+            and (diag is None or diag in select.get('diagnostic', (diag,)))
+            and stat in select.get('statistic', (stat,)))
+
+
+class TimeSeriesStore():
+    """An append-only store of global statistics, indexed by cycle.
+
+    The store is a netCDF4/HDF5 file with a group for each experiment.
+    Each group has an unlimited "cycle" dimension, the start and end of each
+    cycle's window, and a chunked 1D variable for each statistic. Appending
+    a cycle only writes the new values, and any time range is read as a
+    single slice of each variable. e.g.
+
+        store = TimeSeriesStore('stats.nc')
+        store.append(padme.DataAdapter('bespin', filename='cycle.nc'))
+        data = store.read(start='2022-01-01T00:00:00Z')
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    @property
+    def experiments(self) -> Tuple[str, ...]:
+        """The names of the experiments in the store."""
+        import netCDF4
+        if not os.path.exists(self.filename):
+            return ()
+        with netCDF4.Dataset(self.filename) as nc:
+            return tuple(nc.groups.keys())
+
+    def append(self, data: Data) -> bool:
+        """Append the statistics of a cycle for each experiment in "data".
+
+        Binned statistics are reduced to global values first (see
+        reduce_statistics()). Returns False, and nothing is written, if the
+        cycle is already in the store. Otherwise the cycle must be after the
+        last one in the store.
+        """
+        return self.extend([data])[0]
+
+    def extend(self, cycles: Iterable[Data]) -> List[bool]:
+        """Append the statistics of many cycles, in time order.
+
+        Cycles already in the store are skipped, and False is returned for
+        them. All the cycles are checked before any are written, so if a new
+        cycle is before the last one of its experiment a ValueError is
+        raised and the store is unchanged.
+        """
+        # netCDF4 is slow to import, and only needed here
+        import netCDF4
+
+        cycles = [
+            {str(k): reduce_statistics(ds) for k, ds in d.datasets.items()}
+            for d in cycles]
+        mode = 'a' if os.path.exists(self.filename) else 'w'
+        with netCDF4.Dataset(self.filename, mode) as nc:
+            # check all the cycles before writing any of them
+            stored: Dict[str, numpy.ndarray] = {}
+            new: Dict[str, List[int]] = {}
+            writes = []
+            appended = []
+            for datasets in cycles:
+                written = False
+                for exp, ds in datasets.items():
+                    start, end = (
+                        int(parse_time(ds.attrs[k]).astype(numpy.int64))
+                        for k in ('window_start', 'window_end'))
+                    if exp not in stored:
+                        g = nc.groups.get(exp)
+                        stored[exp] = numpy.empty(0, dtype=numpy.int64) if g is None \
+                            else g['window_start'][:].astype(numpy.int64)
+                        new[exp] = []
+                    starts = stored[exp]
+                    i = numpy.searchsorted(starts, start)
+                    if (i < len(starts) and starts[i] == start) or start in new[exp]:
+                        continue
+                    last = max([*starts[-1:], *new[exp][-1:]], default=None)
+                    if last is not None and start < last:
+                        raise ValueError(
+                            f'Cycle {ds.attrs["window_start"]} is before the last'
+                            f' cycle of "{exp}" in {self.filename}')
+                    new[exp].append(start)
+                    writes.append((exp, start, end, ds))
+                    written = True
+                appended.append(written)
+
+            for exp, start, end, ds in writes:
+                g = nc.groups.get(exp)
+                if g is None:
+                    g = nc.createGroup(exp)
+                    g.createDimension('cycle', None)
+                    for k in ('window_start', 'window_end'):
+                        g.createVariable(k, 'i8', ('cycle',), chunksizes=(CHUNK_SIZE,))
+                        g[k].units = TIME_UNITS
+                n = len(g.dimensions['cycle'])
+                g['window_start'][n] = start
+                g['window_end'][n] = end
+                for v, da in ds.data_vars.items():
+                    if v not in g.variables:
+                        # earlier cycles are missing the new variable
+                        g.createVariable(v, 'f8', ('cycle',), fill_value=numpy.nan,
+                                         chunksizes=(CHUNK_SIZE,))
+                    g[v][n] = float(da)
+        return appended
+
+    def read(
+            self,
+            start: Optional[str] = None,
+            end: Optional[str] = None,
+            experiment: Optional[str] = None,
+            variables: Optional[Mapping[str, Iterable[str]]] = None,
+            name: Optional[str] = None) -> Data:
+        """Read the cycles of an experiment as 1D Data along "time".
+
+        Only the cycles with a window starting from "start" up to "end"
+        are read, all by default. "experiment" is needed if there is more
+        than one in the store, and is also the name given to the Data
+        unless "name" is given. "variables" can restrict the variables to
+        the given 'variable', 'diagnostic', and/or 'statistic' names.
+        """
+        import netCDF4
+
+        select = {
+            k: (v,) if isinstance(v, str) else tuple(v)
+            for k, v in (variables or {}).items()
+            if k in ('variable', 'diagnostic', 'statistic')}
+        with netCDF4.Dataset(self.filename) as nc:
+            if experiment is None:
+                if len(nc.groups) != 1:
+                    raise ValueError(
+                        f'"experiment" must be one of {list(nc.groups)} in {self.filename}')
+                experiment = next(iter(nc.groups))
+            elif experiment not in nc.groups:
+                raise ValueError(f'Experiment "{experiment}" is not in {self.filename}')
+            g = nc[experiment]
+
+            # the cycles are sorted, so the range is a single slice
+            starts = g['window_start'][:].astype(numpy.int64)
+            i0 = 0 if start is None else numpy.searchsorted(
+                starts, parse_time(start).astype(numpy.int64), side='left')
+            i1 = len(starts) if end is None else numpy.searchsorted(
+                starts, parse_time(end).astype(numpy.int64), side='right')
+            if i1 <= i0:
+                raise ValueError(f'No cycles between {start} and {end} in {self.filename}')
+            ends = g['window_end'][i0:i1].astype(numpy.int64)
+            starts = starts[i0:i1]
+
+            names = [
+                v for v in g.variables
+                if v not in ('window_start', 'window_end') and _selected(v, select)]
+            data_vars = {
+                v: (('time',), numpy.ma.filled(g[v][i0:i1].astype(float), numpy.nan))
+                for v in names}
+
+        coord, coord_edges = time_coordinate(
+            starts.astype('datetime64[s]'), ends.astype('datetime64[s]'))
+        attrs = {
+            'window_start': f'{starts[0].astype("datetime64[s]")}Z',
+            'window_end': f'{ends[-1].astype("datetime64[s]")}Z'}
+        return Data(
+            name=experiment if name is None else name,
+            data=xr.Dataset(data_vars, attrs=attrs),
+            coords=[coord], coord_edges=[coord_edges])
+
+
+@register_data_adapter(name='timeseries')
+def timeseries_adapter(
+        filename: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        experiment: Optional[str] = None,
+        variables: Optional[Mapping[str, Iterable[str]]] = None,
+        name: Optional[str] = None) -> Data:
+    """Read a time series of global statistics from a "padme ingest" store.
+
+    Returns the cycles of one experiment with a window starting from
+    "start" up to "end" (all by default) as 1D Data along "time". The
+    variables have the same names as from the bespin adapter, and
+    "variables" can restrict them to the given 'variable', 'diagnostic',
+    and/or 'statistic' names.
+    """
+    return TimeSeriesStore(filename).read(start, end, experiment, variables, name)
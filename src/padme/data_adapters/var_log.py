@@ -3,10 +3,147 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
+from typing import Dict, List
+import math
+import re
+
+import numpy
+import xarray as xr
+
 from ..core.data_adapter import register_data_adapter, Data
 
+# The lines written by the JEDI minimizers at the end of each iteration, e.g.
+#     Gradient reduction (  1) = 4.44015856e-01
+#     Norm reduction (  1) = 4.44015856e-01
+#     Quadratic cost function: J   (  1) = 3.62929047e+04
+#     Quadratic cost function: Jb  (  1) = 1.16380447e+01
+#     Quadratic cost function: JoJc(  1) = 3.62812667e+04
+# The whole log is scanned with a single regex, so that lines that don't
+# match cost almost nothing.
+_PATTERN = re.compile(
+    rb'^[ \t]*(?:'
+    rb'(Gradient reduction|Norm reduction'
+    rb'|Quadratic cost function:[ \t]*(?:JoJc|Jb|J))'
+    rb'[ \t]*\([ \t]*(\d+)\)[ \t]*=[ \t]*(\S+)'
+    rb')', re.MULTILINE)
+
+# the Data variable name for each of the minimizer values
+VARIABLES = {
+    b'Gradient reduction': 'gradient_reduction',
+    b'Norm reduction': 'norm_reduction',
+    b'Quadratic cost function: J': 'J',
+    b'Quadratic cost function: Jb': 'Jb',
+    b'Quadratic cost function: JoJc': 'Jo',
+}
+_names = dict(VARIABLES)  # also with any other whitespace found in the logs
+
+
+class VarLogParser():
+    """Incremental parser of the minimizer output in a JEDI variational log.
+
+    Each call to update() only parses what has been added to the log since
+    the last call, so a log that is still being written can be monitored
+    without re-reading it. e.g.
+
+        parser = VarLogParser('var.log')
+        while running:
+            if parser.update():
+                plot(parser.data())
+    """
+
+    def __init__(self, filename: str, block_size: int = 1 << 24):
+        self.filename = filename
+        self.block_size = block_size
+        self._reset()
+
+    def _reset(self) -> None:
+        self._offset = 0     # position in the file that has been read up to
+        self._partial = b''  # any incomplete line at the end of the last read
+        self._outer: List[int] = []
+        self._values: Dict[str, List[float]] = {v: [] for v in VARIABLES.values()}
+        self._iter = 0  # the inner iteration of the last record
+        self._nvalues = 0
+
+    def update(self, final: bool = False) -> bool:
+        """Parse any new lines in the log, returning True if there are any
+        new values.
+
+        An incomplete last line is kept until the rest of it is written,
+        unless "final" is True. If the log has been truncated, or replaced
+        by a smaller file, it is parsed again from the start.
+        """
+        nvalues = self._nvalues
+        with open(self.filename, 'rb') as f:
+            f.seek(0, 2)
+            if f.tell() < self._offset:
+                self._reset()
+                nvalues = -1
+            f.seek(self._offset)
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    break
+                self._offset += len(block)
+                block = self._partial + block
+                end = block.rfind(b'\n') + 1
+                self._partial = block[end:]
+                self._parse(block[:end])
+        if final and self._partial:
+            self._parse(self._partial)
+            self._partial = b''
+        return self._nvalues != nvalues
+
+    def _parse(self, block: bytes) -> None:
+        values = self._values
+        outer = self._outer
+        for name, it_str, value in _PATTERN.findall(block):
+            var = _names.get(name)
+            if var is None:
+                var = _names[name] = VARIABLES[
+                    b': '.join(b' '.join(p.split()) for p in name.split(b':'))]
+            it = int(it_str)
+
+            # a new record starts with each iteration, and a new outer loop
+            # when the inner iteration number doesn't go up.
+            if not outer or it != self._iter or not math.isnan(values[var][-1]):
+                if not outer:
+                    outer.append(1)
+                else:
+                    outer.append(outer[-1] + (it <= self._iter))
+                for v in values.values():
+                    v.append(math.nan)
+                self._iter = it
+            values[var][-1] = float(value)
+            self._nvalues += 1
+
+    @property
+    def niter(self) -> int:
+        """The total number of inner iterations parsed so far."""
+        return len(self._outer)
+
+    def data(self, name: str = 'EXP1') -> Data:
+        """The values of each inner iteration, as 1D Data."""
+        n = len(self._outer)
+        iteration = xr.DataArray(
+            numpy.arange(0.5, n + 1), name='iteration', dims=('iteration',))
+        data = xr.Dataset(
+            data_vars={
+                k: (('iteration',), numpy.array(v)) for k, v in self._values.items()},
+            coords={'outer_loop': (('iteration',), numpy.array(self._outer, dtype=int))},
+            attrs={'window_start': '', 'window_end': ''})
+        return Data(name=name, data=data, coord_edges=[iteration])
+
 
 @register_data_adapter(name='var_log')
 def var_log_adapter(
-        filename: str) -> Data:
-    raise NotImplementedError()
\ No newline at end of file
+        filename: str,
+        name: str = 'EXP1') -> Data:
+    """Read the minimizer convergence from a JEDI variational log.
+
+    Returns the cost function (J, Jb, Jo) and the gradient and norm
+    reduction at each inner iteration, over all outer loops. Use
+    VarLogParser directly to follow a log as it is being written.
+    """
+    parser = VarLogParser(filename)
+    parser.update(final=True)
+    return parser.data(name)
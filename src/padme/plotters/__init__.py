@@ -3,8 +3,31 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
-from . import matplotlib_base
+# The plotters are not imported until they are needed, since they pull in
+# matplotlib and cartopy, which are slow to import. The built-in plotters are
+# registered by name here, and the submodules are imported on first access.
 
-from . import categorical
-from . import one_dimensional
-from . import two_dimensional
\ No newline at end of file
+import importlib
+
+from ..core.plotter import Plotter
+
+Plotter.register_lazy('categorical', f'{__name__}.categorical.categorical')
+Plotter.register_lazy('1d', f'{__name__}.one_dimensional.one_dimensional')
+Plotter.register_lazy('timeseries', f'{__name__}.one_dimensional.one_dimensional')
+Plotter.register_lazy('2d', f'{__name__}.two_dimensional.two_dimensional')
+Plotter.register_lazy('latlon', f'{__name__}.two_dimensional.latlon')
+Plotter.register_lazy('latlon_animation', f'{__name__}.two_dimensional.animation')
+
+_submodules = (
+    'categorical',
+    'domains',
+    'matplotlib_base',
+    'one_dimensional',
+    'two_dimensional',
+)
+
+
+def __getattr__(name: str):
+    if name in _submodules:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -14,8 +14,8 @@ class Categorical(MatplotlibBase, factory_name="categorical"):
     data_handlers = [
         *MatplotlibBase.data_handlers ]
 
-    def __init__(self, data: Data):
-        super().__init__(data)
+    def __init__(self, data: Data, **kwargs):
+        super().__init__(data, **kwargs)
 
     @classmethod
     def is_valid(cls, data: Data) -> bool:
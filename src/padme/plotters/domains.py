@@ -0,0 +1,24 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""The regional domains available to latlon plots.
+
+Kept separate from the latlon plotter so that the domain names can be used
+(e.g. by the command line tools) without importing cartopy.
+"""
+
+import functools
+import pathlib
+from typing import Any, Dict
+
+DOMAIN_CONFIG_FILE = (pathlib.Path(__file__).parent / '../config/latlon_domains.yaml').resolve()
+
+
+@functools.lru_cache(maxsize=None)
+def load_domains() -> Dict[str, Any]:
+    """Read the domain configuration file."""
+    import yaml
+    with open(DOMAIN_CONFIG_FILE) as f:
+        return yaml.safe_load(f)
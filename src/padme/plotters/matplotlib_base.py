@@ -3,10 +3,84 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
+from collections import OrderedDict
+from typing import BinaryIO, Hashable, Optional, Set, Union
+
 from ..core.plotter import Parameter, Parameters, PlotterBase, Data
+from ..core import timing
 
 import matplotlib.pyplot as plt # type: ignore
 
+
+class FigureTemplate():
+    """A figure with the static (data independent) parts already drawn."""
+
+    def __init__(self, fig, ax, ax_bottom):
+        self.fig = fig
+        self.ax = ax
+        self.ax_bottom = ax_bottom
+
+        # remember everything that makes up the template, so that anything
+        # added afterward while plotting can be removed again.
+        self._axes = set(fig.axes)
+        self._artists: Set = set(ax.get_children()) | set(ax_bottom.get_children())
+        self._subplotpars = {
+            k: getattr(fig.subplotpars, k)
+            for k in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+
+    def reset(self) -> None:
+        """Remove any plotted data, returning the figure to its template state."""
+        for a in self.ax.get_children() + self.ax_bottom.get_children():
+            if a in self._artists:
+                continue
+            colorbar = getattr(a, 'colorbar', None)
+            if colorbar is not None:
+                colorbar.remove()
+            a.remove()
+        for a in self.fig.axes:
+            if a not in self._axes:
+                a.remove()
+
+        self.ax.set_title('')
+        self.ax.set_prop_cycle(None)
+        self.ax.relim()
+        self.fig.subplots_adjust(**self._subplotpars)
+
+
+class FigureTemplateCache():
+    """Cache of figure templates, shared by plots of the same type and size.
+
+    Disabled by default. When enabled, figures are not closed after saving,
+    so that the next plot with the same template key can reuse them.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.enabled = False
+        self.maxsize = maxsize
+        self._templates: OrderedDict[Hashable, FigureTemplate] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[FigureTemplate]:
+        template = self._templates.get(key, None)
+        if template is not None:
+            self._templates.move_to_end(key)
+        return template
+
+    def add(self, key: Hashable, template: FigureTemplate) -> None:
+        self._templates[key] = template
+        while len(self._templates) > self.maxsize:
+            plt.close(self._templates.popitem(last=False)[1].fig)
+
+    def clear(self) -> None:
+        """Close all the cached figures."""
+        for t in self._templates.values():
+            plt.close(t.fig)
+        self._templates.clear()
+
+
+figure_templates = FigureTemplateCache()
+"""Figure template cache used by all MatplotlibBase plotters"""
+
+
 class MatplotlibBase(PlotterBase, abstract=True):
 
     data_handlers = [
@@ -23,6 +97,7 @@ class MatplotlibBase(PlotterBase, abstract=True):
         super().__init__(data, **kwargs)
         self.projection = None
         self.annotations = []
+        self._template: Optional[FigureTemplate] = None
 
         # common annotations
         dt = data.datetime
@@ -30,24 +105,53 @@ class MatplotlibBase(PlotterBase, abstract=True):
 
     @classmethod
     def is_valid(cls, data: Data) -> bool:
-        # we can't handle animations, yet.
+        # a 3rd dimension is only used for the frames of an animation
         return (
             super().is_valid(data) and
-            len(data.dimensions) <= 2 )
+            len(data.dimensions) <= 3 )
 
-    def _pre_plot(self) -> None:
-        # TODO smartly calculate desired size
-        w=self.parameters['fig_width']
-        h=self.parameters['fig_height']
+    def _template_key(self) -> Hashable:
+        """Plots with the same key are able to share a figure template."""
+        return (
+            type(self), self.parameters['fig_width'], self.parameters['fig_height'])
 
-        self.fig = plt.figure(figsize=(w,h))
-        self.ax_outer = self.fig.add_gridspec(2,1, height_ratios=[0.9,0.1],)
-        self.ax = self.fig.add_subplot(self.ax_outer[0], projection=self.projection)
-        self.ax_bottom = self.fig.add_subplot(self.ax_outer[1])
-        self.ax_bottom.axis('off')
+    def _pre_plot(self) -> None:
+        template = None
+        if figure_templates.enabled:
+            template = figure_templates.get(self._template_key())
+
+        if template is None:
+            # TODO smartly calculate desired size
+            w=self.parameters['fig_width']
+            h=self.parameters['fig_height']
+
+            self.fig = plt.figure(figsize=(w,h))
+            self.ax_outer = self.fig.add_gridspec(2,1, height_ratios=[0.9,0.1],)
+            self.ax = self.fig.add_subplot(self.ax_outer[0], projection=self.projection)
+            self.ax_bottom = self.fig.add_subplot(self.ax_outer[1])
+            self.ax_bottom.axis('off')
+            self._setup_template()
+
+            if figure_templates.enabled:
+                template = FigureTemplate(self.fig, self.ax, self.ax_bottom)
+                figure_templates.add(self._template_key(), template)
+        else:
+            # in case a previous plot failed before it was saved
+            template.reset()
+            self.fig = template.fig
+            self.ax = template.ax
+            self.ax_bottom = template.ax_bottom
+        self._template = template
 
         super()._pre_plot()
 
+    def _setup_template(self) -> None:
+        """Draw anything that does not depend on the data being plotted.
+
+        When figure templates are enabled, this is only called once for all
+        plots sharing the same template key."""
+        pass
+
     def _post_plot(self) -> None:
         super()._post_plot()
 
@@ -67,9 +171,20 @@ class MatplotlibBase(PlotterBase, abstract=True):
             y -= (fontsize+2)
 
         # TODO, need to take a closer look at how layout is being done
-        plt.tight_layout(pad=0.1)
-
-    def _save(self, filename: str) -> None:
-        plt.savefig(filename)
-        plt.close(self.fig)
-        super()._save(filename)
\ No newline at end of file
+        with timing.stage('tight_layout', self):
+            self.fig.tight_layout(pad=0.1)
+
+    def _save(self, filename: Union[str, BinaryIO]) -> None:
+        try:
+            with timing.stage('savefig', self):
+                self._write(filename)
+        finally:
+            if self._template is None:
+                plt.close(self.fig)
+            else:
+                self._template.reset()
+        super()._save(filename)
+
+    def _write(self, filename: Union[str, BinaryIO]) -> None:
+        """Write the finished figure to the output file."""
+        self.fig.savefig(filename)
\ No newline at end of file
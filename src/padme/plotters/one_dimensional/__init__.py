@@ -3,4 +3,4 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
-from .one_dimensional import OneDimensional
\ No newline at end of file
+from .one_dimensional import OneDimensional, TimeSeries
\ No newline at end of file
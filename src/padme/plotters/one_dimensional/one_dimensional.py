@@ -4,6 +4,7 @@
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
 from padme.core.plotter import DataHandler
+from padme.core.data import TIME_DIM
 from ..matplotlib_base import MatplotlibBase, Data
 
 import matplotlib.pyplot as plt # type: ignore
@@ -15,9 +16,9 @@ class BasicLine(DataHandler):
     def process(self, data: Data, plot: 'OneDimensional') -> Data:
         super().process(data, plot)
         vars = data.variables
-        v = list(vars.keys())[0]
+        v = next(iter(vars))
         e = list(vars[v].data_vars.keys())[0]
-        y = vars[v].data_vars[e]
+        y = vars[v].data_vars[e].compute()
         x = next(iter(data._coords.values()))
         print(v)
         xy = (x,y)
@@ -42,8 +43,8 @@ class OneDimensional(MatplotlibBase, factory_name="1d"):
         BasicLine,
         *MatplotlibBase.data_handlers ]
 
-    def __init__(self, data: Data):
-        super().__init__(data)
+    def __init__(self, data: Data, **kwargs):
+        super().__init__(data, **kwargs)
 
     @classmethod
     def is_valid(cls, data: Data) -> bool:
@@ -55,4 +56,51 @@ class OneDimensional(MatplotlibBase, factory_name="1d"):
         super()._pre_plot()
 
     def _post_plot(self) -> None:
-        super()._post_plot()
\ No newline at end of file
+        super()._post_plot()
+
+
+class MultiLine(DataHandler):
+    """A line over time for each bin of the other dimension."""
+
+    def is_valid(self, data: Data) -> bool:
+        return super().is_valid(data)
+
+    def process(self, data: Data, plot: 'TimeSeries') -> Data:
+        super().process(data, plot)
+        vars = data.variables
+        v = next(iter(vars))
+        e = list(vars[v].data_vars.keys())[0]
+        bin_dim = next(d for d in data.dimensions if d != TIME_DIM)
+        d = vars[v].data_vars[e].transpose(TIME_DIM, bin_dim).compute()
+        lines = plot.ax.plot(d.coords[TIME_DIM].data, d.data)
+        plot.ax.legend(
+            lines, [f'{bin_dim}: {b}' for b in d.coords[bin_dim].data],
+            fontsize='x-small', ncol=2)
+        data.remove_variable(v)
+        return data
+
+
+class TimeSeries(MatplotlibBase, factory_name="timeseries"):
+    """Time series of binned data (e.g. cycles binned by latitude), with a
+    line for each bin."""
+
+    data_handlers = [
+        MultiLine,
+        *MatplotlibBase.data_handlers ]
+
+    def __init__(self, data: Data, **kwargs):
+        super().__init__(data, **kwargs)
+
+    @classmethod
+    def is_valid(cls, data: Data) -> bool:
+        return (
+            super().is_valid(data)
+            and len(data.dimensions) == 2
+            and TIME_DIM in data.dimensions
+            and len(data.experiments) == 1 )
+
+    def _pre_plot(self) -> None:
+        super()._pre_plot()
+
+    def _post_plot(self) -> None:
+        super()._post_plot()
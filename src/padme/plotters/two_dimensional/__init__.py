@@ -5,4 +5,5 @@
 
 from .two_dimensional import TwoDimensional
 
-from .latlon import LatLon
\ No newline at end of file
+from .latlon import LatLon
+from .animation import Animation, LatLonAnimation
@@ -0,0 +1,170 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+from typing import Any, BinaryIO, Hashable, Tuple, Union
+import warnings
+
+from padme.core.plotter import Parameters, Parameter, DataHandler
+from padme.core import timing
+from padme.core.statistics import RangeSketch
+from ..matplotlib_base import MatplotlibBase, Data
+from .two_dimensional import ColorMesh, TwoDimensional
+from .latlon import LatLonMixin
+
+import numpy as np
+import matplotlib.animation # type: ignore
+
+
+class AnimatedColorMesh(DataHandler):
+    """A color mesh of the first frame, with the data of every frame kept
+    to be swapped in when the animation is written."""
+
+    def is_valid(self, data: Data) -> bool:
+        return (
+            super().is_valid(data)
+            and self.first_use )
+
+    def process(self, data: Data, plot: 'Animation') -> Data:
+        super().process(data, plot)
+        vars = data.variables
+        v = next(iter(vars))
+        e = list(vars[v].data_vars.keys())[0]
+        y_dim, x_dim = plot.plot_dims
+        d = vars[v].data_vars[e].transpose(plot.frame_dim, y_dim, x_dim)
+
+        y = d.coords[y_dim].data
+        x = d.coords[x_dim].data
+
+        # all the frames share the same color range, from the statistics of
+        # each frame read one at a time (lazy data is not loaded all at once)
+        sketch = RangeSketch.from_chunks(plot.frame(d, i) for i in range(len(d)))
+        stats = sketch.statistics(plot.parameters['range_pct'])
+        plot.annotations.append(
+            f'min: {stats.min:.2f}  mean: {stats.mean:.2f}  max: {stats.max:.2f}')
+        vmin, vmax, cmap = ColorMesh.color_scale(stats, data, plot)
+
+        with timing.stage('pcolormesh', self):
+            mesh = plot.ax.pcolormesh(
+                x, y, plot.frame(d, 0),
+                transform=plot.transform,
+                vmin=vmin, vmax=vmax,
+                cmap = cmap
+            )
+
+        with timing.stage('colorbar', self):
+            plot.fig.colorbar(mesh, ax=plot.ax,
+                orientation='vertical',
+                shrink=0.7,
+                fraction=0.08)
+
+        plot.frames = (mesh, d)
+        data.remove_variable(v)
+        return data
+
+
+class Animation(MatplotlibBase, abstract=True):
+    """Base class for plots of 2D data that are animated along a 3rd dimension.
+
+    The figure is set up and drawn once, for the first frame. Each frame
+    then only sets the new values of the plotted data in place before it is
+    passed to the movie writer, which pipes them to an encoder (ffmpeg or
+    imagemagick), so the cost of each frame is only redrawing the figure. The
+    values of only one frame are read in at a time, and no frames are kept
+    in memory.
+    """
+
+    plot_dims: Tuple[str, str]  # the (y, x) dimensions of each frame
+
+    data_handlers = [
+        AnimatedColorMesh,
+        *MatplotlibBase.data_handlers ]
+
+    parameters = Parameters(
+        TwoDimensional.parameters,
+        Parameter('animation.fps', 4, 'animation frames per second'),
+        Parameter('animation.writer', 'auto',
+            'matplotlib movie writer, "auto" is the first available of ffmpeg'
+            ' or imagemagick (pillow keeps every frame in memory until the end)'),
+        )
+
+    def __init__(self, data: Data, **kwargs):
+        super().__init__(data, **kwargs)
+        self.transform = None
+        self.frame_dim: Hashable = next(
+            d for d in data.dimensions if d not in self.plot_dims)
+        self.frame_values = data.dimensions[self.frame_dim].data
+
+        # the artist, and the (frame, y, x) data, set by the data handler
+        self.frames: Any = None
+
+    @classmethod
+    def is_valid(cls, data: Data) -> bool:
+        return (
+            super().is_valid(data)
+            and len(data.dimensions) == 3
+            and len(data.experiments) == 1 )
+
+    @staticmethod
+    def frame(d, i: int) -> np.ndarray:
+        """The values of the i'th frame of "d", read in if lazy."""
+        return np.asarray(d[i].data)
+
+    def _frame_label(self, value) -> str:
+        if isinstance(value, np.datetime64):
+            value = np.datetime_as_string(value, unit='m')
+        return f'{self.frame_dim}: {value}'
+
+    def _writer(self) -> matplotlib.animation.AbstractMovieWriter:
+        """The movie writer, streaming frames to an external encoder if
+        possible."""
+        writer_name = self.parameters['animation.writer']
+        if writer_name == 'auto':
+            writers = matplotlib.animation.writers
+            writer_name = next(
+                (w for w in ('ffmpeg', 'imagemagick') if writers.is_available(w)),
+                'pillow')
+            if writer_name == 'pillow':
+                warnings.warn(
+                    'Neither ffmpeg nor imagemagick were found, the animation is'
+                    ' written with pillow, which keeps every frame in memory.')
+        return matplotlib.animation.writers[writer_name](
+            fps=self.parameters['animation.fps'])
+
+    def _write(self, filename: Union[str, BinaryIO]) -> None:
+        if not isinstance(filename, str):
+            raise ValueError('Animations can only be written to a named file.')
+        if self.frames is None:
+            raise RuntimeError('No data was plotted for the animation.')
+
+        writer = self._writer()
+
+        artist, d = self.frames
+        title = self.ax.get_title()
+        with writer.saving(self.fig, filename, dpi=self.fig.dpi):
+            for i, value in enumerate(self.frame_values):
+                artist.set_array(self.frame(d, i))
+                self.ax.set_title(f'{title}  ({self._frame_label(value)})')
+                writer.grab_frame()
+
+
+class LatLonAnimation(LatLonMixin, Animation, factory_name="latlon_animation"):
+    """Lat/lon maps animated along any other dimension (e.g. time, or
+    channel)."""
+
+    plot_dims = ('latitude', 'longitude')
+
+    data_handlers = [
+        *Animation.data_handlers ]
+
+    parameters = Parameters(
+        Animation.parameters,
+        LatLonMixin.parameters,
+    )
+
+    @classmethod
+    def is_valid(cls, data: Data) -> bool:
+        return (
+            super().is_valid(data)
+            and set(cls.plot_dims) <= data.dimensions.keys() )
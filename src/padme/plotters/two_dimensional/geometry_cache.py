@@ -0,0 +1,151 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""On-disk cache of projected coastlines and extents for the latlon domains."""
+
+from typing import Any, List, Tuple
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import warnings
+
+import cartopy
+import cartopy.crs as ccrs
+import cartopy.feature
+import matplotlib.collections as mcollections
+from matplotlib.path import Path
+import numpy
+
+try:
+    from cartopy.mpl.path import shapely_to_path
+except ImportError:
+    # cartopy < 0.23
+    from cartopy.mpl.patch import geos_to_path
+    def shapely_to_path(shape):
+        return Path.make_compound_path(*geos_to_path(shape))
+
+
+class DomainGeometry():
+    """Coastline paths and axes limits, in the coordinates of a projection."""
+
+    def __init__(
+            self,
+            paths: List[Path],
+            xlim: Tuple[float, float],
+            ylim: Tuple[float, float]):
+        self.paths = paths
+        self.xlim = xlim
+        self.ylim = ylim
+
+    @classmethod
+    def from_axes(cls, ax) -> 'DomainGeometry':
+        """Project the coastlines visible in the current extent of a GeoAxes."""
+        feature = cartopy.feature.COASTLINE
+        extent = ax.get_extent(feature.crs)
+        paths = [
+            shapely_to_path(ax.projection.project_geometry(g, feature.crs))
+            for g in feature.intersecting_geometries(extent)]
+        return cls(paths, ax.get_xlim(), ax.get_ylim())
+
+    def coastlines(self, ax, **kwargs) -> mcollections.PathCollection:
+        """Add the coastlines to the GeoAxes, same as ax.coastlines()."""
+        kwargs.setdefault('facecolor', 'none')
+        kwargs.setdefault('zorder', 1.5)
+        collection = mcollections.PathCollection(
+            self.paths, transform=ax.transData, **kwargs)
+        ax.add_collection(collection, autolim=False)
+        return collection
+
+    def save(self, filename: pathlib.Path) -> None:
+        vertices = [p.vertices for p in self.paths]
+        codes = [
+            p.codes if p.codes is not None else
+            numpy.r_[Path.MOVETO, numpy.full(len(p.vertices)-1, Path.LINETO)]
+            for p in self.paths]
+        # write to a temporary file first, so that other processes never see
+        # a partially written file.
+        fd, tmp = tempfile.mkstemp(dir=filename.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            numpy.savez(
+                f,
+                vertices=numpy.concatenate(vertices or [numpy.empty((0,2))]),
+                codes=numpy.concatenate(codes or [numpy.empty(0)]).astype(numpy.uint8),
+                lengths=numpy.array([len(v) for v in vertices], dtype=numpy.int64),
+                xlim=numpy.array(self.xlim),
+                ylim=numpy.array(self.ylim))
+        os.replace(tmp, filename)
+
+    @classmethod
+    def load(cls, filename: pathlib.Path) -> 'DomainGeometry':
+        with numpy.load(filename) as f:
+            offsets = numpy.cumsum(f['lengths'])[:-1]
+            paths = [
+                Path(v, c) for v, c in zip(
+                    numpy.split(f['vertices'], offsets),
+                    numpy.split(f['codes'], offsets))
+            ] if len(f['lengths']) else []
+            return cls(paths, tuple(f['xlim']), tuple(f['ylim']))
+
+
+class DomainGeometryCache():
+    """Persistent cache of DomainGeometry, shared between runs and processes.
+
+    The cache directory is "$PADME_CACHE_DIR", or "$XDG_CACHE_HOME/padme" by
+    default.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.directory = pathlib.Path(os.environ.get(
+            'PADME_CACHE_DIR',
+            pathlib.Path(os.environ.get(
+                'XDG_CACHE_HOME', pathlib.Path.home() / '.cache')) / 'padme'))
+
+    def _filename(self, key: Any) -> pathlib.Path:
+        # the coastlines also depend on which cartopy, and its data, is used.
+        key = json.dumps(
+            [key, cartopy.__version__,
+             str(cartopy.config['pre_existing_data_dir']),
+             str(cartopy.config['data_dir'])],
+            sort_keys=True, default=str)
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return self.directory / 'domains' / f'{digest}.npz'
+
+    def get(self, key: Any, ax, extent=None) -> DomainGeometry:
+        """Set the extent of a GeoAxes and get the geometry of its domain.
+
+        The geometry is read from the cache if it is there, otherwise it is
+        calculated and saved to the cache. "extent" is the optional regional
+        extent [lon0, lon1, lat0, lat1] as given to GeoAxes.set_extent().
+        """
+        filename = self._filename(key) if self.enabled else None
+        if filename is not None:
+            try:
+                geometry = DomainGeometry.load(filename)
+            except (OSError, ValueError, KeyError):
+                pass
+            else:
+                if extent is not None:
+                    ax.set_xlim(geometry.xlim)
+                    ax.set_ylim(geometry.ylim)
+                return geometry
+
+        if extent is not None:
+            ax.set_extent(extent, crs=ccrs.PlateCarree())
+        geometry = DomainGeometry.from_axes(ax)
+
+        if filename is not None:
+            try:
+                filename.parent.mkdir(parents=True, exist_ok=True)
+                geometry.save(filename)
+            except OSError as e:
+                warnings.warn(f'unable to write domain cache {filename}: {e}')
+        return geometry
+
+
+geometry_cache = DomainGeometryCache()
+"""Domain geometry cache used by the LatLon plotter"""
@@ -7,23 +7,26 @@ import cartopy.crs as ccrs
 from cartopy.mpl import gridliner
 import matplotlib.pyplot as plt # type: ignore
 import matplotlib.ticker as mticker
-import yaml
-import pathlib
 import numpy
 
 from .two_dimensional import TwoDimensional, Data, Parameter, Parameters
+from ...core import timing
+from .geometry_cache import geometry_cache
+from ..domains import DOMAIN_CONFIG_FILE, load_domains
 
-DOMAIN_CONFIG_FILE = (pathlib.Path(__file__).parent / '../../config/latlon_domains.yaml').resolve()
-domains = yaml.safe_load(open(DOMAIN_CONFIG_FILE))
+domains = load_domains()
 
 
-class LatLon(TwoDimensional, factory_name="latlon"):
+class LatLonMixin():
+    """The map projection, coastlines, and grid of a domain, for plotters of
+    latitude/longitude data.
 
-    data_handlers = [
-        *TwoDimensional.data_handlers ]
+    Used with a MatplotlibBase plotter, the mixin sets up the projection of
+    the "domain" parameter, and draws the static parts of the map as part
+    of the figure template.
+    """
 
     parameters = Parameters(
-        TwoDimensional.parameters,
         Parameter('domain', 'global', 'The regional domain for the plot'),
         Parameter('grid.spacing', 30, 'grid line spacing (degrees)'),
     )
@@ -31,7 +34,7 @@ class LatLon(TwoDimensional, factory_name="latlon"):
     domain_configs = None # read in from config file when needed
 
     def __init__(self, data: Data, **kwargs):
-        super().__init__(data, **kwargs)
+        super().__init__(data, **kwargs) # type: ignore
 
         # determine domain specific parameters
         try:
@@ -57,20 +60,20 @@ class LatLon(TwoDimensional, factory_name="latlon"):
 
         self.transform = ccrs.PlateCarree()
 
-    @classmethod
-    def is_valid(cls, data: Data) -> bool:
+    def _template_key(self):
         return (
-            super().is_valid(data)
-            and data.dimensions.keys() == {'latitude', 'longitude'})
+            super()._template_key(), # type: ignore
+            self.parameters['domain'], self.parameters['grid.spacing'])
 
-    def _pre_plot(self) -> None:
-        super()._pre_plot()
-        if self.extent is not None:
-            self.ax.set_extent(self.extent, crs=ccrs.PlateCarree())
+    def _setup_template(self) -> None:
+        super()._setup_template() # type: ignore
 
-    def _post_plot(self) -> None:
-        super()._post_plot()
-        self.ax.coastlines(color='k', alpha=0.5)
+        # projected coastlines and extent are read from the cache if possible
+        domain = self.parameters['domain']
+        with timing.stage('coastlines', self):
+            geometry = geometry_cache.get(
+                (domain, domains[domain]), self.ax, self.extent)
+            geometry.coastlines(self.ax, color='k', alpha=0.5)
 
         gl = self.ax.gridlines(alpha=0.5, color='gray', linestyle='--')
 
@@ -82,3 +85,19 @@ class LatLon(TwoDimensional, factory_name="latlon"):
         gl.ylocator = mticker.FixedLocator(
             numpy.linspace(-90,90, round(180/self.parameters['grid.spacing'])+1))
 
+
+class LatLon(LatLonMixin, TwoDimensional, factory_name="latlon"):
+
+    data_handlers = [
+        *TwoDimensional.data_handlers ]
+
+    parameters = Parameters(
+        TwoDimensional.parameters,
+        LatLonMixin.parameters,
+    )
+
+    @classmethod
+    def is_valid(cls, data: Data) -> bool:
+        return (
+            super().is_valid(data)
+            and data.dimensions.keys() == {'latitude', 'longitude'})
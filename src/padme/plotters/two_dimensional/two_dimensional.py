@@ -4,6 +4,9 @@
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
 from padme.core.plotter import Parameters, Parameter, DataHandler
+from padme.core import timing
+from padme.core.data import TIME_DIM
+from padme.core.statistics import FieldStatistics, field_statistics
 from ..matplotlib_base import MatplotlibBase, Data
 
 import numpy as np
@@ -19,9 +22,9 @@ class ColorMesh(DataHandler):
     def process(self, data: Data, plot: 'TwoDimensional') -> Data:
         super().process(data, plot)
         vars = data.variables
-        v = list(vars.keys())[0]
+        v = next(iter(vars))
         e = list(vars[v].data_vars.keys())[0]
-        d = vars[v].data_vars[e]
+        d = vars[v].data_vars[e].compute()  # read in lazy data only once
 
         # TODO remove hardcoded lat/lons
         # prepare data to plot
@@ -29,48 +32,61 @@ class ColorMesh(DataHandler):
         x = d.coords['longitude'].data
         z = d.data
 
+        # the data min/mean/max and the color range, in a single pass
+        stats = field_statistics(z, plot.parameters['range_pct'])
+
         # annotations for the data min/max
         # TODO move this to a higher level? it's probably used
         # by many other data handlers.
         plot.annotations.append(
-            f'min: {np.nanmin(z):.2f}  mean: {np.nanmean(z):.2f}  max: {np.nanmax(z):.2f}')
+            f'min: {stats.min:.2f}  mean: {stats.mean:.2f}  max: {stats.max:.2f}')
 
         # determine the color range
-        # TODO, allow user to override
-        vmin, vmax = self.calc_auto_range(z, plot.parameters['range_pct'])
-        cmap = plot.parameters['mesh.cmap']
-        if data.divergent:
-            # TODO "divergent" should be moved to a per variable level?
-            vmax = max(abs(vmin), vmax)
-            vmin = -vmax
-            cmap = plot.parameters['mesh.cmap_div']
+        vmin, vmax, cmap = self.color_scale(stats, data, plot)
 
         # plot !
-        mesh = plot.ax.pcolormesh(
-            x, y, d,
-            transform=plot.transform,
-            vmin=vmin, vmax=vmax,
-            cmap = cmap
-        )
+        with timing.stage('pcolormesh', self):
+            mesh = plot.ax.pcolormesh(
+                x, y, d,
+                transform=plot.transform,
+                vmin=vmin, vmax=vmax,
+                cmap = cmap
+            )
 
         # colorbar
-        plot.fig.colorbar(mesh, ax=plot.ax,
-            orientation='vertical',
-            shrink=0.7,
-            fraction=0.08)
+        with timing.stage('colorbar', self):
+            plot.fig.colorbar(mesh, ax=plot.ax,
+                orientation='vertical',
+                shrink=0.7,
+                fraction=0.08)
 
         data.remove_variable(v)
         return data
 
+    @classmethod
+    def color_scale(cls, stats: FieldStatistics, data: Data, plot):
+        """The color range and colormap for the values of a plot, from
+        their statistics."""
+        vmin, vmax = stats.lower, stats.upper
+
+        # a given range (e.g. shared by many plots) replaces the automatic one
+        if not np.isnan(plot.parameters['mesh.vmin']):
+            vmin = plot.parameters['mesh.vmin']
+        if not np.isnan(plot.parameters['mesh.vmax']):
+            vmax = plot.parameters['mesh.vmax']
+        cmap = plot.parameters['mesh.cmap']
+        if data.divergent:
+            # TODO "divergent" should be moved to a per variable level?
+            vmax = max(abs(vmin), vmax)
+            vmin = -vmax
+            cmap = plot.parameters['mesh.cmap_div']
+        return vmin, vmax, cmap
+
     @classmethod
     def calc_auto_range(cls, data, pct: float = 0.99):
         """Automatically calculate a color range that covers "pct" of the values."""
-        assert(0 < pct <= 1.0)
-        auto_range = np.nanpercentile(
-            data,
-            [100*(1.0-pct)/2.0,
-             100*((1.0-pct)/2.0 + pct)])
-        return auto_range
+        stats = field_statistics(data, pct)
+        return np.array([stats.lower, stats.upper])
 
 
 class Contour(DataHandler):
@@ -80,7 +96,7 @@ class Contour(DataHandler):
     def process(self, data: Data, plot: 'TwoDimensional') -> Data:
         super().process(data, plot)
         vars = data.variables
-        v = list(vars.keys())[0]
+        v = next(iter(vars))
         data.remove_variable(v)
         return data
 
@@ -96,7 +112,9 @@ class TwoDimensional(MatplotlibBase, factory_name="2d"):
         MatplotlibBase.parameters,
         Parameter('mesh.cmap', 'viridis', 'filled colormap color'),
         Parameter('mesh.cmap_div', 'RdBu_r', 'filled colormap for divergent plots'),
-        Parameter('range_pct', 0.99, 'auto color range percentile')
+        Parameter('range_pct', 0.99, 'auto color range percentile'),
+        Parameter('mesh.vmin', np.nan, 'color range minimum, nan for the auto range'),
+        Parameter('mesh.vmax', np.nan, 'color range maximum, nan for the auto range'),
         )
 
     def __init__(self, data: Data, **kwargs):
@@ -108,7 +126,8 @@ class TwoDimensional(MatplotlibBase, factory_name="2d"):
         return (
             super().is_valid(data)
             and len(data.dimensions) == 2
-            and len(data.datasets) == 1 )
+            and TIME_DIM not in data.dimensions  # see TimeSeries
+            and len(data.experiments) == 1 )
 
     def _pre_plot(self) -> None:
         super()._pre_plot()
@@ -0,0 +1,62 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+"""Helpers for the tests and benchmarks of padme.
+
+These need cartopy, and pyshp to write the stand-in coastlines.
+"""
+
+import contextlib
+import pathlib
+from typing import Iterator
+
+
+def natural_earth_found(resolution: str = '110m') -> bool:
+    """If the real Natural Earth coastlines used by cartopy are on disk, so
+    that they can be used without being downloaded."""
+    import cartopy
+
+    downloader = cartopy.config['downloaders'][('shapefiles', 'natural_earth')]
+    format_dict = {
+        'config': cartopy.config, 'category': 'physical',
+        'name': 'coastline', 'resolution': resolution}
+    paths = (
+        downloader.pre_downloaded_path(format_dict),
+        downloader.target_path(format_dict))
+    return any(p is not None and p.exists() for p in paths)
+
+
+@contextlib.contextmanager
+def stand_in_natural_earth(data_dir: pathlib.Path) -> Iterator[pathlib.Path]:
+    """Use a small stand-in for the Natural Earth coastlines used by cartopy.
+
+    The coastlines are written to "data_dir", and cartopy and the domain
+    geometry cache use that directory until the context is exited. This
+    allows latlon plots to be made without downloading any data.
+    """
+    import cartopy
+    import shapefile
+    from .plotters.two_dimensional.geometry_cache import geometry_cache
+
+    path = data_dir / 'shapefiles' / 'natural_earth' / 'physical'
+    path.mkdir(parents=True)
+    for scale in ('110m', '50m', '10m'):
+        with shapefile.Writer(str(path / f'ne_{scale}_coastline'),
+                              shapeType=shapefile.POLYLINE) as w:
+            w.field('name', 'C')
+            w.line([[[-170.0, -60.0], [-20.0, 10.0], [100.0, 70.0]]])
+            w.record('coast1')
+            w.line([[[0.0, 65.0], [90.0, 80.0], [180.0, 65.0]],
+                    [[0.0, -65.0], [90.0, -80.0], [180.0, -65.0]]])
+            w.record('coast2')
+
+    # keep the projected stand-in coastlines out of the user's cache
+    original = (cartopy.config['pre_existing_data_dir'], geometry_cache.directory)
+    cartopy.config['pre_existing_data_dir'] = str(data_dir)
+    geometry_cache.directory = data_dir / 'padme_cache'
+    try:
+        yield data_dir
+    finally:
+        cartopy.config['pre_existing_data_dir'], geometry_cache.directory = original
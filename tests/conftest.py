@@ -0,0 +1,45 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import numpy
+import pytest
+
+
+@pytest.fixture(scope='session')
+def natural_earth(tmp_path_factory):
+    """A small stand-in for the Natural Earth coastlines used by cartopy.
+
+    This allows latlon plots to be tested without downloading any data."""
+    pytest.importorskip('cartopy')
+    pytest.importorskip('shapefile')
+    from padme.testing import stand_in_natural_earth
+    with stand_in_natural_earth(tmp_path_factory.mktemp('cartopy')) as data_dir:
+        yield data_dir
+
+
+@pytest.fixture
+def figure_templates():
+    """The shared figure templates, which are cleared after the test."""
+    from padme.plotters.matplotlib_base import figure_templates as templates
+    yield templates
+    templates.clear()
+    templates.enabled = False
+
+
+@pytest.fixture
+def ioda_file(tmp_path):
+    """A small synthetic IODA file, with a single variable."""
+    netCDF4 = pytest.importorskip('netCDF4')
+    rng = numpy.random.default_rng(0)
+    filename = str(tmp_path / 'obs.nc')
+    with netCDF4.Dataset(filename, 'w') as nc:
+        nc.createDimension('Location', 1000)
+        g = nc.createGroup('MetaData')
+        g.createVariable('latitude', 'f4', ('Location',))[:] = rng.uniform(-90, 90, 1000)
+        g.createVariable('longitude', 'f4', ('Location',))[:] = rng.uniform(0, 360, 1000)
+        for group in ('ObsValue', 'hofx'):
+            nc.createGroup(group).createVariable(
+                'airTemperature', 'f4', ('Location',))[:] = rng.normal(250, 10, 1000)
+    return filename
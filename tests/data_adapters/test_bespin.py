@@ -1,7 +1,10 @@
 import pytest
 import pathlib
 
+from click.testing import CliRunner
+
 import padme
+from padme.bin.padme import cli
 
 
 FILES_ROOT=pathlib.PurePath(__file__).parent.parent / 'bespin_files'
@@ -21,4 +24,33 @@ def filename(request):
 
 def test_data_adapter_init(filename):
     da = padme.DataAdapter(adapter_name='bespin', filename=filename)
-    # TODO do some meaningful error checking here
\ No newline at end of file
+    # TODO do some meaningful error checking here
+
+
+def test_data_adapter_chunks(filename):
+    pytest.importorskip('bespin')
+    pytest.importorskip('dask')
+    da = padme.DataAdapter(adapter_name='bespin', filename=filename)
+    da_lazy = padme.DataAdapter(adapter_name='bespin', filename=filename, chunks='auto')
+
+    assert da.equivalent(da_lazy)
+    for v in da.variables:
+        assert da_lazy.datasets['EXP1'].data_vars[v].chunks is not None
+        assert da.variables[v].equals(da_lazy.variables[v].compute())
+
+
+def test_autoplot_chunks(tmp_path):
+    pytest.importorskip('bespin')
+    pytest.importorskip('dask')
+    output = str(tmp_path / 'out')
+    result = CliRunner().invoke(cli, ['autoplot', '-o', output, files[2]])
+    assert result.exit_code == 0, result.output
+    result = CliRunner().invoke(
+        cli, ['autoplot', '-o', output + '_lazy', '--chunks', 'auto', files[2]])
+    assert result.exit_code == 0, result.output
+
+    # the same plots are made when reading lazily
+    plots = sorted(f.name.split('.', 1)[1] for f in tmp_path.glob('out.*'))
+    lazy_plots = sorted(f.name.split('.', 1)[1] for f in tmp_path.glob('out_lazy.*'))
+    assert plots
+    assert plots == lazy_plots
@@ -5,6 +5,7 @@ import padme
 da_types=(
     'bespin',
     'ioda',
+    'timeseries',
     'var_log')
 
 
@@ -15,3 +16,97 @@ def data_adapter_name(request):
 
 def test_data_adapter_types():
     assert padme.DataAdapter.types == set(da_types)
+
+
+def read_file(filename):
+    with open(filename) as f:
+        return f.read()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """An enabled DataAdapter cache, and a counting data adapter."""
+    import numpy
+    import xarray
+
+    calls = []
+    def adapter(filename, select=None, variables=None):
+        calls.append(filename)
+        loaded = padme.DataAdapter.cache.load(filename, read_file)
+        return padme.Data('EXP1',
+            data=xarray.Dataset({v: (('x',), numpy.full(3, len(loaded)))
+                                 for v in ('var1', 'var2')}),
+            coords=[xarray.DataArray([1.0, 2.0, 3.0], name='x', dims=('x',))])
+    monkeypatch.setitem(padme.DataAdapter._adapters, 'counting', adapter)
+    monkeypatch.setattr(padme.DataAdapter, 'cache', padme.core.data_adapter.DataCache(maxsize=2))
+    padme.DataAdapter.cache.enabled = True
+    return padme.DataAdapter.cache, calls
+
+
+def test_data_adapter_cache(cache, tmp_path):
+    cache, calls = cache
+    filename = tmp_path / 'file.txt'
+    filename.write_text('abc')
+
+    d1 = padme.DataAdapter('counting', filename=str(filename), variables={'a': [1, 2]})
+    d1.remove_variable('var1')
+    d2 = padme.DataAdapter('counting', str(filename), variables={'a': (1, 2)})
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # the cached data is a copy
+    assert d2 is not d1
+    assert list(d2.variables.keys()) == ['var1', 'var2']
+
+    # different arguments are a different entry, but share the loaded file
+    padme.DataAdapter('counting', filename=str(filename), select={'x': 1})
+    assert len(calls) == 2
+    assert len(cache._files) == 1
+
+    # least recently used entries are evicted
+    padme.DataAdapter('counting', filename=str(filename), select={'x': 2})
+    padme.DataAdapter('counting', filename=str(filename), select={'x': 1})
+    assert len(calls) == 3
+    padme.DataAdapter('counting', filename=str(filename), variables={'a': (1, 2)})
+    assert len(calls) == 4
+
+    # a modified file is read again
+    filename.write_text('abcdef')
+    d4 = padme.DataAdapter('counting', filename=str(filename), select={'x': 1})
+    assert len(calls) == 5
+    assert float(d4.datasets['EXP1']['var1'][0]) == 6
+
+    # nothing is cached when disabled
+    cache.enabled = False
+    padme.DataAdapter('counting', filename=str(filename), select={'x': 1})
+    assert len(calls) == 6
+
+
+def test_data_adapter_load_many(tmp_path, monkeypatch):
+    import datetime
+    import numpy
+    import xarray
+
+    # a data adapter for a cycle file that contains its window start
+    def adapter(filename, name='EXP1'):
+        start = datetime.datetime.fromisoformat(read_file(filename))
+        return padme.Data(name,
+            data=xarray.Dataset(
+                {'var1': (('x',), numpy.full(3, start.hour))},
+                attrs={'window_start': start.isoformat(),
+                       'window_end': (start + datetime.timedelta(hours=6)).isoformat()}),
+            coords=[xarray.DataArray([1.0, 2.0, 3.0], name='x', dims=('x',))])
+    monkeypatch.setitem(padme.DataAdapter._adapters, 'cycle', adapter)
+
+    filenames = []
+    for i in range(20):
+        filename = tmp_path / f'cycle.{i}.txt'
+        start = datetime.datetime(2022, 1, 1) + datetime.timedelta(hours=6*i)
+        filename.write_text(start.isoformat())
+        filenames.append(str(filename))
+
+    data = padme.DataAdapter.load_many('cycle', reversed(filenames), max_workers=4)
+    assert list(data.dimensions.keys()) == ['time', 'x']
+    assert data.dimensions['time'][0] == numpy.datetime64('2022-01-01T03:00:00')
+    numpy.testing.assert_array_equal(
+        data.datasets['EXP1']['var1'][:, 0], [(6*i) % 24 for i in range(20)])
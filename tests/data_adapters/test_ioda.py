@@ -0,0 +1,179 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import datetime
+import numpy
+import pytest
+
+import padme
+
+NLOCS = 5000
+CHANNELS = numpy.array([7, 8, 9])
+FILL = -3.3687953e+38
+
+
+@pytest.fixture(scope='module')
+def ioda_file(tmp_path_factory):
+    """A synthetic IODA obs-space file, with one single and one multichannel
+    variable."""
+    netCDF4 = pytest.importorskip('netCDF4')
+    rng = numpy.random.default_rng(0)
+    filename = str(tmp_path_factory.mktemp('ioda') / 'obs.nc')
+
+    obs = {
+        'latitude': rng.uniform(-90.0, 90.0, NLOCS),
+        'longitude': rng.uniform(-180.0, 180.0, NLOCS),
+        'dateTime': rng.integers(1640995200-10800, 1640995200+10800, NLOCS),
+        'airTemperature': rng.normal(250.0, 10.0, NLOCS),
+        'hofx': rng.normal(250.0, 10.0, NLOCS),
+        'qc': rng.integers(0, 3, NLOCS),
+        'brightnessTemperature': rng.normal(200.0, 5.0, (NLOCS, len(CHANNELS))),
+    }
+    obs['airTemperature'][:10] = FILL
+
+    with netCDF4.Dataset(filename, 'w') as nc:
+        nc.createDimension('Location', NLOCS)
+        nc.createDimension('Channel', len(CHANNELS))
+        nc.createVariable('Channel', 'i4', ('Channel',))[:] = CHANNELS
+        g = nc.createGroup('MetaData')
+        g.createVariable('latitude', 'f4', ('Location',))[:] = obs['latitude']
+        g.createVariable('longitude', 'f4', ('Location',))[:] = obs['longitude']
+        t = g.createVariable('dateTime', 'i8', ('Location',))
+        t.units = 'seconds since 1970-01-01T00:00:00Z'
+        t[:] = obs['dateTime']
+        for group, values in (
+                ('ObsValue', obs['airTemperature']),
+                ('hofx', obs['hofx']),
+                ('EffectiveQC', obs['qc'])):
+            g = nc.createGroup(group)
+            v = g.createVariable('airTemperature', 'f4', ('Location',), fill_value=FILL)
+            v[:] = values
+        for group in ('ObsValue', 'hofx'):
+            v = nc[group].createVariable(
+                'brightnessTemperature', 'f4', ('Location', 'Channel'), fill_value=FILL)
+            v[:] = obs['brightnessTemperature'] - (2.0 if group == 'hofx' else 0.0)
+
+    # values as read back from the file
+    for k in ('latitude', 'longitude', 'airTemperature', 'hofx', 'brightnessTemperature'):
+        obs[k] = obs[k].astype(numpy.float32).astype(float)
+    return filename, obs
+
+
+def test_ioda_adapter_lat(ioda_file):
+    filename, obs = ioda_file
+    edges = numpy.linspace(-90.0, 90.0, 7)
+    data = padme.DataAdapter('ioda', filename=filename, bins={'latitude': edges},
+        variables={'variable': ('airTemperature',)})
+
+    assert list(data.dimensions.keys()) == ['latitude']
+    assert set(data.variables.keys()) == {'airTemperature.count'} | {
+        f'airTemperature.{d}.{s}'
+        for d in ('ObsValue', 'hofx', 'OmB') for s in ('mean', 'stddev', 'rmsd')}
+    assert data.datetime == tuple(
+        datetime.datetime.fromtimestamp(t, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        for t in (obs['dateTime'].min(), obs['dateTime'].max()))
+
+    # compare with binning all the valid observations at once
+    ds = data.datasets['EXP1']
+    valid = (obs['qc'] == 0) & (obs['airTemperature'] > -1e30)
+    bins = numpy.digitize(obs['latitude'], edges) - 1
+    omb = obs['airTemperature'] - obs['hofx']
+    for b in range(len(edges) - 1):
+        x = omb[valid & (bins == b)]
+        assert ds['airTemperature.count'][b] == len(x)
+        numpy.testing.assert_allclose(ds['airTemperature.OmB.mean'][b], x.mean())
+        numpy.testing.assert_allclose(ds['airTemperature.OmB.stddev'][b], x.std())
+        numpy.testing.assert_allclose(
+            ds['airTemperature.OmB.rmsd'][b], numpy.sqrt((x**2).mean()))
+
+
+def test_ioda_adapter_chunked(ioda_file):
+    filename, obs = ioda_file
+
+    # the results don't depend on how many observations are read at a time
+    data = padme.DataAdapter('ioda', filename=filename)
+    data_chunked = padme.DataAdapter('ioda', filename=filename, chunk_size=333)
+    assert set(data.dimensions.keys()) == {'latitude', 'longitude', 'sensor_channel'}
+    numpy.testing.assert_array_equal(data.dimensions['sensor_channel'], CHANNELS)
+    for v in data.variables:
+        numpy.testing.assert_allclose(
+            data.datasets['EXP1'][v], data_chunked.datasets['EXP1'][v])
+
+    ds = data.datasets['EXP1']
+    assert ds['brightnessTemperature.count'].dims == (
+        'latitude', 'longitude', 'sensor_channel')
+    assert ds['airTemperature.count'].dims == ('latitude', 'longitude')
+    assert float(ds['brightnessTemperature.count'].sum()) == NLOCS * len(CHANNELS)
+    has_obs = ds['brightnessTemperature.count'].values > 0
+    numpy.testing.assert_allclose(
+        ds['brightnessTemperature.OmB.mean'].values[has_obs], 2.0, rtol=1e-4)
+    assert numpy.isnan(ds['brightnessTemperature.OmB.mean'].values[~has_obs]).all()
+
+
+def test_ioda_adapter_no_qc(ioda_file):
+    filename, obs = ioda_file
+    data = padme.DataAdapter('ioda', filename=filename, qc=False, bins={},
+        variables={'variable': ('airTemperature',), 'statistic': ('count', 'mean')})
+    assert len(data.dimensions) == 0
+    assert set(data.variables.keys()) == {'airTemperature.count'} | {
+        f'airTemperature.{d}.mean' for d in ('ObsValue', 'hofx', 'OmB')}
+    assert float(data.datasets['EXP1']['airTemperature.count']) == NLOCS - 10
+
+    with pytest.raises(ValueError):
+        padme.DataAdapter('ioda', filename=filename, bins={'height': 10})
+
+
+def test_ioda_adapter_channels(tmp_path):
+    netCDF4 = pytest.importorskip('netCDF4')
+    rng = numpy.random.default_rng(0)
+    filename = str(tmp_path / 'obs.nc')
+    with netCDF4.Dataset(filename, 'w') as nc:
+        nc.createDimension('Location', 100)
+        for dim, channels in (('Channel', [7, 8, 9]), ('Channel2', [9, 8, 7])):
+            nc.createDimension(dim, len(channels))
+            nc.createVariable(dim, 'i4', (dim,))[:] = channels
+        g = nc.createGroup('MetaData')
+        g.createVariable('latitude', 'f4', ('Location',))[:] = rng.uniform(-90, 90, 100)
+        g.createVariable('longitude', 'f4', ('Location',))[:] = rng.uniform(0, 360, 100)
+        g = nc.createGroup('ObsValue')
+        for v, dim in (('brightnessTemperature', 'Channel'), ('radiance', 'Channel2')):
+            g.createVariable(v, 'f4', ('Location', dim))[:] = rng.normal(size=(100, 3))
+
+    # variables with the same channels in a different order can't share them
+    with pytest.raises(ValueError):
+        padme.DataAdapter('ioda', filename=filename)
+    data = padme.DataAdapter('ioda', filename=filename,
+        variables={'variable': ('radiance',)})
+    numpy.testing.assert_array_equal(data.dimensions['sensor_channel'], [9, 8, 7])
+
+    # without dateTime the file can be plotted, but has no time window
+    assert data.datetime == ('', '')
+    with pytest.raises(ValueError, match='no time window'):
+        padme.Data.concat([data])
+
+
+def test_ioda_adapter_missing_hofx(tmp_path):
+    netCDF4 = pytest.importorskip('netCDF4')
+    rng = numpy.random.default_rng(0)
+    filename = str(tmp_path / 'obs.nc')
+    with netCDF4.Dataset(filename, 'w') as nc:
+        nc.createDimension('Location', 100)
+        g = nc.createGroup('MetaData')
+        g.createVariable('latitude', 'f4', ('Location',))[:] = rng.uniform(-90, 90, 100)
+        g.createVariable('longitude', 'f4', ('Location',))[:] = rng.uniform(0, 360, 100)
+        g = nc.createGroup('ObsValue')
+        for v in ('airTemperature', 'specificHumidity'):
+            g.createVariable(v, 'f4', ('Location',))[:] = rng.normal(size=100)
+        g = nc.createGroup('hofx')
+        g.createVariable('airTemperature', 'f4', ('Location',))[:] = rng.normal(size=100)
+
+    # only the ObsValue is binned for a variable without a hofx
+    data = padme.DataAdapter('ioda', filename=filename, bins={},
+        variables={'statistic': ('count', 'mean')})
+    assert set(data.variables.keys()) == {
+        'airTemperature.count', 'specificHumidity.count',
+        'specificHumidity.ObsValue.mean'} | {
+        f'airTemperature.{d}.mean' for d in ('ObsValue', 'hofx', 'OmB')}
+    assert float(data.datasets['EXP1']['specificHumidity.count']) == 100
@@ -0,0 +1,125 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import numpy
+import pytest
+import xarray
+from click.testing import CliRunner
+
+import padme
+from padme.bin.padme import cli
+from padme.data_adapters.timeseries import TimeSeriesStore, reduce_statistics
+
+pytest.importorskip('netCDF4')
+
+
+def cycle(i: int, name: str = 'EXP1', extra: bool = False) -> padme.Data:
+    """Global statistics for the i'th 6 hourly cycle."""
+    start = numpy.datetime64('2022-01-01T00:00:00') + numpy.timedelta64(6*i, 'h')
+    data_vars = {
+        'airTemperature.count': ((), 100.0 + i),
+        'airTemperature.OmB.mean': ((), float(i)),
+    }
+    if extra:
+        data_vars['airTemperature.OmB.stddev'] = ((), 2.0 * i)
+    return padme.Data(name, coords=[], data=xarray.Dataset(data_vars, attrs={
+        'window_start': f'{start}Z',
+        'window_end': f'{start + numpy.timedelta64(6, "h")}Z'}))
+
+
+def test_reduce_statistics(ioda_file):
+    # reducing the binned statistics is the same as not binning them
+    binned = padme.DataAdapter('ioda', filename=ioda_file, bins={'latitude': 18})
+    expected = padme.DataAdapter('ioda', filename=ioda_file, bins={})
+    xarray.testing.assert_allclose(
+        reduce_statistics(binned.datasets['EXP1']), expected.datasets['EXP1'])
+
+    with pytest.raises(ValueError):
+        reduce_statistics(xarray.Dataset({'J': (('x',), numpy.zeros(3))}))
+
+
+def test_timeseries_store(tmp_path):
+    filename = str(tmp_path / 'store.nc')
+    store = TimeSeriesStore(filename)
+    assert store.experiments == ()
+    for i in range(10):
+        assert store.append(cycle(i, extra=i >= 5))
+    # cycles already in the store are skipped
+    assert not store.append(cycle(9))
+    assert not store.append(cycle(3))
+    assert store.extend([cycle(5), cycle(10), cycle(10)]) == [False, True, False]
+    # nothing is written if a new cycle is out of order
+    with pytest.raises(ValueError):
+        store.extend([cycle(11), cycle(-1)])
+    assert store.experiments == ('EXP1',)
+
+    data = padme.DataAdapter('timeseries', filename=filename)
+    assert list(data.dimensions.keys()) == ['time']
+    assert data.datetime == ('2022-01-01T00:00:00Z', '2022-01-03T18:00:00Z')
+    ds = data.datasets['EXP1']
+    numpy.testing.assert_array_equal(ds['airTemperature.OmB.mean'], numpy.arange(11))
+    numpy.testing.assert_array_equal(ds['airTemperature.count'], 100 + numpy.arange(11))
+    # a variable added later is missing from the earlier cycles
+    numpy.testing.assert_array_equal(
+        ds['airTemperature.OmB.stddev'], [numpy.nan]*5 + [10, 12, 14, 16, 18, numpy.nan])
+
+    # a time range, and some of the variables
+    data = padme.DataAdapter('timeseries', filename=filename,
+        start='2022-01-01T12:00:00Z', end='2022-01-02T06:00:00Z',
+        variables={'statistic': 'mean'}, name='a')
+    assert list(data.variables.keys()) == ['airTemperature.OmB.mean']
+    numpy.testing.assert_array_equal(
+        data.datasets['a']['airTemperature.OmB.mean'], [2, 3, 4, 5])
+    with pytest.raises(ValueError):
+        padme.DataAdapter('timeseries', filename=filename, start='2023-01-01T00:00:00Z')
+
+    # the experiment is needed when there are more than one
+    store.append(cycle(0, name='EXP2'))
+    with pytest.raises(ValueError):
+        padme.DataAdapter('timeseries', filename=filename)
+    data = padme.DataAdapter('timeseries', filename=filename, experiment='EXP2')
+    assert len(data.dimensions['time']) == 1
+
+
+def test_ingest(tmp_path):
+    netCDF4 = pytest.importorskip('netCDF4')
+    rng = numpy.random.default_rng(0)
+    files = []
+    for i in range(3):
+        filename = str(tmp_path / f'obs.{i}.nc')
+        with netCDF4.Dataset(filename, 'w') as nc:
+            nc.createDimension('Location', 100)
+            g = nc.createGroup('MetaData')
+            g.createVariable('latitude', 'f4', ('Location',))[:] = rng.uniform(-90, 90, 100)
+            g.createVariable('longitude', 'f4', ('Location',))[:] = rng.uniform(0, 360, 100)
+            t = g.createVariable('dateTime', 'i8', ('Location',))
+            t.units = 'seconds since 2022-01-01T00:00:00Z'
+            t[:] = rng.integers(0, 6*3600, 100) + i*6*3600
+            for group in ('ObsValue', 'hofx'):
+                nc.createGroup(group).createVariable(
+                    'airTemperature', 'f4', ('Location',))[:] = rng.normal(250, 10, 100)
+        files.append(filename)
+
+    # ingesting overlapping lists of files only adds the new cycles
+    store = str(tmp_path / 'store.nc')
+    result = CliRunner().invoke(cli, ['ingest', store, files[1], files[0], '-f', 'ioda'])
+    assert result.exit_code == 0, result.output
+    for _ in range(2):
+        result = CliRunner().invoke(cli, ['ingest', store, *files, '-f', 'ioda'])
+        assert result.exit_code == 0, result.output
+    assert result.output.count('Skipped') == 3
+    data = padme.DataAdapter('timeseries', filename=store)
+    assert len(data.dimensions['time']) == 3
+    assert float(data.datasets['EXP1']['airTemperature.count'].sum()) == 300
+
+    # a new cycle before the last one is an error, and nothing is written
+    store = str(tmp_path / 'store2.nc')
+    result = CliRunner().invoke(cli, ['ingest', store, files[1], '-f', 'ioda'])
+    assert result.exit_code == 0, result.output
+    result = CliRunner().invoke(cli, ['ingest', store, *files, '-f', 'ioda'])
+    assert result.exit_code == 1
+    assert 'before the last cycle' in result.output
+    data = padme.DataAdapter('timeseries', filename=store)
+    assert len(data.dimensions['time']) == 1
@@ -0,0 +1,102 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import numpy
+import pytest
+import xarray
+
+import padme
+from padme.data_adapters.var_log import VarLogParser
+
+
+def iteration_log(it: int, j: float) -> str:
+    return (
+        f'DRPCG end of iteration {it}\n'
+        f'  Gradient reduction ({it:3d}) = {0.5**it:.8e}\n'
+        f'  Norm reduction ({it:3d}) = {0.4**it:.8e}\n'
+        f'  Quadratic cost function: J   ({it:3d}) = {j:.8e}\n'
+        f'  Quadratic cost function: Jb  ({it:3d}) = {j/10:.8e}\n'
+        f'  Quadratic cost function: JoJc({it:3d}) = {j*0.9:.8e}\n'
+        f'OOPS_STATS some other line (  {it}) = 12\n')
+
+
+def outer_loop_log(niter: int, j0: float) -> str:
+    return (
+        'CostFunction: Nonlinear J = 1.0e+05\n'
+        + ''.join(iteration_log(i+1, j0 - i) for i in range(niter)))
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    filename = tmp_path / 'var.log'
+    filename.write_text(outer_loop_log(3, 100.0) + outer_loop_log(2, 50.0))
+    return str(filename)
+
+
+def test_var_log_adapter(log_file):
+    data = padme.DataAdapter('var_log', filename=log_file)
+    assert list(data.dimensions.keys()) == ['iteration']
+    assert set(data.variables.keys()) == {
+        'J', 'Jb', 'Jo', 'gradient_reduction', 'norm_reduction'}
+
+    ds = data.datasets['EXP1']
+    numpy.testing.assert_allclose(ds['J'], [100.0, 99.0, 98.0, 50.0, 49.0])
+    numpy.testing.assert_allclose(ds['Jb'], ds['J']/10)
+    numpy.testing.assert_allclose(ds['Jo'], ds['J']*0.9)
+    numpy.testing.assert_allclose(
+        ds['gradient_reduction'], 0.5**numpy.array([1, 2, 3, 1, 2]))
+    numpy.testing.assert_array_equal(ds['outer_loop'], [1, 1, 1, 2, 2])
+
+
+def test_var_log_single_iteration(tmp_path):
+    # outer loops with a single inner iteration each
+    filename = tmp_path / 'var.log'
+    filename.write_text(outer_loop_log(1, 10.0) * 3)
+    data = padme.DataAdapter('var_log', filename=str(filename))
+    numpy.testing.assert_array_equal(
+        data.datasets['EXP1']['outer_loop'], [1, 2, 3])
+
+
+def test_var_log_whitespace(tmp_path):
+    # any whitespace, or none, between the parts of a line
+    filename = tmp_path / 'var.log'
+    filename.write_text(
+        '\tQuadratic cost function:J(1) = 3.0\n'
+        'Quadratic cost function:\tJb (1)=1.0\n'
+        'Quadratic cost function:JoJc  (  1) = 2.0\n')
+    ds = padme.DataAdapter('var_log', filename=str(filename)).datasets['EXP1']
+    numpy.testing.assert_array_equal([ds[v] for v in ('J', 'Jb', 'Jo')], [[3.0], [1.0], [2.0]])
+
+
+def test_var_log_parser_incremental(tmp_path, log_file):
+    text = open(log_file).read()
+    filename = tmp_path / 'growing.log'
+    filename.write_text('')
+    parser = VarLogParser(str(filename), block_size=64)
+    assert not parser.update()
+
+    # the log is parsed correctly regardless of where the writes stop
+    with open(filename, 'a') as f:
+        for i in range(0, len(text), 97):
+            f.write(text[i:i+97])
+            f.flush()
+            parser.update()
+    assert not parser.update()
+    assert parser.niter == 5
+    expected = padme.DataAdapter('var_log', filename=log_file).datasets['EXP1']
+    xarray.testing.assert_identical(parser.data().datasets['EXP1'], expected)
+
+    # only the new lines are parsed
+    offset = parser._offset
+    with open(filename, 'a') as f:
+        f.write(iteration_log(3, 48.0))
+    assert parser.update()
+    assert parser.niter == 6
+    assert parser._offset == offset + len(iteration_log(3, 48.0))
+
+    # a truncated log is parsed again from the start
+    filename.write_text(outer_loop_log(2, 10.0))
+    assert parser.update()
+    assert parser.niter == 2
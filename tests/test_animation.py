@@ -0,0 +1,112 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.animation
+import matplotlib.pyplot as plt
+
+import numpy
+import os
+import pytest
+import xarray
+
+import padme
+from padme.core import timing
+
+NFRAMES = 5
+
+
+def make_data(frame_dim='time', nframes=NFRAMES):
+    lat = xarray.DataArray(numpy.linspace(-90.0, 90.0, 19), name='latitude', dims=('latitude',))
+    lon = xarray.DataArray(numpy.linspace(0.0, 360.0, 37), name='longitude', dims=('longitude',))
+    frames = xarray.DataArray(numpy.arange(nframes), name=frame_dim, dims=(frame_dim,))
+    rng = numpy.random.default_rng(0)
+    raw_data = xarray.Dataset(
+        data_vars={'var1': ((frame_dim, 'latitude', 'longitude'), rng.random((nframes, 18, 36)))},
+        attrs={'window_start': '2022-01-01T00:00:00Z',
+               'window_end': '2022-01-02T06:00:00Z'})
+    return padme.Data('exp1', data=raw_data, coords=[frames], coord_edges=[lat, lon])
+
+
+@pytest.mark.parametrize('frame_dim', ('time', 'sensor_channel'))
+def test_animation(frame_dim, natural_earth, figure_templates, tmp_path, monkeypatch):
+    PIL = pytest.importorskip('PIL.Image')
+    data = make_data(frame_dim)
+    plotter = padme.Plotter(data)
+    assert isinstance(plotter, padme.plotters.two_dimensional.LatLonAnimation)
+    assert plotter.frame_dim == frame_dim
+
+    # the values are only read one frame at a time
+    frame = plotter.frame
+    shapes = []
+    def counting_frame(d, i):
+        shapes.append(frame(d, i).shape)
+        return frame(d, i)
+    monkeypatch.setattr(plotter, 'frame', counting_frame)
+
+    # the figure is only drawn once, for all the frames
+    filename = str(tmp_path / 'anim.gif')
+    with timing.StageTimer() as timer:
+        plotter.plot(data, filename)
+    stages = [s for s, _ in timer.records]
+    assert stages.count('pcolormesh') == 1
+    assert stages.count('coastlines') == 1
+    assert len(plt.get_fignums()) == 0
+    # once for the color range, once for the first frame, and once to write each
+    assert shapes == [(18, 36)] * (2*NFRAMES + 1)
+
+    # each frame has its own values
+    frames = []
+    with PIL.open(filename) as image:
+        assert image.n_frames == NFRAMES
+        for i in range(NFRAMES):
+            image.seek(i)
+            frames.append(numpy.asarray(image.convert('RGB')))
+    for f in frames[1:]:
+        assert (f != frames[0]).any()
+
+
+def _pipe_writer_found():
+    return any(matplotlib.animation.writers.is_available(w) for w in ('ffmpeg', 'imagemagick'))
+
+
+def _resident_memory():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+@pytest.mark.skipif(not _pipe_writer_found(), reason='requires ffmpeg or imagemagick')
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='requires /proc')
+def test_animation_streamed(natural_earth, tmp_path):
+    data = make_data(nframes=16)
+    plotter = padme.Plotter(data)
+    writer = plotter._writer()
+    assert isinstance(writer, matplotlib.animation.MovieWriter)
+
+    # the memory in use after each frame is written
+    memory = []
+    grab_frame = writer.grab_frame
+    def measured_grab_frame(**kwargs):
+        grab_frame(**kwargs)
+        memory.append(_resident_memory())
+    writer.grab_frame = measured_grab_frame
+    plotter._writer = lambda: writer
+    plotter.plot(data, str(tmp_path / 'anim.gif'))
+
+    # the frames are piped to the encoder, not kept, so the memory does not
+    # grow with the number of frames (a kept frame is the size of the figure)
+    p = plotter.parameters
+    frame_size = p['fig_width'] * p['fig_height'] * plt.rcParams['figure.dpi']**2 * 4
+    assert len(memory) == 16
+    assert memory[-1] - memory[3] < 4 * frame_size
+
+
+def test_animation_writer_fallback(monkeypatch):
+    # without an external encoder, the frames have to be kept by pillow
+    monkeypatch.setattr(matplotlib.animation.writers, 'is_available', lambda name: name == 'pillow')
+    plotter = padme.Plotter(make_data())
+    with pytest.warns(UserWarning, match='every frame in memory'):
+        assert isinstance(plotter._writer(), matplotlib.animation.PillowWriter)
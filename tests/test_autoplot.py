@@ -0,0 +1,224 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy
+import pytest
+import xarray
+
+import padme
+from padme.bin import autoplot
+
+
+@pytest.fixture
+def data():
+    lat = xarray.DataArray(
+        **{k:'latitude' for k in ('name','dims')},
+        data=numpy.linspace(-90.0, 90.0, 7))
+    dims = ('latitude',)
+    raw_data = xarray.Dataset(
+        data_vars={
+            'air_temperature.count': (dims, numpy.full(6, 10.0)),
+            'air_temperature.ObsValue.mean': (dims, numpy.random.rand(6)),
+            'air_temperature.OmB.mean': (dims, numpy.random.rand(6)),
+            'air_temperature.OmB.stddev': (dims, numpy.random.rand(6)),
+        },
+        attrs={'window_start': '2022-01-01T00:00:00Z',
+               'window_end': '2022-01-01T06:00:00Z'})
+    return padme.Data('exp1', data=raw_data, coord_edges=[lat])
+
+
+def test_plot_tasks(data, tmp_path):
+    tasks = list(autoplot.plot_tasks(data, str(tmp_path / 'out'), {}))
+
+    # one task per non-count diagnostic, each with only its own variable
+    assert [t[1] for t in tasks] == [
+        str(tmp_path / f'out.air_temperature.{d}.jpg')
+        for d in ('ObsValue.mean', 'OmB.mean', 'OmB.stddev')]
+    for t in tasks:
+        assert t[0].nvars == 1
+
+
+def test_plot_all_parallel(data, tmp_path):
+    autoplot.plot_all(data, str(tmp_path / 'serial'), {})
+    autoplot.plot_all(data, str(tmp_path / 'parallel'), {}, jobs=2)
+
+    serial = sorted(f.name.split('.', 1)[1] for f in tmp_path.glob('serial.*'))
+    parallel = sorted(f.name.split('.', 1)[1] for f in tmp_path.glob('parallel.*'))
+    assert len(serial) == 3
+    assert serial == parallel
+
+
+def test_run_tasks_failures(data, tmp_path):
+    tasks = list(autoplot.plot_tasks(data, str(tmp_path / 'out'), {}))
+
+    # a task that will fail should not stop the other plots
+    tasks.insert(1, (tasks[0][0], str(tmp_path / 'bad_dir' / 'out.jpg'), {}, ('ObsValue', 'mean')))
+    with pytest.raises(RuntimeError):
+        autoplot.run_tasks(tasks, jobs=2)
+    assert len(list(tmp_path.glob('out.*'))) == 3
+
+
+@pytest.mark.parametrize('jobs', (1, 2))
+def test_run_tasks_profile(data, tmp_path, jobs):
+    tasks = autoplot.plot_tasks(data, str(tmp_path / 'out'), {})
+    results = autoplot.run_tasks(tasks, jobs=jobs, profile=True, cprofile=jobs > 1)
+
+    assert len(results) == 3
+    for r in results:
+        stages = [s for s, _ in r.timings]
+        for s in ('plotter_dispatch', 'pre_plot', 'process:BasicLine',
+                  'post_plot', 'tight_layout', 'save', 'savefig'):
+            assert s in stages
+        assert all(t >= 0.0 for _, t in r.timings)
+        assert (r.stats is not None) == (jobs > 1)
+
+
+def test_timing_report(tmp_path):
+    from padme.core import timing
+    import csv, json
+
+    with timing.StageTimer() as timer:
+        with timing.stage('outer'):
+            with timing.stage('inner'):
+                pass
+        with timing.stage('inner'):
+            pass
+    assert [s for s, _ in timer.records] == ['inner', 'outer', 'inner']
+    assert set(timer.totals().keys()) == {'inner', 'outer'}
+
+    # callbacks are no longer called once the timer is done
+    with timing.stage('other'):
+        pass
+    assert len(timer.records) == 3
+
+    rows = [{'file': 'a', 'stage': s, 'seconds': t} for s, t in timer.records]
+    timing.write_report(str(tmp_path / 'report.json'), rows)
+    assert json.load(open(tmp_path / 'report.json')) == rows
+    timing.write_report(str(tmp_path / 'report.csv'), rows)
+    assert [r['stage'] for r in csv.DictReader(open(tmp_path / 'report.csv'))] == [
+        'inner', 'outer', 'inner']
+
+
+def test_experiment_tasks(data, tmp_path):
+    data2 = padme.Data('exp2', data=data.datasets['exp1']*2,
+                       coord_edges=data.dimension_edges.values())
+    diff = padme.Data.merge((data, data2)) - data
+
+    tasks = [
+        t for exp, d in diff.iter_experiments()
+        for t in autoplot.experiment_tasks(d, str(tmp_path / f'out.{exp}'), {})]
+    assert len(tasks) == 6
+    assert tasks[0][1] == str(tmp_path / 'out.exp1.air_temperature.ObsValue.mean.jpg')
+    assert tasks[3][1] == str(tmp_path / 'out.exp2.air_temperature.ObsValue.mean.jpg')
+    for t in tasks:
+        assert list(t[0].datasets.keys()) in (['exp1'], ['exp2'])
+        assert t[0].diff_name == 'exp1'
+
+    autoplot.run_tasks(tasks)
+    assert len(list(tmp_path.glob('out.exp*.jpg'))) == 6
+
+
+def test_shared_color_ranges(data, tmp_path, natural_earth):
+    lat = xarray.DataArray(numpy.linspace(-90.0, 90.0, 7), name='latitude', dims=('latitude',))
+    lon = xarray.DataArray(numpy.linspace(0.0, 360.0, 13), name='longitude', dims=('longitude',))
+    dims = ('latitude', 'longitude')
+    rng = numpy.random.default_rng(0)
+    exps = [
+        padme.Data(f'exp{i}', coord_edges=[lat, lon], data=xarray.Dataset(
+            data_vars={
+                'air_temperature.count': (dims, numpy.full((6, 12), 10.0)),
+                'air_temperature.OmB.mean': (dims, rng.normal(scale=i+1, size=(6, 12))),
+                'air_temperature.OmB.stddev': (dims, rng.random((6, 12)) + i),
+            },
+            attrs={'window_start': '2022-01-01T00:00:00Z',
+                   'window_end': '2022-01-01T06:00:00Z'}))
+        for i in range(2)]
+    tasks = [
+        t for i, e in enumerate(exps)
+        for t in autoplot.experiment_tasks(e, str(tmp_path / f'exp{i}'), {'title': 'a'})]
+    tasks += autoplot.plot_tasks(data, str(tmp_path / 'line'), {})
+    tasks.append((exps[0].get_variables('air_temperature.OmB.mean'), 'fixed.jpg',
+                  {'mesh.vmin': -1.0, 'range_pct': 0.9}, ('OmB', 'mean')))
+    shared = autoplot.shared_color_ranges(tasks)
+    assert [t[1] for t in shared] == [t[1] for t in tasks]
+
+    # the color mesh plots of each diagnostic share the range of all their values
+    for diag in ('OmB.mean', 'OmB.stddev'):
+        values = numpy.concatenate([
+            e.datasets[f'exp{i}'][f'air_temperature.{diag}'].data.ravel()
+            for i, e in enumerate(exps)])
+        expected = numpy.nanpercentile(values, [0.5, 99.5])
+        params = [t[2] for t in shared if diag in t[1] and t[1].startswith(str(tmp_path / 'exp'))]
+        assert len(params) == 2
+        for p in params:
+            numpy.testing.assert_allclose((p['mesh.vmin'], p['mesh.vmax']), expected)
+            assert p['title'] == 'a'
+    # the 1D plots, and a plot alone in its group, are unchanged
+    for t, s in zip(tasks[4:], shared[4:]):
+        assert s[2] is t[2]
+
+    # the range is used by the plot, and only by that plot
+    plotter = padme.Plotter(shared[1][0], shared[1][2])
+    stats = padme.core.statistics.field_statistics(numpy.zeros(3))
+    vmin, vmax, _ = padme.plotters.two_dimensional.two_dimensional.ColorMesh.color_scale(
+        stats, shared[1][0], plotter)
+    assert (vmin, vmax) == (shared[1][2]['mesh.vmin'], shared[1][2]['mesh.vmax'])
+    assert numpy.isnan(padme.Plotter(shared[1][0]).parameters['mesh.vmin'])
+
+    autoplot.run_tasks(shared[:4])
+    assert len(list(tmp_path.glob('exp*.jpg'))) == 4
+
+
+def test_shared_color_ranges_diff(natural_earth):
+    lat = xarray.DataArray(numpy.linspace(-90.0, 90.0, 7), name='latitude', dims=('latitude',))
+    lon = xarray.DataArray(numpy.linspace(0.0, 360.0, 13), name='longitude', dims=('longitude',))
+    rng = numpy.random.default_rng(0)
+    raw_data = [
+        xarray.Dataset(
+            data_vars={'air_temperature.OmB.stddev': (
+                ('latitude', 'longitude'), rng.random((6, 12)) + 10*i)},
+            attrs={'window_start': '2022-01-01T00:00:00Z',
+                   'window_end': '2022-01-01T06:00:00Z'})
+        for i in range(2)]
+    exps = [padme.Data(f'exp{i}', data=d, coord_edges=[lat, lon])
+            for i, d in enumerate(raw_data)]
+    diag = ('OmB', 'stddev')
+
+    # a difference does not share the range of the values themselves
+    tasks = [(exps[0], 'raw.jpg', {}, diag), (exps[1] - exps[0], 'diff.jpg', {}, diag)]
+    for t, s in zip(tasks, autoplot.shared_color_ranges(tasks)):
+        assert s[2] is t[2]
+
+    # lazy values are read in once, by the shared range, and kept for the plot
+    pytest.importorskip('dask')
+    exps = [padme.Data(f'exp{i}', data=d.chunk(), coord_edges=[lat, lon])
+            for i, d in enumerate(raw_data)]
+    tasks = [(e.get_variables('air_temperature.OmB.stddev'), f'{i}.jpg', {}, diag)
+             for i, e in enumerate(exps)]
+    for s in autoplot.shared_color_ranges(tasks):
+        assert s[0].stacked['air_temperature.OmB.stddev'].chunks is None
+        assert 'mesh.vmin' in s[2]
+    for e in exps:
+        assert e.stacked['air_temperature.OmB.stddev'].chunks is not None
+
+def test_timeseries_tasks(data, tmp_path):
+    # cycles binned by latitude are plotted with a line for each bin
+    cycles = []
+    for i in range(3):
+        ds = data.datasets['exp1'] + i
+        ds.attrs = {'window_start': f'2022-01-01T{6*i:02d}:00:00Z',
+                    'window_end': f'2022-01-01T{6*i+6:02d}:00:00Z'}
+        cycles.append(padme.Data('exp1', data=ds, coord_edges=data.dimension_edges.values()))
+    ts = padme.Data.concat(cycles)
+
+    tasks = list(autoplot.experiment_tasks(ts, str(tmp_path / 'ts'), {}))
+    assert len(tasks) == 3
+    for t in tasks:
+        assert isinstance(padme.Plotter(t[0]), padme.plotters.one_dimensional.TimeSeries)
+    autoplot.run_tasks(tasks)
+    assert len(list(tmp_path.glob('ts.*.jpg'))) == 3
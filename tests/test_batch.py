@@ -0,0 +1,74 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import matplotlib
+matplotlib.use('Agg')
+
+from click.testing import CliRunner
+import pytest
+import yaml
+
+import padme
+from padme.bin import batch
+from padme.bin.padme import cli
+from padme.data_adapters import ioda
+
+
+def test_load_jobs(tmp_path):
+    filename = tmp_path / 'jobs.yaml'
+    filename.write_text(yaml.safe_dump({
+        'defaults': {'input': 'a.nc', 'domain': 'global'},
+        'plots': [
+            {'output': 'a.png'},
+            {'output': 'b.png', 'input': 'b.nc', 'params': {'title': 'b'}}]}))
+    assert batch.load_jobs(str(filename)) == [
+        {'input': 'a.nc', 'domain': 'global', 'output': 'a.png'},
+        {'input': 'b.nc', 'domain': 'global', 'output': 'b.png', 'params': {'title': 'b'}}]
+
+    # a plain list of plots
+    filename.write_text(yaml.safe_dump([{'input': 'a.nc', 'output': 'a.png'}]))
+    assert batch.load_jobs(str(filename)) == [{'input': 'a.nc', 'output': 'a.png'}]
+
+    filename.write_text(yaml.safe_dump([{'input': 'a.nc', 'output': 'a.png', 'foo': 1}]))
+    with pytest.raises(ValueError):
+        batch.load_jobs(str(filename))
+    filename.write_text(yaml.safe_dump([{'input': 'a.nc'}]))
+    with pytest.raises(ValueError):
+        batch.load_jobs(str(filename))
+
+
+def test_batch(ioda_file, tmp_path, natural_earth, figure_templates, monkeypatch):
+    # count how many times the file is read
+    calls = []
+    bin_file = ioda._bin_file
+    def counting_bin_file(*args, **kwargs):
+        calls.append(args)
+        return bin_file(*args, **kwargs)
+    monkeypatch.setattr(ioda, '_bin_file', counting_bin_file)
+    monkeypatch.setattr(padme.DataAdapter, 'cache', padme.core.data_adapter.DataCache())
+
+    jobs = tmp_path / 'jobs.yaml'
+    jobs.write_text(yaml.safe_dump({
+        'defaults': {'input': ioda_file, 'format': 'ioda'},
+        'plots': [
+            {'output': str(tmp_path / 'omb_mean.png'), 'diagnostic': 'OmB:mean'},
+            {'output': str(tmp_path / 'obs_stddev.png'), 'diagnostic': 'ObsValue:stddev',
+             'params': {'title': 'stddev'}},
+            {'output': str(tmp_path / 'hofx_mean.png'), 'diagnostic': 'hofx:mean',
+             'variable': 'airTemperature'},
+        ]}))
+
+    result = CliRunner().invoke(cli, ['batch', str(jobs)])
+    assert result.exit_code == 0, result.output
+    for f in ('omb_mean.png', 'obs_stddev.png', 'hofx_mean.png'):
+        assert (tmp_path / f).exists()
+
+    # the file is binned once for all variables, and once for just one
+    assert len(calls) == 2
+    # the shared caches are only used while the job is running
+    assert not padme.DataAdapter.cache._files
+    assert not padme.DataAdapter.cache.enabled
+    assert not figure_templates.enabled
+    assert not figure_templates._templates
@@ -61,6 +61,12 @@ def raw_data(dims):
 def data(coord_edges, raw_data):
     return padme.Data('exp1', data=raw_data, coord_edges=coord_edges)
 
+
+def new_exp(data: padme.Data, name: str, ds: xarray.Dataset) -> padme.Data:
+    """Create a Data object with the same coordinates as "data"."""
+    return padme.Data(name, data=ds,
+        coords=data.dimensions.values(), coord_edges=data.dimension_edges.values())
+
 #-------------------------------------------------------------------------------
 
 def test_data_coords(coord_edges, coord_centers):
@@ -96,6 +102,14 @@ def test_data_coords(coord_edges, coord_centers):
 
 def test_data_data(data: padme.Data):
     assert 'var1' in data.datasets['exp1']
+    assert data.experiments == ('exp1',)
+
+    # the experiments are stacked, and the datasets are views of that
+    stacked = data.stacked['var1']
+    assert stacked.dims[0] == padme.core.data.EXPERIMENT_DIM
+    assert list(stacked.coords[padme.core.data.EXPERIMENT_DIM].values) == ['exp1']
+    assert numpy.shares_memory(stacked.data, data.datasets['exp1']['var1'].data)
+    assert data.datasets is data.datasets
 
 def test_data_vars(data):
     assert data.variables.keys() == set( ('var1','var2') )
@@ -107,54 +121,157 @@ def test_data_vars(data):
         data.remove_variable('foo')
 
 
+def test_data_vars_cached(data):
+    # the variables mapping is reused until the variables change
+    v = data.variables
+    assert data.variables is v
+    assert v['var1'] is data.variables['var1']
+
+    # the per variable Datasets are views of the experiment data
+    assert numpy.shares_memory(
+        v['var1'].data_vars['exp1'].data,
+        data.datasets['exp1'].data_vars['var1'].data)
+
+    # removing a variable updates the mapping without rebuilding it
+    data.remove_variable('var1')
+    assert data.variables is v
+    assert 'var1' not in data.variables
+    assert list(data.variables) == ['var2']
+    assert v['var2'] is data.variables['var2']
+    with pytest.raises(KeyError):
+        data.variables['var1']
+
+    # the variable is only dropped from the datasets when they are needed
+    assert data.nvars == 1
+    assert 'var1' in data._stacked
+    assert 'var1' not in data.datasets['exp1']
+    assert data.nvars == 1
+    assert list(data.variables) == ['var2']
+
+
+def test_data_remove_variable_copies(data):
+    # removed variables stay removed in any copies
+    data.remove_variable('var1')
+    for d in (data.copy(), data._shallow_copy(), data.get_variables('var2'),
+              next(data.iter_dimension('latitude'))[1]):
+        assert list(d.variables) == ['var2']
+        assert d.nvars == 1
+        assert list(d.datasets['exp1'].data_vars) == ['var2']
+    assert data.equivalent(data.copy())
+
+    with pytest.raises(ValueError):
+        data.get_variables('var1')
+
+
 def test_data_copy(data: padme.Data):
     data2 = data.copy()
     assert data.equivalent(data2)
-    assert data._data['exp1'].data_vars['var1'].equals(
-        data2._data['exp1'].data_vars['var1'])
+    assert data.datasets['exp1'].data_vars['var1'].equals(
+        data2.datasets['exp1'].data_vars['var1'])
+
+    data.datasets['exp1'].data_vars['var1'].data[...] *= 2
+    assert not data.datasets['exp1'].data_vars['var1'].equals(
+        data2.datasets['exp1'].data_vars['var1'])
+
+
+def test_data_get_variables(data: padme.Data):
+    d2 = data.get_variables('var1')
+    assert d2.variables.keys() == set( ('var1',) )
+    assert data.variables.keys() == set( ('var1','var2') )
+
+    # the selected data shares the arrays of the original
+    assert numpy.shares_memory(
+        d2.datasets['exp1'].data_vars['var1'].data,
+        data.datasets['exp1'].data_vars['var1'].data)
+    assert d2.dimensions['latitude'] is data.dimensions['latitude']
+
+    # but removing variables does not affect the original
+    d2.remove_variable('var1')
+    assert d2.nvars == 0
+    assert data.nvars == 2
+
+    with pytest.raises(ValueError):
+        data.get_variables(('var1', 'foo'))
+
 
-    data._data['exp1'] *= 2
-    assert not data._data['exp1'].data_vars['var1'].equals(
-        data2._data['exp1'].data_vars['var1'])
+def test_data_iter_dimension(data: padme.Data):
+    slices = list(data.iter_dimension('latitude'))
+    assert len(slices) == len(data.dimensions['latitude'])
+
+    for i, (value, d) in enumerate(slices):
+        assert value == data.dimensions['latitude'].data[i]
+        assert 'latitude' not in d.dimensions
+        assert 'latitude' not in d.dimension_edges
+        assert len(d.dimensions) == len(data.dimensions) - 1
+        assert d.variables.keys() == data.variables.keys()
+
+        # each slice is a view of the original data
+        v = d.datasets['exp1'].data_vars['var1']
+        assert numpy.shares_memory(v.data, data.datasets['exp1'].data_vars['var1'].data)
+        xarray.testing.assert_equal(
+            v, data.datasets['exp1'].data_vars['var1'].isel(latitude=i))
+
+    with pytest.raises(ValueError):
+        next(data.iter_dimension('foo'))
 
 
 def test_data_equivalent(data: padme.Data):
     assert not data.equivalent('foo') # type: ignore
 
-    d2 = data.copy()
-    d2._data['exp2'] = d2._data.pop('exp1')
+    d2 = new_exp(data, 'exp2', data.datasets['exp1'])
     assert data.equivalent(d2)
 
-    d2._coords['lat2'] = d2._coords['latitude']
+    d2 = padme.Data('exp2', data=data.datasets['exp1'], coord_edges=[
+        *data.dimension_edges.values(),
+        data.dimension_edges['latitude'].rename('lat2').swap_dims(latitude='lat2')])
     assert not data.equivalent(d2)
 
-    d3 = data.copy()
-    d3._data['exp1'] = d3._data['exp1'].rename({'var1': 'var7'})
+    d3 = new_exp(data, 'exp1', data.datasets['exp1'].rename({'var1': 'var7'}))
     assert not data.equivalent(d3)
 
 
+def test_data_fingerprint(data: padme.Data):
+    fp = data.fingerprint
+    assert data.copy().fingerprint == fp
+    assert new_exp(data, 'exp2', data.datasets['exp1']*2).fingerprint == fp
+
+    # the variable names, and coordinate values, are part of the fingerprint
+    assert data.get_variables('var1').fingerprint != fp
+    edges = data.dimension_edges.copy()
+    edges['latitude'] = edges['latitude'] + 1.0
+    assert padme.Data('exp1', data=data.datasets['exp1'],
+                      coord_edges=edges.values()).fingerprint != fp
+
+    # and are updated when the variables change
+    d2 = data.copy()
+    d2.remove_variable('var1')
+    assert d2.fingerprint == data.get_variables('var2').fingerprint
+    assert next(d2.iter_dimension('latitude'))[1].fingerprint != d2.fingerprint
+
+
 def test_data_merge(data: padme.Data):
     d2 = data.copy()
     with pytest.raises(ValueError):
         padme.Data.merge( (data,d2) )
 
-    d2._data['exp2'] = d2._data.pop('exp1')
+    d2 = new_exp(data, 'exp2', data.datasets['exp1']*2)
     d2 = padme.Data.merge( (data, d2) )
+    assert d2.experiments == ('exp1', 'exp2')
+    assert d2.stacked.sizes[padme.core.data.EXPERIMENT_DIM] == 2
+    xarray.testing.assert_allclose(d2.datasets['exp2'], data.datasets['exp1']*2)
 
-    d2 = data.copy()
-    d2._data['exp2'] = d2._data.pop('exp1').rename({'var1':'var7'})
+    d2 = new_exp(data, 'exp2', data.datasets['exp1'].rename({'var1':'var7'}))
     with pytest.raises(ValueError):
         padme.Data.merge( (data, d2) )
 
 
 def test_data_diff(data: padme.Data):
-    d2 = data.copy()
-    d2._data['exp2'] = d2._data.pop('exp1')*3
+    d2 = new_exp(data, 'exp2', data.datasets['exp1']*3)
 
     # diff that should work
     diff = d2.diff(data)
     xarray.testing.assert_allclose(
-        diff._data['exp2'], data._data['exp1']*2)
+        diff.datasets['exp2'], data.datasets['exp1']*2)
     assert data.diff_name is None
     assert diff.diff_name == 'exp1'
 
@@ -163,14 +280,80 @@ def test_data_diff(data: padme.Data):
         diff.diff(data)
 
     # can't diff non-equivalent objects
-    d3 = d2.copy()
-    d3._data['exp2'] = d3._data['exp2'].rename({'var1':'var7'})
+    d3 = new_exp(data, 'exp2', d2.datasets['exp2'].rename({'var1':'var7'}))
     with pytest.raises(ValueError):
         data.diff(d3)
 
-    # cant diff if 'other' has more than 1 exp
-    d4 = d2.copy()
-    d4._data['exp3'] = d4._data['exp2']
+    # cant diff if 'other' has a different number of exps
+    d4 = padme.Data.merge((d2, new_exp(data, 'exp3', d2.datasets['exp2'])))
     with pytest.raises(ValueError):
         data.diff(d4)
 
+
+def test_data_diff_multiple(data: padme.Data):
+    exps = padme.Data.merge([data] + [
+        new_exp(data, f'exp{i}', data.datasets['exp1']*i) for i in (2, 3, 4)])
+
+    # N experiments minus a control
+    diff = exps.diff(data)
+    assert diff.diff_name == 'exp1'
+    assert list(diff.datasets.keys()) == ['exp1', 'exp2', 'exp3', 'exp4']
+    for i, (k, ds) in enumerate(diff.datasets.items()):
+        xarray.testing.assert_allclose(ds, data.datasets['exp1']*i)
+        assert set(ds.dims) == set(data.datasets['exp1'].dims)
+
+    # N experiments minus N experiments, pairwise
+    diff = exps.diff(exps.copy())
+    assert diff.diff_name == ('exp1', 'exp2', 'exp3', 'exp4')
+    for ds in diff.datasets.values():
+        assert float(abs(ds['var1']).max()) == 0.0
+
+    # the inputs are unchanged
+    xarray.testing.assert_allclose(exps.datasets['exp3'], data.datasets['exp1']*3)
+
+
+def test_data_iter_experiments(data: padme.Data):
+    merged = padme.Data.merge((data, new_exp(data, 'exp2', data.datasets['exp1']*2)))
+
+    exps = list(merged.iter_experiments())
+    assert [k for k, _ in exps] == ['exp1', 'exp2']
+    for k, d in exps:
+        assert list(d.datasets.keys()) == [k]
+        assert d.equivalent(data)
+        xarray.testing.assert_identical(d.datasets[k], merged.datasets[k])
+
+
+
+def test_data_concat(data: padme.Data):
+    def cycle(i, name='exp1'):
+        ds = data.datasets['exp1'] * i
+        ds.attrs = {'window_start': f'2022-01-01T{6*i:02d}:00:00Z',
+                    'window_end': f'2022-01-01T{6*i+6:02d}:00:00Z'}
+        return new_exp(data, name, ds)
+
+    # cycles are sorted by time
+    ts = padme.Data.concat([cycle(i) for i in (2, 0, 1)])
+    time = padme.core.data.TIME_DIM
+    assert list(ts.dimensions.keys()) == [time, *data.dimensions.keys()]
+    assert ts.stacked['var1'].dims == (
+        padme.core.data.EXPERIMENT_DIM, time, *data.stacked['var1'].dims[1:])
+    numpy.testing.assert_array_equal(
+        ts.dimensions[time], numpy.array(
+            ['2022-01-01T03', '2022-01-01T09', '2022-01-01T15'], dtype='datetime64[s]'))
+    assert len(ts.dimension_edges[time]) == 4
+    assert ts.datetime == ('2022-01-01T00:00:00Z', '2022-01-01T18:00:00Z')
+    for i, (t, d) in enumerate(ts.iter_dimension(time)):
+        xarray.testing.assert_allclose(d.datasets['exp1'], data.datasets['exp1']*i)
+    assert not ts.equivalent(data)
+
+    # the same cycle twice, or overlapping cycles
+    with pytest.raises(ValueError):
+        padme.Data.concat([cycle(0), cycle(0)])
+    t = numpy.array(['2022-01-01T00', '2022-01-01T03', '2022-01-01T06', '2022-01-01T09'],
+                    dtype='datetime64[s]')
+    with pytest.raises(ValueError):
+        padme.core.data.time_coordinate(t[[0, 1]], t[[2, 3]])
+
+    # different experiments
+    with pytest.raises(ValueError):
+        padme.Data.concat([cycle(0), cycle(1, 'exp2')])
@@ -0,0 +1,100 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.image
+import matplotlib.pyplot as plt
+
+import numpy
+import pytest
+import xarray
+
+import padme
+
+
+lat = xarray.DataArray(
+    **{k:'latitude' for k in ('name','dims')},
+    data=numpy.linspace(-90.0, 90.0, 19))
+lon = xarray.DataArray(
+    **{k:'longitude' for k in ('name','dims')},
+    data=numpy.linspace(0.0, 360.0, 37))
+
+dim_map = {
+    '1D': (lat,),
+    'latlon': (lat, lon),
+}
+
+@pytest.fixture(params=dim_map.keys())
+def dims(request):
+    return dim_map[request.param]
+
+@pytest.fixture(params=('global', 'arctic'))
+def domain(request):
+    return request.param
+
+def make_data(dims, seed):
+    shape = [len(d)-1 for d in dims]
+    rng = numpy.random.default_rng(seed)
+    raw_data = xarray.Dataset(
+        data_vars={'var1': ([d.name for d in dims], rng.random(shape)*seed)},
+        attrs={'window_start': '2022-01-01T00:00:00Z',
+               'window_end': '2022-01-01T06:00:00Z'})
+    return padme.Data('exp1', data=raw_data, coord_edges=dims)
+
+
+def render(data, filename, domain):
+    plotter = padme.Plotter(data, plot_parameters={'domain': domain})
+    plotter.plot(data, str(filename))
+    return matplotlib.image.imread(str(filename))
+
+
+def test_figure_template(dims, domain, natural_earth, figure_templates, tmp_path):
+    # render a sequence of plots with the template cache
+    figure_templates.enabled = True
+    cached = [render(make_data(dims, s), tmp_path / f'c{s}.png', domain)
+              for s in range(1, 4)]
+    assert len(figure_templates._templates) == 1
+    assert len(plt.get_fignums()) == 1
+
+    # which should be identical to the plots generated without it
+    figure_templates.clear()
+    figure_templates.enabled = False
+    for s, c in zip(range(1, 4), cached):
+        numpy.testing.assert_array_equal(
+            c, render(make_data(dims, s), tmp_path / f'u{s}.png', domain))
+    assert len(plt.get_fignums()) == 0
+
+
+def test_domain_geometry_cache(natural_earth, tmp_path):
+    from padme.plotters.two_dimensional.geometry_cache import geometry_cache
+    files = lambda: list(geometry_cache.directory.glob('domains/*.npz'))
+    for f in files():
+        f.unlink()
+
+    # first plot calculates the geometry and saves it, the next one reads it
+    images = []
+    for i in range(2):
+        images.append(render(make_data(dim_map['latlon'], 1), tmp_path / f'{i}.png', 'arctic'))
+        assert len(files()) == 1
+    numpy.testing.assert_array_equal(*images)
+
+    # and should be the same as without the cache
+    geometry_cache.enabled = False
+    try:
+        numpy.testing.assert_array_equal(
+            images[0],
+            render(make_data(dim_map['latlon'], 1), tmp_path / 'u.png', 'arctic'))
+    finally:
+        geometry_cache.enabled = True
+
+
+def test_domain_geometry_cache_unwritable(natural_earth, tmp_path, monkeypatch):
+    from padme.plotters.two_dimensional.geometry_cache import geometry_cache
+    # the cache directory can't be created, the plot is still made
+    (tmp_path / 'not_a_dir').touch()
+    monkeypatch.setattr(geometry_cache, 'directory', tmp_path / 'not_a_dir')
+    with pytest.warns(UserWarning, match='unable to write domain cache'):
+        render(make_data(dim_map['latlon'], 1), tmp_path / 'a.png', 'arctic')
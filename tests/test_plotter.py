@@ -3,7 +3,13 @@
 # This software is licensed under the terms of the Apache Licence Version 2.0
 # which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
 
+import gc
+import sys
+
+import numpy
 import pytest
+import xarray
+
 import padme
 import padme.core.plotter as plotter
 
@@ -13,9 +19,19 @@ def empty_factory():
     # temporarily create and empty Plotter factory,
     # saving the existing classes in there to revert when this fixture is done.
     default_classes = padme.Plotter._subclasses
+    default_lazy = padme.Plotter._lazy
+    default_cache = padme.Plotter._dispatch_cache
     padme.Plotter._subclasses = {}
+    padme.Plotter._lazy = {}
+    padme.Plotter._dispatch_cache = {}
     yield
     padme.Plotter._subclasses = default_classes
+    padme.Plotter._lazy = default_lazy
+    padme.Plotter._dispatch_cache = default_cache
+
+    # make sure the classes defined in the test are removed from the
+    # PlotterBase class hierarchy
+    gc.collect()
 
 
 def test_plotter_register(empty_factory):
@@ -64,3 +80,95 @@ def test_plotter_types():
     # abstract classes should not appear
     abstract_class = padme.plotters.matplotlib_base.MatplotlibBase._factory_name
     assert abstract_class not in padme.Plotter.types
+
+
+def test_plotter_register_lazy(empty_factory, tmp_path, monkeypatch):
+    module = tmp_path / 'lazy_plotter_module.py'
+    module.write_text(
+        'import padme\n'
+        'class LazyPlotter(padme.PlotterBase):\n'
+        '    @classmethod\n'
+        '    def is_valid(cls, data):\n'
+        '        return super().is_valid(data)\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    # registered by name, but not imported yet
+    padme.Plotter.register_lazy('lazy_plotter', 'lazy_plotter_module')
+    assert padme.Plotter.types == set(['lazy_plotter'])
+    assert 'lazy_plotter_module' not in sys.modules
+
+    # can't register the same name twice
+    with pytest.raises(RuntimeError):
+        padme.Plotter.register_lazy('lazy_plotter', 'lazy_plotter_module')
+
+    padme.Plotter.load()
+    assert 'lazy_plotter_module' in sys.modules
+    assert padme.Plotter._subclasses['lazy_plotter'].__name__ == 'LazyPlotter'
+    assert padme.Plotter.types == set(['lazy_plotter'])
+    assert padme.Plotter._lazy == {}
+
+    # a module that doesn't define the Plotter it was registered with
+    padme.Plotter.register_lazy('missing', 'lazy_plotter_module')
+    with pytest.raises(RuntimeError):
+        padme.Plotter.load()
+    padme.Plotter._lazy.clear()
+    sys.modules.pop('lazy_plotter_module')
+
+
+def test_plotter_lazy_import():
+    # importing padme, or its command line tools, should not import the
+    # plotting libraries. That only happens once a plotter is needed.
+    import subprocess
+    code = (
+        'import sys, padme, padme.bin.padme\n'
+        'print(" ".join(m for m in ("matplotlib", "cartopy") if m in sys.modules))\n'
+        'padme.Plotter.load()\n'
+        'print(" ".join(m for m in ("matplotlib", "cartopy") if m in sys.modules))\n')
+    out = subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    assert out.stdout.splitlines() == ['', 'matplotlib cartopy']
+
+
+def test_plotter_dispatch_cache(empty_factory):
+    # use dimensions that none of the built-in plotters can handle
+    dims = ('x', 'y', 'z')
+    edges = [xarray.DataArray(numpy.arange(3.0), name=d, dims=(d,)) for d in dims]
+    def make_data(nvars):
+        return padme.Data('exp1', coord_edges=edges, data=xarray.Dataset({
+            f'var{i}': (dims, numpy.zeros((2,2,2))) for i in range(nvars)}))
+
+    calls = []
+    class PlotterCounted(padme.PlotterBase, abstract=True):
+        @classmethod
+        def is_valid(cls, data: padme.Data) -> bool:
+            calls.append(data)
+            return super().is_valid(data)
+    class PlotterCountedChild(PlotterCounted):
+        @classmethod
+        def is_valid(cls, data: padme.Data) -> bool:
+            return super().is_valid(data)
+        def _pre_plot(self): pass
+        def _post_plot(self): pass
+        def _save(self, filename): pass
+
+    # the class tree is only walked once for data of the same structure
+    padme.Plotter(make_data(1))
+    ncalls = len(calls)
+    assert ncalls > 0
+    data = make_data(1)
+    assert isinstance(padme.Plotter(data), PlotterCountedChild)
+    assert len(calls) == ncalls
+    # the signature of the data is cheap, the per experiment views aren't built
+    assert data._datasets is None
+
+    # but is for data of a different structure
+    padme.Plotter(make_data(2))
+    assert len(calls) == 2 * ncalls
+
+    # registering a new plotter invalidates the cache
+    class PlotterCountedChild2(PlotterCounted):
+        @classmethod
+        def is_valid(cls, data: padme.Data) -> bool:
+            return super().is_valid(data) and data.nvars > 1
+    padme.Plotter(make_data(1))
+    assert len(calls) > 2 * ncalls
@@ -0,0 +1,97 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import matplotlib
+matplotlib.use('Agg')
+
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+
+import padme
+from padme.bin import serve
+
+PNG = b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.fixture
+def server(natural_earth, figure_templates, monkeypatch):
+    monkeypatch.setattr(padme.DataAdapter, 'cache', padme.core.data_adapter.DataCache())
+    server = serve.PlotServer(('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def post(url, spec):
+    request = urllib.request.Request(
+        url + '/plot', data=json.dumps(spec).encode(),
+        headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return response.headers['Content-Type'], response.read()
+
+
+def test_query_spec():
+    assert serve.query_spec(
+        'input=obs.nc&diagnostic=OmB:mean&select=sensor_channel:7&collapse=latitude'
+        '&param=title:OmB&option=bins:{latitude:%2018}') == {
+            'input': 'obs.nc', 'diagnostic': 'OmB:mean',
+            'select': {'sensor_channel': '7'}, 'collapse': ['latitude'],
+            'params': {'title': 'OmB'}, 'options': {'bins': {'latitude': 18}}}
+
+
+def test_serve(server, ioda_file):
+    spec = {'input': ioda_file, 'format': 'ioda', 'diagnostic': 'OmB:mean'}
+    content_type, image = post(server, spec)
+    assert content_type == 'image/png'
+    assert image.startswith(PNG)
+
+    # the second request reuses the data read by the first
+    cache = padme.DataAdapter.cache
+    content_type, image = post(server, {**spec, 'image': 'svg'})
+    assert content_type == 'image/svg+xml'
+    assert b'<svg' in image
+    assert cache.hits == 1
+
+    query = urllib.parse.urlencode({
+        'input': ioda_file, 'format': 'ioda', 'diagnostic': 'hofx:mean',
+        'option': 'bins:{latitude: 18}'})
+    with urllib.request.urlopen(f'{server}/plot?{query}') as response:
+        assert response.read().startswith(PNG)
+
+    # bad requests
+    for bad in ({**spec, 'output': 'a.png'}, {**spec, 'image': 'bmp'},
+                {**spec, 'input': 'missing.nc'}):
+        with pytest.raises(urllib.error.HTTPError) as e:
+            post(server, bad)
+        assert e.value.code == 400
+
+
+def test_serve_parameters(server, ioda_file):
+    # the parameters given for one request are not used by the next
+    spec = {'input': ioda_file, 'format': 'ioda', 'diagnostic': 'OmB:mean'}
+    width = lambda png: int.from_bytes(png[16:20], 'big')
+    default = width(post(server, spec)[1])
+    assert width(post(server, {**spec, 'params': {'fig_width': 3}})[1]) < default
+    assert width(post(server, spec)[1]) == default
+
+
+def test_server_close(natural_earth, figure_templates):
+    # the cache and templates are returned to how they were before
+    cache = padme.DataAdapter.cache
+    figure_templates.enabled = True
+    enabled = cache.enabled
+    server = serve.PlotServer(('127.0.0.1', 0))
+    assert cache.enabled and figure_templates.enabled
+    server.server_close()
+    assert cache.enabled == enabled
+    assert figure_templates.enabled
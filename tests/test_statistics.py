@@ -0,0 +1,53 @@
+# (C) Copyright 2022-2022 UCAR
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+import numpy
+import pytest
+
+from padme.core.statistics import FieldStatistics, RangeSketch, field_statistics
+
+
+def expected(z, pct):
+    return FieldStatistics(
+        numpy.count_nonzero(~numpy.isnan(z)),
+        numpy.nanmin(z), numpy.nanmean(z), numpy.nanmax(z),
+        *numpy.nanpercentile(z, [100*(1.0-pct)/2.0, 100*((1.0-pct)/2.0 + pct)]))
+
+
+@pytest.mark.parametrize('n', (1, 2, 5, 100, 10001))
+@pytest.mark.parametrize('pct', (0.99, 0.5, 1.0))
+def test_field_statistics(n, pct):
+    rng = numpy.random.default_rng(n)
+    z = rng.normal(size=n)
+    z[1::7] = numpy.nan
+    numpy.testing.assert_allclose(field_statistics(z, pct), expected(z, pct))
+
+    # a sketch is exact until it has more than "size" values
+    sketch = RangeSketch.from_chunks(numpy.array_split(z, 3), size=2*n)
+    numpy.testing.assert_allclose(sketch.statistics(pct), expected(z, pct))
+
+
+def test_field_statistics_empty():
+    stats = field_statistics(numpy.full((3, 3), numpy.nan))
+    assert stats.count == 0
+    assert numpy.isnan(stats.lower) and numpy.isnan(stats.upper)
+    assert RangeSketch().statistics().count == 0
+
+
+def test_range_sketch():
+    rng = numpy.random.default_rng(0)
+    z = rng.normal(size=(20, 10000))
+    exact = expected(z, 0.99)
+
+    # sketches of parts of the data merge into a sketch of all of it
+    a = RangeSketch.from_chunks(z[:10])
+    b = RangeSketch.from_chunks(z[10:])
+    for sketch in (RangeSketch.from_chunks(z), a.merge(b)):
+        stats = sketch.statistics(0.99)
+        assert stats.count == z.size
+        assert stats.min == exact.min and stats.max == exact.max
+        numpy.testing.assert_allclose(stats.mean, exact.mean)
+        numpy.testing.assert_allclose(stats[4:], exact[4:], atol=0.05)
+        assert len(sketch._points) <= sketch.size